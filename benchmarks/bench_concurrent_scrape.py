@@ -0,0 +1,66 @@
+"""
+Benchmark the serial and concurrent WebScraper.scrape_all_sites against local stub sites.
+
+Run from the repository root:
+    python -m benchmarks.bench_concurrent_scrape --sources 5 --articles 20 --latency 0.2 --workers 16
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+from contextlib import ExitStack
+
+from benchmarks.stub_server import StubSite
+from scripts.collect_data import WebScraper
+
+
+def run_scraper(config_path: str, output_name: str, max_workers: int, per_host_limit: int, today_flag: bool = False):
+    """Run one full scrape with the scraper's output silenced, returning (seconds, articles, stats)."""
+    scraper = WebScraper(config_path, max_workers=max_workers, per_host_limit=per_host_limit)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        articles = scraper.scrape_all_sites(output_name, today_flag)
+        elapsed = time.perf_counter() - start
+    return elapsed, articles, scraper.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", type=int, default=5, help="number of stub sites")
+    parser.add_argument("--articles", type=int, default=20, help="max_articles per site")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds of latency added to every response")
+    parser.add_argument("--workers", type=int, default=16, help="worker threads for the concurrent run")
+    parser.add_argument("--per-host", type=int, default=4, help="concurrent requests allowed per host")
+    args = parser.parse_args()
+
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        sites = [stack.enter_context(StubSite(f"Stub {i}", args.articles, args.latency)) for i in range(args.sources)]
+        config_path = os.path.join(tmp, "collect_bench.ini")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(site.config_section(args.articles) for site in sites))
+
+        serial_time, serial_articles, serial_stats = run_scraper(config_path, os.path.join(tmp, "serial"), 1, args.per_host)
+        concurrent_time, concurrent_articles, concurrent_stats = run_scraper(
+            config_path, os.path.join(tmp, "concurrent"), args.workers, args.per_host
+        )
+
+        with open(os.path.join(tmp, "serial.json"), encoding="utf-8") as f:
+            serial_json = json.load(f)
+        with open(os.path.join(tmp, "concurrent.json"), encoding="utf-8") as f:
+            concurrent_json = json.load(f)
+
+    print(f"Sources: {args.sources} | Articles per source: {args.articles} | Latency: {args.latency}s")
+    print(f"Serial:     {serial_time:7.2f}s ({len(serial_articles or [])} articles)")
+    print(f"Concurrent: {concurrent_time:7.2f}s ({len(concurrent_articles or [])} articles, "
+          f"{args.workers} workers, {args.per_host} per host)")
+    print(f"Speedup:    {serial_time / concurrent_time:7.2f}x")
+    print(f"Identical output: {serial_json == concurrent_json}")
+    print(f"Serial fetches/parses:     {serial_stats}")
+    print(f"Concurrent fetches/parses: {concurrent_stats}")
+
+
+if __name__ == "__main__":
+    main()
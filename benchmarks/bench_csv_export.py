@@ -0,0 +1,161 @@
+"""
+Benchmark the CSV export: loading the whole JSON output and writing it with the old
+convert_json_to_csv, against streaming it from the file with the current one.
+
+The analysed outputs are repeated with --copies into an archive-sized JSON array file (and a
+JSONL store). Each export runs in its own process so its peak memory (RSS) can be measured,
+and the CSV files written must be identical. A last check exports False (what scrape_all_sites returns
+when it finds nothing) and an empty list, which must print "No data to write." and write no file.
+
+Run from the repository root:
+    python -m benchmarks.bench_csv_export --copies 200
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from scripts.article_store import ArticleStore, iter_json_array
+from scripts.convert_json_to_csv import convert_json_to_csv
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = [
+    os.path.join(BASE_DIR, "sample_output", "batch_articles_AI.json"),
+    os.path.join(BASE_DIR, "data", "all_articles_output.json"),
+]
+
+
+def old_convert_json_to_csv(json_data, output_csv, append_flag):
+    """convert_json_to_csv before streaming: columns from the first article, rows written one by one."""
+    first_entry = json_data[0]
+    fieldnames = []
+    for key in first_entry:
+        if key == "summary_data":
+            if isinstance(first_entry["summary_data"], dict):
+                fieldnames.extend(first_entry["summary_data"].keys())
+        else:
+            fieldnames.append(key)
+
+    with open(output_csv, "a" if append_flag else "w", newline="", encoding="utf-8-sig") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        writer.writeheader()
+        for entry in json_data:
+            row = {}
+            for key in first_entry:
+                if key == "cleaned_text":
+                    text = entry.get("cleaned_text", "")
+                    row["cleaned_text"] = text[:32500] + " [READ MORE FROM URL]" if len(text) > 32500 else text
+                elif key == "summary_data":
+                    summary_data = entry.get("summary_data", {})
+                    if isinstance(summary_data, dict):
+                        for subkey in summary_data:
+                            row[subkey] = summary_data.get(subkey, "")
+                else:
+                    row[key] = entry.get(key, "")
+            writer.writerow(row)
+
+
+def run_export(mode: str, input_path: str, output_csv: str):
+    """Run one export in this process and print its time and peak RSS as JSON."""
+    start = time.perf_counter()
+    if mode == "old":
+        with open(input_path, "r", encoding="utf-8") as f:
+            old_convert_json_to_csv(json.load(f), output_csv, False)
+    else:
+        convert_json_to_csv(input_path, output_csv, False)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_mib": peak_rss_kib() / 1024}))
+
+
+def peak_rss_kib() -> int:
+    """Peak RSS of this process. ru_maxrss can include the parent's peak from before exec, so VmHWM is used on Linux."""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss # KiB on Linux
+
+
+def write_inputs(tmp: str, copies: int) -> tuple:
+    """Write the analysed outputs, repeated copies times, as a JSON array file and a JSONL store."""
+    articles = []
+    for path in DATASETS:
+        if os.path.exists(path):
+            articles.extend(a for a in iter_json_array(path) if isinstance(a, dict) and "summary_data" in a)
+    json_path = os.path.join(tmp, "archive.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(copies):
+            for j, article in enumerate(articles):
+                f.write(",\n" if i or j else "\n")
+                f.write(json.dumps(article, ensure_ascii=False, indent=9))
+        f.write("\n]")
+    jsonl_path = os.path.join(tmp, "archive.jsonl")
+    ArticleStore(jsonl_path).write(article for _ in range(copies) for article in articles)
+    return json_path, jsonl_path, len(articles) * copies
+
+
+def check_empty_inputs(tmp: str) -> bool:
+    """Export False and [], which must not raise or write a file. Returns True if both passed."""
+    passed = True
+    for empty in (False, []):
+        output_csv = os.path.join(tmp, "empty.csv")
+        printed = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(printed):
+                convert_json_to_csv(empty, output_csv, False)
+            ok = "No data to write." in printed.getvalue() and not os.path.exists(output_csv)
+        except Exception as e:
+            printed.write(repr(e))
+            ok = False
+        print(f"Export of {empty!r}: {'OK' if ok else 'FAILED - ' + printed.getvalue().strip()}")
+        passed = passed and ok
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=100, help="How many times to repeat the analysed outputs")
+    parser.add_argument("--run", nargs=3, metavar=("MODE", "INPUT", "OUTPUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_export(*args.run)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path, jsonl_path, count = write_inputs(tmp, args.copies)
+        print(f"{count} articles | JSON {os.path.getsize(json_path) / 2**20:.0f} MiB "
+              f"| JSONL {os.path.getsize(jsonl_path) / 2**20:.0f} MiB\n")
+
+        runs = [("Load + old export", "old", json_path), ("Streamed from JSON", "new", json_path),
+                ("Streamed from JSONL", "new", jsonl_path)]
+        outputs = []
+        print(f"{'Export':<22} {'Time':>8} {'Peak RSS':>10}")
+        for label, mode, input_path in runs:
+            output_csv = os.path.join(tmp, f"{label.split()[0]}_{os.path.basename(input_path)}.csv")
+            result = subprocess.run([sys.executable, "-m", "benchmarks.bench_csv_export", "--run", mode,
+                                     input_path, output_csv], capture_output=True, text=True, check=True, cwd=BASE_DIR)
+            measured = json.loads(result.stdout.strip().splitlines()[-1])
+            print(f"{label:<22} {measured['seconds']:7.2f}s {measured['peak_mib']:8.0f}MiB")
+            with open(output_csv, "rb") as f:
+                outputs.append(hashlib.sha256(f.read()).hexdigest())
+            os.remove(output_csv)
+        print(f"\nIdentical CSV: {all(output == outputs[0] for output in outputs)}")
+        check_empty_inputs(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark date normalisation: dateutil's fuzzy parser on every date (the old standardise_date)
+against DateNormaliser's learned per-source formats, with and without its memo.
+
+The dates of the scraped archive are written out the way news sites show them (one style per
+source, e.g. "24th July 2025", "Thursday, July 24, 2025", "2025-07-24T10:00:00+01:00"), and both
+approaches must give identical output, including for the dates neither can read.
+
+Run from the repository root:
+    python -m benchmarks.bench_dates --copies 50
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from dateutil import parser as date_parser
+
+from scripts.date_normaliser import DateNormaliser
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARCHIVE_PATH = os.path.join(BASE_DIR, "archive-scrapped-articles", "UC Today and Comms Dealer.json")
+
+
+def ordinal(day: int) -> str:
+    suffix = "th" if 11 <= day <= 13 else {1: "st", 2: "nd", 3: "rd"}.get(day % 10, "th")
+    return f"{day}{suffix}"
+
+
+# How each simulated source shows its dates
+SITE_STYLES = {
+    "Ordinal site": lambda d: f"{ordinal(d.day)} {d:%B %Y}",
+    "US site": lambda d: f"{d:%A, %B} {d.day}, {d:%Y}",
+    "ISO site": lambda d: f"{d:%Y-%m-%d}T{d.hour:02}:{d.minute:02}:00+01:00",
+    "Byline site": lambda d: f"{d:%d %b %Y} - {d.hour:02}:{d.minute:02} | By Staff Writer",
+}
+UNREADABLE = ["Date not found", "Yesterday evening", ""]
+
+
+def old_standardise_date(text: str) -> str:
+    """WebScraper.standardise_date before DateNormaliser."""
+    try:
+        cleaned = re.sub(r'(\d{1,2})(st|nd|rd|th)', r'\1', text)
+        cleaned = re.split(r'[-–](?!\d)', cleaned)[0]
+        dt = date_parser.parse(cleaned.strip(), fuzzy=True)
+        return dt.strftime('%d-%m-%Y')
+    except Exception as e:
+        return f"Could not parse: {text} ({e})"
+
+
+def new_standardise_date(normaliser: DateNormaliser, text: str, source: str) -> str:
+    try:
+        return normaliser.format(text, source)
+    except Exception as e:
+        return f"Could not parse: {text} ({e})"
+
+
+def load_dates(copies: int) -> list:
+    """(source, raw date text) pairs: each archived date in every site's style, plus a few unreadable ones."""
+    with open(ARCHIVE_PATH, "r", encoding="utf-8") as f:
+        archive = json.load(f)
+    dates = []
+    for i, article in enumerate(archive):
+        try:
+            published = datetime.strptime(article["date"], "%d-%m-%Y").replace(hour=i % 24, minute=i % 60)
+        except (KeyError, ValueError):
+            continue
+        for source, style in SITE_STYLES.items():
+            dates.append((source, style(published)))
+    dates += [(source, text) for source in SITE_STYLES for text in UNREADABLE]
+    return dates * copies
+
+
+def timed(function) -> tuple:
+    start = time.perf_counter()
+    result = function()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=20, help="How many times to repeat the archived dates")
+    args = parser.parse_args()
+
+    dates = load_dates(args.copies)
+    distinct = len(set(dates))
+    print(f"{len(dates)} dates ({distinct} distinct) from {len(SITE_STYLES)} date styles\n")
+
+    old_ms, old_output = timed(lambda: [old_standardise_date(text) for _, text in dates])
+
+    # Memo smaller than the number of distinct dates, so only the learned formats help
+    no_memo = DateNormaliser(memo_size=0)
+    fast_ms, fast_output = timed(lambda: [new_standardise_date(no_memo, text, source) for source, text in dates])
+
+    memoised = DateNormaliser()
+    memo_ms, memo_output = timed(lambda: [new_standardise_date(memoised, text, source) for source, text in dates])
+
+    print(f"{'Approach':<28} {'Time':>10} {'Per date':>10} {'Speed-up':>9}")
+    for label, ms in (("Fuzzy parse every date", old_ms), ("Learned formats", fast_ms),
+                      ("Learned formats + memo", memo_ms)):
+        print(f"{label:<28} {ms:8.1f}ms {ms * 1000 / len(dates):8.1f}us {old_ms / ms:8.1f}x")
+    print(f"\nLearned formats: {no_memo.learned}")
+    print(f"Without memo: {no_memo.stats}")
+    print(f"With memo:    {memoised.stats}")
+    print(f"Identical output: {old_output == fast_output == memo_output}")
+
+
+if __name__ == "__main__":
+    main()
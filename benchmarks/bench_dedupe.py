@@ -0,0 +1,94 @@
+"""
+Compare local MinHash/LSH de-duplication with the single de-duplication prompt sent to Bedrock.
+
+Near-duplicates are injected into the archived articles (copies with a share of their words changed)
+so the recall of the local detector can be measured. The prompt-based approach is measured by the
+size of the prompt it would send; pass --bedrock to also time a real Bedrock call (needs AWS credentials).
+
+Run from the repository root:
+    python -m benchmarks.bench_dedupe --inject 20 --edit-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from scripts.add_summaries import AnalyseData
+from scripts.near_duplicates import DEFAULT_THRESHOLD, article_text, find_duplicate_clusters
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(BASE_DIR, "examples", "summary_example.ini")
+ARTICLES_PATH = os.path.join(BASE_DIR, "archive-scrapped-articles", "UC Today and Comms Dealer.json")
+
+
+def with_summaries(articles: list) -> list:
+    """The archive has no summary_data, so use the start of each article (about 2-3 sentences) as its summary."""
+    result = []
+    for article in articles:
+        article = dict(article)
+        if "summary_data" not in article:
+            article["summary_data"] = {"summary": article["cleaned_text"][:400]}
+        result.append(article)
+    return result
+
+
+def inject_duplicates(articles: list, count: int, edit_rate: float, seed: int = 0) -> list:
+    """Append count edited copies of random articles. Returns the list of (original, copy) index pairs."""
+    rng = random.Random(seed)
+    pairs = []
+    for original in rng.sample(range(len(articles)), min(count, len(articles))):
+        copy = dict(articles[original])
+        words = copy["cleaned_text"].split()
+        for _ in range(int(len(words) * edit_rate)):
+            words[rng.randrange(len(words))] = rng.choice(["reportedly", "new", "operator", "UK", "said"])
+        copy["cleaned_text"] = " ".join(words)
+        articles.append(copy)
+        pairs.append((original, len(articles) - 1))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=ARTICLES_PATH, help="JSON list of articles")
+    parser.add_argument("--inject", type=int, default=20, help="number of near-duplicates to inject")
+    parser.add_argument("--edit-rate", type=float, default=0.05, help="share of words changed in each injected copy")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="similarity threshold")
+    parser.add_argument("--bedrock", action="store_true", help="also time the de-duplication prompt on Bedrock")
+    args = parser.parse_args()
+
+    with open(args.input, "r", encoding="utf-8") as f:
+        articles = with_summaries(json.load(f))
+    pairs = inject_duplicates(articles, args.inject, args.edit_rate)
+
+    # Local MinHash/LSH
+    start = time.perf_counter()
+    clusters = find_duplicate_clusters([article_text(a) for a in articles], args.threshold)
+    local_time = time.perf_counter() - start
+    cluster_of = {i: tuple(cluster) for cluster in clusters for i in cluster}
+    found = sum(1 for original, copy in pairs if cluster_of.get(original) is not None
+                and cluster_of.get(original) == cluster_of.get(copy))
+
+    print(f"Articles: {len(articles)} ({len(pairs)} injected near-duplicates, {args.edit_rate:.0%} of words edited)")
+    print(f"Local MinHash/LSH: {local_time * 1000:8.1f} ms | {len(clusters)} clusters | "
+          f"injected duplicates found: {found}/{len(pairs)}")
+    largest = max((len(c) for c in clusters), default=0)
+    print(f"  Largest candidate group: {largest} articles (the only prompt size hybrid mode sends to Bedrock)")
+
+    # Single prompt with every article
+    analyser = AnalyseData(input_json="benchmark", config_path=CONFIG_PATH)
+    summarised_data = [[i, a["title"], a["summary_data"]["summary"]] for i, a in enumerate(articles)]
+    prompt = analyser.de_duplicate_prompt_template.format(data=summarised_data)
+    print(f"Bedrock prompt:    {len(prompt):8d} characters | ~{len(prompt) // 4} input tokens in one call | "
+          f"max_tokens {analyser.tokens} for the answer")
+
+    if args.bedrock:
+        start = time.perf_counter()
+        removed = analyser._bedrock_duplicate_indexes(articles, list(range(len(articles))))
+        bedrock_time = time.perf_counter() - start
+        print(f"Bedrock call:      {bedrock_time * 1000:8.1f} ms | {len(removed)} articles marked as duplicates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Micro-benchmark of the HTML extraction: a full BeautifulSoup tree per page (the old approach)
+against the lxml/XPath extraction layer in scripts/extraction.py, on saved pages of every
+configured site. The extracted values of both approaches are compared, so the benchmark also
+checks that the extraction layer gives identical results.
+
+Save the fixtures once (downloads each site's homepage and first few articles):
+    python -m benchmarks.bench_extraction --save --articles 5
+Then run the benchmark from the repository root:
+    python -m benchmarks.bench_extraction --workers 4
+
+Without saved fixtures, generated pages the size of a real news page are used instead.
+"""
+
+import argparse
+import configparser
+import contextlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from benchmarks.stub_server import StubSite
+from scripts.collect_data import WebScraper
+from scripts.extraction import Page, extract_article, select_links
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(BASE_DIR, "examples", "collect_example.ini")
+FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+
+# Navigation, scripts and footer around the article, so generated pages are as big as real ones
+PAGE_CHROME = (
+    "<header><nav>" + "".join(f'<a href="/section/{i}">Section {i}</a>' for i in range(300)) + "</nav></header>"
+    + "<script>" + "var tracking = {};" * 2000 + "</script>"
+    + "<footer>" + "".join(f'<div class="promo"><p>Promotion {i}</p></div>' for i in range(300)) + "</footer>"
+)
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def save_fixtures(config: configparser.ConfigParser, fixtures_dir: str, articles: int):
+    """Download each configured site's homepage and first articles into fixtures_dir."""
+    scraper = WebScraper(CONFIG_PATH)
+    for source in config.sections():
+        section = config[source]
+        site_dir = os.path.join(fixtures_dir, slug(source))
+        os.makedirs(site_dir, exist_ok=True)
+        homepage = section["homepage"]
+        html = scraper._fetch_html(homepage)
+        if html is None:
+            print(f"Could not download {homepage}, skipping {source}")
+            continue
+        pages = {"source": source, "listing": {"url": homepage, "file": "listing.html"}, "articles": []}
+        with open(os.path.join(site_dir, "listing.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        links = select_links(html, homepage, section["article_link_selector"])["links"]
+        for i, url in enumerate(dict.fromkeys(links)):
+            if i >= articles:
+                break
+            article_html = scraper._fetch_html(url)
+            if article_html is None:
+                continue
+            file_name = f"article_{i}.html"
+            with open(os.path.join(site_dir, file_name), "w", encoding="utf-8") as f:
+                f.write(article_html)
+            pages["articles"].append({"url": url, "file": file_name})
+        with open(os.path.join(site_dir, "pages.json"), "w", encoding="utf-8") as f:
+            json.dump(pages, f, indent=4)
+        print(f"Saved {len(pages['articles'])} articles of {source} to {site_dir}")
+
+
+def load_fixtures(config: configparser.ConfigParser, fixtures_dir: str) -> list:
+    """Return (source, section, listing (url, html), [(url, html)]) for every site with saved fixtures."""
+    fixtures = []
+    for source in config.sections():
+        site_dir = os.path.join(fixtures_dir, slug(source))
+        pages_path = os.path.join(site_dir, "pages.json")
+        if not os.path.exists(pages_path):
+            continue
+        with open(pages_path, encoding="utf-8") as f:
+            pages = json.load(f)
+
+        def read(page):
+            with open(os.path.join(site_dir, page["file"]), encoding="utf-8") as f:
+                return page["url"], f.read()
+
+        fixtures.append((source, config[source], read(pages["listing"]), [read(p) for p in pages["articles"]]))
+    return fixtures
+
+
+def generated_fixtures(sites: int = 3, articles: int = 5) -> list:
+    """Stub site pages wrapped in page chrome, for when no fixtures are saved."""
+    config = configparser.ConfigParser()
+    fixtures = []
+    for i in range(sites):
+        site = StubSite(f"Generated {i}", num_articles=articles, paragraphs=20)
+        config.read_string(site.config_section(articles).replace(site.homepage, "http://generated.test/"))
+        section = config[site.name]
+        wrap = lambda html: html.replace("<body>", "<body>" + PAGE_CHROME)
+        listing = ("http://generated.test/", wrap(site.render("/")))
+        pages = [(f"http://generated.test/article/{n}", wrap(site.render(f"/article/{n}"))) for n in range(articles)]
+        fixtures.append((site.name, section, listing, pages))
+        site._server.server_close()
+    return fixtures
+
+
+def soup_listing(html: str, url: str, section) -> list:
+    """The old listing extraction: a full BeautifulSoup tree per page."""
+    soup = BeautifulSoup(html, "lxml")
+    links = [urljoin(url, a.get("href")) for a in soup.select(section["article_link_selector"]) if a.get("href")]
+    next_url = None
+    if section.get("next_page_selector"):
+        next_link = soup.select_one(section["next_page_selector"])
+        if next_link and next_link.has_attr("href"):
+            next_url = urljoin(url, next_link["href"])
+    return links, next_url
+
+
+def lxml_listing(html: str, url: str, section) -> list:
+    page = select_links(html, url, section["article_link_selector"], section.get("next_page_selector"))
+    return page["links"], page["next_by_selector"]
+
+
+def fields_from(page, section) -> tuple:
+    """Read the date, title and content selectors from a BeautifulSoup tree or an extraction Page."""
+    date_element = page.select_one(section["date_selector"])
+    if section.get("date_attribute"):
+        date_text = date_element.get(section["date_attribute"]) if date_element else None
+    else:
+        date_text = date_element.get_text(strip=True) if date_element else None
+    title_element = page.select_one(section["title_selector"])
+    title = title_element.get_text(strip=True) if title_element else None
+    content = [e.get_text(separator=" ", strip=True) for e in page.select(section["content_selector"])]
+    return date_text, title, " ".join(" ".join(content).split())
+
+
+def soup_article(html: str, section) -> tuple:
+    return fields_from(BeautifulSoup(html, "lxml"), section)
+
+
+def lxml_article(html: str, section) -> tuple:
+    return fields_from(Page(html), section)
+
+
+def timed(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def newspaper_extraction(job: tuple) -> dict:
+    url, html, section = job
+    fields = extract_article(url, html, section["date_selector"], section.get("date_attribute"),
+                             section["title_selector"], section["content_selector"])
+    del fields["timings"] # Differs between runs
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Folder of saved pages")
+    parser.add_argument("--save", action="store_true", help="Download fresh fixtures from the configured sites first")
+    parser.add_argument("--articles", type=int, default=5, help="Articles to save per site")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4, help="Workers for the thread and process pool comparison")
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(CONFIG_PATH)
+    if args.save:
+        save_fixtures(config, args.fixtures, args.articles)
+
+    fixtures = load_fixtures(config, args.fixtures)
+    if not fixtures:
+        print(f"No saved fixtures in {args.fixtures} - run with --save to download pages from the configured sites.")
+        print("Using generated pages instead.\n")
+        fixtures = generated_fixtures(articles=args.articles)
+
+    print(f"{'Site':<22} {'Page':<8} {'KiB':>6} {'Soup':>9} {'lxml':>9} {'Speed-up':>9}  Identical")
+    all_jobs = []
+    totals = [0.0, 0.0]
+    for source, section, (listing_url, listing_html), articles in fixtures:
+        pages = [("listing", listing_html, lambda h: soup_listing(h, listing_url, section),
+                  lambda h: lxml_listing(h, listing_url, section))]
+        pages += [("article", html, lambda h: soup_article(h, section), lambda h: lxml_article(h, section))
+                  for _, html in articles]
+        for kind, html, old, new in pages:
+            identical = old(html) == new(html)
+            soup_ms = timed(lambda: old(html), args.repeats)
+            lxml_ms = timed(lambda: new(html), args.repeats)
+            totals[0] += soup_ms
+            totals[1] += lxml_ms
+            print(f"{source[:22]:<22} {kind:<8} {len(html) / 1024:6.0f} {soup_ms:7.2f}ms {lxml_ms:7.2f}ms "
+                  f"{soup_ms / lxml_ms:8.1f}x  {identical}")
+        all_jobs += [(url, html, dict(section)) for url, html in articles]
+    print(f"{'Total':<22} {'':<8} {'':>6} {totals[0]:7.1f}ms {totals[1]:7.1f}ms {totals[0] / totals[1]:8.1f}x\n")
+
+    # Full article extraction (newspaper3k + selectors) across workers
+    jobs = all_jobs * max(1, 40 // max(1, len(all_jobs)))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(args.workers) as pool:
+            thread_results = list(pool.map(newspaper_extraction, jobs))
+        thread_seconds = time.perf_counter() - start
+        with ProcessPoolExecutor(args.workers) as pool:
+            list(pool.map(newspaper_extraction, jobs[:args.workers])) # Start the processes before timing
+            start = time.perf_counter()
+            process_results = list(pool.map(newspaper_extraction, jobs))
+            process_seconds = time.perf_counter() - start
+    print(f"Full extraction of {len(jobs)} articles with {args.workers} workers:")
+    print(f"  Threads:   {thread_seconds:6.2f}s")
+    print(f"  Processes: {process_seconds:6.2f}s ({thread_seconds / process_seconds:.1f}x, identical: {thread_results == process_results})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark adaptive extraction selection (scripts/extractor_stats.py) against local stub sites, whose
+article dates newspaper3k cannot find. The sites are scraped with newspaper3k always first, then twice
+with the extractor statistics (a first run that learns them, and a second run that starts from the
+saved statistics), and twice more with selector_text = true, which opts the sites in to the selectors'
+title and text. Reports the time spent extracting articles and the newspaper3k parses skipped, and
+checks each run's saved articles against those of newspaper3k first. The default runs must save the
+same articles apart from whitespace (the selectors' text is saved without paragraph breaks); the stub
+sites' selectors find the same title and text as newspaper3k, so they skip newspaper3k. The selector_text
+runs skip it whatever the text, so they would also differ where the selectors find different text.
+
+Run from the repository root:
+    python -m benchmarks.bench_extractor_selection --sources 3 --articles 40
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import tempfile
+import time
+from contextlib import ExitStack
+
+from benchmarks.stub_server import StubSite
+from scripts.collect_data import WebScraper
+from scripts.metrics import Metrics
+
+
+def run(config_path: str, output_name: str, args, stats_path: str = None) -> dict:
+    metrics = Metrics()
+    scraper = WebScraper(config_path, max_workers=args.workers, metrics=metrics, extractor_stats_path=stats_path)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        articles = scraper.scrape_all_sites(output_name) or []
+        elapsed = time.perf_counter() - start
+    with open(output_name + ".json", encoding="utf-8") as f:
+        output = json.load(f)
+    extraction = (metrics.histogram("parse_seconds", parser="newspaper").sum
+                  + metrics.histogram("parse_seconds", parser="selectors").sum)
+    strategies = [row['strategy'] for row in scraper.extractor_stats.report()] if stats_path else []
+    return {"seconds": elapsed, "extraction": extraction, "articles": len(articles), "output": output,
+            "newspaper": scraper.stats['newspaper_parses'], "skipped": scraper.stats['newspaper_skipped'],
+            "strategies": strategies}
+
+
+def same_text(articles: list, expected: list) -> bool:
+    """Check two outputs hold the same articles, apart from the whitespace in their values."""
+    def normalised(output):
+        return [{key: " ".join(value.split()) if isinstance(value, str) else value for key, value in article.items()}
+                for article in output]
+    return normalised(articles) == normalised(expected)
+
+
+def write_config(path: str, sites: list, args, selector_text: bool = False):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(site.config_section(args.articles) + ("selector_text = true\n" if selector_text else "")
+                          for site in sites))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", type=int, default=3, help="number of stub sites")
+    parser.add_argument("--articles", type=int, default=40, help="max_articles per site")
+    parser.add_argument("--paragraphs", type=int, default=8, help="paragraphs in each article")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        sites = [stack.enter_context(StubSite(f"Stub {i}", args.articles, 0.0, paragraphs=args.paragraphs))
+                 for i in range(args.sources)]
+        config_path = os.path.join(tmp, "collect_bench.ini")
+        write_config(config_path, sites, args)
+        opt_in_path = os.path.join(tmp, "collect_bench_selector_text.ini")
+        write_config(opt_in_path, sites, args, selector_text=True)
+        stats_path = os.path.join(tmp, "extractor_stats.sqlite")
+        opt_in_stats_path = os.path.join(tmp, "extractor_stats_selector_text.sqlite")
+
+        print(f"Sources: {args.sources} | Articles per source: {args.articles} | Paragraphs: {args.paragraphs} "
+              f"| Workers: {args.workers}")
+        runs = (("newspaper3k first", config_path, None),
+                ("Adaptive, 1st run", config_path, stats_path),
+                ("Adaptive, 2nd run", config_path, stats_path),
+                ("selector_text, 1st", opt_in_path, opt_in_stats_path),
+                ("selector_text, 2nd", opt_in_path, opt_in_stats_path))
+        expected = None
+        for i, (label, config, path) in enumerate(runs):
+            result = run(config, os.path.join(tmp, f"run_{i}"), args, path)
+            expected = expected if expected is not None else result['output']
+            chosen = f" | chosen: {', '.join(sorted(set(result['strategies'])))}" if result['strategies'] else ""
+            print(f"{label:<18} {result['seconds']:6.2f}s | extraction {result['extraction']:6.2f}s | "
+                  f"{result['articles']} articles | newspaper3k parses {result['newspaper']}, skipped {result['skipped']}"
+                  f" | identical output: {result['output'] == expected}, apart from whitespace: "
+                  f"{same_text(result['output'], expected)}{chosen}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare the NumPy facet table with re-splitting the summary_data strings of every article
+for each question (facet counts, a co-occurrence matrix and weekly mentions per source).
+
+The analysed output files are used (the scraped archive has no summary_data), repeated
+with --copies to see how both approaches grow with the archive.
+
+Run from the repository root:
+    python -m benchmarks.bench_facets --copies 50
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from scripts.article_query import parse_date
+from scripts.facet_analytics import FacetTable
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = [
+    os.path.join(BASE_DIR, "sample_output", "batch_articles_AI.json"),
+    os.path.join(BASE_DIR, "data", "all_articles_output.json"),
+]
+
+
+def load_datasets(copies: int) -> list:
+    articles = []
+    for path in DATASETS:
+        if not os.path.exists(path):
+            print(f"Skipping missing dataset {path}")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            articles.extend(a for a in json.load(f) if isinstance(a, dict) and isinstance(a.get("summary_data"), dict))
+    return articles * copies
+
+
+def split_values(article: dict, field: str) -> set:
+    return {v.strip() for v in str(article["summary_data"].get(field) or "").split("|") if v.strip()}
+
+
+def python_counts(articles: list, field: str) -> list:
+    counts = Counter()
+    for article in articles:
+        counts.update(split_values(article, field))
+    return counts.most_common(20)
+
+
+def python_cooccurrence(articles: list, field: str, other: str) -> dict:
+    rows = [value for value, _ in python_counts(articles, field)[:10]]
+    columns = [value for value, _ in python_counts(articles, other)[:10]]
+    matrix = [[0] * len(columns) for _ in rows]
+    for article in articles:
+        values, other_values = split_values(article, field), split_values(article, other)
+        for i, row in enumerate(rows):
+            if row in values:
+                for j, column in enumerate(columns):
+                    if column in other_values:
+                        matrix[i][j] += 1
+    return matrix
+
+
+def python_weekly(articles: list, field: str, value: str) -> dict:
+    series = defaultdict(Counter)
+    for article in articles:
+        article_date = parse_date(article.get("date"))
+        if article_date and any(value in v.lower() for v in split_values(article, field)):
+            week = article_date - timedelta(days=article_date.weekday())
+            series[article["source"]][week] += 1
+    return series
+
+
+def timed(function, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=20, help="How many times to repeat the datasets")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    articles = load_datasets(args.copies)
+    print(f"{len(articles)} analysed articles")
+
+    start = time.perf_counter()
+    table = FacetTable(articles)
+    print(f"Facet table built once in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    # The answers must match before the timings mean anything
+    assert [c for _, c in table.counts("tags", top=20)] == [c for _, c in python_counts(articles, "tags")]
+
+    questions = [
+        ("Counts of tags", lambda: table.counts("tags", top=20), lambda: python_counts(articles, "tags")),
+        ("Tags x geography", lambda: table.cooccurrence("tags", "geography"),
+         lambda: python_cooccurrence(articles, "tags", "geography")),
+        ("Weekly 'openreach'", lambda: table.time_series("companies_mentioned", "openreach", by="source"),
+         lambda: python_weekly(articles, "companies_mentioned", "openreach")),
+    ]
+    print(f"{'Question':<20} {'NumPy':>10} {'Python':>10} {'Speed-up':>9}")
+    for label, vectorised, row_by_row in questions:
+        numpy_ms = timed(vectorised, args.repeats)
+        python_ms = timed(row_by_row, args.repeats)
+        print(f"{label:<20} {numpy_ms:8.2f}ms {python_ms:8.2f}ms {python_ms / numpy_ms:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark how much a failing site costs a scrape, with and without per-host health tracking.
+
+Four stub sites are scraped: a healthy one, one whose article pages hang for longer than the
+timeout, one that blocks article pages with 403, and one that answers its first article requests
+with 503 and a Retry-After. The scrape runs with the scraper's old behaviour (a fixed 10 second
+timeout, no retries and no circuit breaker) and with the default HostHealthTracker.
+
+A last check scrapes a site whose first article is answered with 429 on every attempt (the request
+and both retries): only the last attempt counts as a failure, so the site's circuit must not open.
+
+Run from the repository root:
+    python -m benchmarks.bench_host_health --articles 12 --workers 8
+"""
+
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+from contextlib import ExitStack
+
+from benchmarks.stub_server import StubSite
+from scripts.collect_data import WebScraper
+from scripts.host_health import DEFAULT_TIMEOUT, HostHealthTracker
+
+
+def old_behaviour() -> HostHealthTracker:
+    """A tracker that never adapts the timeout, retries or opens a circuit, like the scraper before it."""
+    return HostHealthTracker(min_timeout=DEFAULT_TIMEOUT, failure_threshold=10**9, error_rate_threshold=2.0,
+                             max_retries=0)
+
+
+def run(config_path: str, output_name: str, args, host_health: HostHealthTracker) -> dict:
+    scraper = WebScraper(config_path, max_workers=args.workers, per_host_limit=args.per_host, host_health=host_health)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        articles = scraper.scrape_all_sites(output_name) or []
+        elapsed = time.perf_counter() - start
+    by_source = {}
+    for article in articles:
+        by_source[article['source']] = by_source.get(article['source'], 0) + 1
+    return {"seconds": elapsed, "by_source": by_source, "fetches": scraper.stats['fetches'],
+            "retries": scraper.stats['retries'], "skipped": scraper.stats['circuit_skipped']}
+
+
+def check_rate_limited_article(args) -> bool:
+    """Scrape a site whose first article gets 429 on all its attempts, one request at a time. Returns True if it passed."""
+    host_health = HostHealthTracker()
+    attempts = host_health.max_retries + 1
+    with StubSite("Rate limited", args.articles, args.latency, article_status=429, retry_after="0",
+                  failing_requests=attempts) as site, tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "collect.ini")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write(site.config_section(args.articles))
+        scraper = WebScraper(config_path, max_workers=1, per_host_limit=1, host_health=host_health)
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            articles = scraper.scrape_all_sites(os.path.join(tmp, "articles")) or []
+    opened = bool(host_health.open_circuits())
+    passed = not opened and len(articles) == args.articles - 1
+    print(f"\nOne article answered 429 {attempts} times: circuit opened: {opened} | "
+          f"scraped {len(articles)} of {args.articles - 1} | {'OK' if passed else 'FAILED'}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=12, help="articles per site")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per healthy response")
+    parser.add_argument("--hang", type=float, default=DEFAULT_TIMEOUT + 2, help="seconds the hanging site's articles take")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{args.articles} articles per site, {args.workers} workers, {args.per_host} per host\n")
+    for label, host_health in (("Fixed timeout", old_behaviour()), ("Host health", HostHealthTracker())):
+        # New sites for each run, so the overloaded site fails its first requests again
+        sites = [
+            StubSite("Healthy", args.articles, args.latency),
+            StubSite("Hanging", args.articles, args.latency, article_hang=args.hang),
+            StubSite("Blocked", args.articles, args.latency, article_status=403),
+            StubSite("Overloaded", args.articles, args.latency, article_status=503, retry_after="1", failing_requests=2),
+        ]
+        with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+            for site in sites:
+                stack.enter_context(site)
+            config_path = os.path.join(tmp, "collect.ini")
+            with open(config_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(site.config_section(args.articles) for site in sites))
+            result = run(config_path, os.path.join(tmp, "articles"), args, host_health)
+        scraped = " | ".join(f"{site.name}: {result['by_source'].get(site.name, 0)}" for site in sites)
+        print(f"{label:<14} {result['seconds']:7.1f}s | {result['fetches']} fetches, {result['retries']} retries, "
+              f"{result['skipped']} skipped | scraped {scraped}")
+    check_rate_limited_article(args)
+
+
+if __name__ == "__main__":
+    main()
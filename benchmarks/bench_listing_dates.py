@@ -0,0 +1,63 @@
+"""
+Benchmark a today-only scrape with and without listing_date_selector against local stub sites
+whose listing pages show the date of each article, with only a few articles published today.
+
+Without listing dates every linked article (up to max_articles, over several listing pages) is
+downloaded before its date is checked; with them the old links are skipped and pagination stops
+at the first page that reaches older articles.
+
+Run from the repository root:
+    python -m benchmarks.bench_listing_dates --sources 3 --fresh 4 --articles 60 --per-page 10
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from contextlib import ExitStack
+
+from benchmarks.bench_concurrent_scrape import run_scraper
+from benchmarks.stub_server import StubSite
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", type=int, default=3, help="number of stub sites")
+    parser.add_argument("--articles", type=int, default=60, help="articles listed per site")
+    parser.add_argument("--fresh", type=int, default=4, help="articles per site published today")
+    parser.add_argument("--per-page", type=int, default=10, help="articles per listing page")
+    parser.add_argument("--max-articles", type=int, default=40, help="max_articles in the config")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds of latency added to every response")
+    parser.add_argument("--workers", type=int, default=8, help="scraper worker threads (1 = serial)")
+    args = parser.parse_args()
+
+    results = {}
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        sites = [
+            stack.enter_context(StubSite(f"Stub {i}", args.articles, args.latency, fresh_articles=args.fresh,
+                                         per_page=args.per_page))
+            for i in range(args.sources)
+        ]
+        for label, listing_dates in (("Article dates only", False), ("Listing dates", True)):
+            config_path = os.path.join(tmp, f"collect_{listing_dates}.ini")
+            with open(config_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(site.config_section(args.max_articles, listing_dates) for site in sites))
+            output_name = os.path.join(tmp, f"output_{listing_dates}")
+            requests_before = sum(site.requests_served for site in sites)
+            elapsed, articles, stats = run_scraper(config_path, output_name, args.workers, 4, today_flag=True)
+            with open(output_name + ".json", encoding="utf-8") as f:
+                output = json.load(f)
+            results[label] = (elapsed, stats, sum(site.requests_served for site in sites) - requests_before, output)
+
+    print(f"Sources: {args.sources} | {args.fresh} of {args.articles} articles per site published today "
+          f"| {args.per_page} per listing page | max_articles {args.max_articles} | {args.workers} workers")
+    for label, (elapsed, stats, served, output) in results.items():
+        print(f"{label:<20} {elapsed:6.2f}s  {served:4} requests served  {len(output)} articles saved  "
+              f"(links skipped by listing date: {stats['listing_date_skipped']})")
+    (_, _, before, before_output), (_, _, after, after_output) = results.values()
+    print(f"Fetches saved: {before - after} ({(before - after) / before:.0%})")
+    print(f"Identical output: {before_output == after_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Offline end-to-end benchmark of the pipeline: WebScraper.scrape_all_sites against a replayed
+recording of the news sites, then AnalyseData.run against the fake Bedrock client. It reports
+throughput, latency percentiles and peak memory, and fails (exit code 1) when a result is worse
+than the saved baseline by more than the tolerance.
+
+Record the configured sites once (the only step that uses the network):
+    python -m benchmarks.bench_replay record --max-articles 5
+Run the suite and save the results as the baseline, then compare later runs with it:
+    python -m benchmarks.bench_replay run --save-baseline
+    python -m benchmarks.bench_replay run --latency 0.05 --error-rate 0.05
+    python -m benchmarks.bench_replay run --stream   # summarise articles while they are scraped
+
+Without a recording, the stub sites of stub_server.py are replayed instead.
+"""
+
+import argparse
+import configparser
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_csv_export import peak_rss_kib
+from benchmarks.fake_bedrock import FakeBedrockClient
+from benchmarks.replay_server import ReplayArchive, ReplayServer, record, synthetic_archive
+from scripts.add_summaries import AnalyseData
+from scripts.collect_data import WebScraper
+from scripts.metrics import Metrics
+from scripts.streaming_pipeline import scrape_and_analyse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COLLECT_CONFIG_PATH = os.path.join(BASE_DIR, "examples", "collect_example.ini")
+ANALYSE_CONFIG_PATH = os.path.join(BASE_DIR, "examples", "summary_example.ini")
+DEFAULT_ARCHIVE = os.path.join(BASE_DIR, "benchmarks", "fixtures", "replay_archive.json.gz")
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmarks", "fixtures", "replay_baseline.json")
+
+# Results compared with the baseline, and whether a higher value is better
+CHECKED_RESULTS = {
+    "scrape_articles_per_second": True,
+    "analyse_articles_per_second": True,
+    "pipeline_seconds": False,
+    "http_p95_ms": False,
+    "bedrock_p95_ms": False,
+    "peak_rss_mib": False,
+}
+# Results that must match the baseline exactly - a change means the output changed
+EXACT_RESULTS = ("scrape_failed", "scraped_articles", "analysed_articles")
+
+
+class ReplayAnalyseData(AnalyseData):
+    """AnalyseData that sends every call to a FakeBedrockClient."""
+
+    def __init__(self, input_json: str, config_path: str, client: FakeBedrockClient, metrics: Metrics):
+        super().__init__(input_json=input_json, config_path=config_path, metrics=metrics)
+        self.fake_client = client
+
+    def _bedrock_client(self):
+        return self.fake_client
+
+
+def analyse_config(path: str):
+    """Write the example analyse config without the summary cache, so every article reaches the fake client."""
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(ANALYSE_CONFIG_PATH)
+    config.remove_section("cache")
+    with open(path, "w", encoding="utf-8") as f:
+        config.write(f)
+
+
+def run_pipeline(settings: dict, collect_config: str, tmp: str) -> dict:
+    """Scrape and analyse once in this process, returning the results."""
+    metrics = Metrics()
+    output_name = os.path.join(tmp, "replay_articles")
+    analyse_config_path = os.path.join(tmp, "summary.ini")
+    analyse_config(analyse_config_path)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        scraper = WebScraper(collect_config, max_workers=settings['workers'], per_host_limit=settings['per_host'],
+                             metrics=metrics)
+        client = FakeBedrockClient(settings['bedrock_latency'], settings['throttle_rate'])
+        analyser = ReplayAnalyseData(output_name, analyse_config_path, client, metrics)
+        start = time.perf_counter()
+        if settings['stream']:
+            # Both stages run at once, so each one's time is its own share of the run
+            articles, _ = scrape_and_analyse(scraper, analyser, output_name)
+            scrape_seconds = metrics.histogram("pipeline_stage_seconds", stage="collect").sum
+            analyse_seconds = metrics.histogram("pipeline_stage_seconds", stage="analyse").sum if articles else 0.0
+        else:
+            articles = scraper.scrape_all_sites(output_name)
+            scrape_seconds = time.perf_counter() - start
+            # A failed scrape (e.g. a homepage answered with an error) writes no output to analyse
+            analyse_seconds = 0.0
+            if articles is not False:
+                analyse_start = time.perf_counter()
+                analyser.run()
+                analyse_seconds = time.perf_counter() - analyse_start
+        pipeline_seconds = time.perf_counter() - start
+
+    analysed = metrics.counter_value("articles_analysed")
+    http = metrics.histogram("http_request_seconds")
+    bedrock = metrics.histogram("bedrock_call_seconds", stage="network")
+    return {
+        "scrape_failed": int(articles is False),
+        "scraped_articles": len(articles or []),
+        "analysed_articles": analysed,
+        "scrape_seconds": scrape_seconds,
+        "scrape_articles_per_second": len(articles or []) / scrape_seconds,
+        "analyse_seconds": analyse_seconds,
+        "analyse_articles_per_second": analysed / analyse_seconds if analyse_seconds else 0.0,
+        "pipeline_seconds": pipeline_seconds,
+        "http_requests": http.count,
+        "http_errors": metrics.counter_value("http_errors"),
+        "http_p50_ms": (http.quantile(0.5) or 0) * 1000,
+        "http_p95_ms": (http.quantile(0.95) or 0) * 1000,
+        "bedrock_calls": bedrock.count,
+        "bedrock_p50_ms": (bedrock.quantile(0.5) or 0) * 1000,
+        "bedrock_p95_ms": (bedrock.quantile(0.95) or 0) * 1000,
+        "peak_rss_mib": peak_rss_kib() / 1024,
+    }
+
+
+def run_suite(args) -> dict:
+    """Replay the archive and run the pipeline args.repeats times, each in its own process. Returns the median results."""
+    if os.path.exists(args.archive):
+        archive = ReplayArchive.load(args.archive)
+        print(f"Replaying {len(archive.responses)} responses recorded {archive.recorded} ({args.archive})")
+    else:
+        archive = synthetic_archive()
+        print(f"No recording at {args.archive} - replaying {len(archive.responses)} synthetic pages instead")
+
+    settings = {"archive": archive.recorded if os.path.exists(args.archive) else "synthetic",
+                "latency": args.latency, "error_rate": args.error_rate, "workers": args.workers,
+                "per_host": args.per_host, "bedrock_latency": args.bedrock_latency,
+                "throttle_rate": args.throttle_rate, "stream": args.stream}
+    runs = []
+    with ReplayServer(archive, args.latency, args.error_rate) as server, tempfile.TemporaryDirectory() as tmp:
+        collect_config = os.path.join(tmp, "collect.ini")
+        with open(collect_config, "w", encoding="utf-8") as f:
+            f.write(server.config_text())
+        for repeat in range(args.repeats):
+            run_dir = os.path.join(tmp, f"run_{repeat}")
+            os.makedirs(run_dir)
+            # A separate process per run, so the peak memory is only this run's
+            result = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_replay", "child", json.dumps(settings), collect_config, run_dir],
+                capture_output=True, text=True, cwd=BASE_DIR,
+            )
+            if result.returncode != 0:
+                print(result.stdout[-2000:], result.stderr[-2000:])
+                raise SystemExit(f"Pipeline run {repeat + 1} failed")
+            runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+        print(f"Replay server: {server.requests_served} requests served, {server.errors_served} errors injected\n")
+
+    results = {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+    return {"settings": settings, "repeats": args.repeats, "results": results}
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    """Print each checked result next to the baseline. Returns False if any result regressed."""
+    if current["settings"] != baseline["settings"]:
+        print(f"The baseline was run with different settings, not comparing:\n  baseline: {baseline['settings']}\n"
+              f"  current:  {current['settings']}")
+        return True
+
+    passed = True
+    print(f"{'Result':<28} {'Baseline':>10} {'Current':>10} {'Change':>8}  Status")
+    for name, higher_is_better in CHECKED_RESULTS.items():
+        before, after = baseline["results"][name], current["results"][name]
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        ok = worse <= tolerance
+        passed &= ok
+        print(f"{name:<28} {before:10.2f} {after:10.2f} {change:+7.0%}  {'ok' if ok else 'REGRESSED'}")
+    for name in EXACT_RESULTS:
+        before, after = baseline["results"][name], current["results"][name]
+        ok = before == after
+        passed &= ok
+        print(f"{name:<28} {before:10g} {after:10g} {'':>8}  {'ok' if ok else 'CHANGED'}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Record a real scrape of the configured sites")
+    record_parser.add_argument("--config", default=COLLECT_CONFIG_PATH)
+    record_parser.add_argument("--archive", default=DEFAULT_ARCHIVE)
+    record_parser.add_argument("--max-articles", type=int, default=5, help="Articles recorded per site")
+
+    run_parser = commands.add_parser("run", help="Run the pipeline against the recording")
+    run_parser.add_argument("--archive", default=DEFAULT_ARCHIVE)
+    run_parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every replayed response")
+    run_parser.add_argument("--error-rate", type=float, default=0.0, help="Share of pages answered with 503")
+    run_parser.add_argument("--workers", type=int, default=8, help="Scraper worker threads")
+    run_parser.add_argument("--per-host", type=int, default=4, help="Concurrent requests per site")
+    run_parser.add_argument("--bedrock-latency", type=float, default=0.2, help="Seconds each fake Bedrock call takes")
+    run_parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of Bedrock calls throttled")
+    run_parser.add_argument("--stream", action="store_true", help="Summarise articles while they are scraped")
+    run_parser.add_argument("--repeats", type=int, default=3, help="Runs to take the median of")
+    run_parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    run_parser.add_argument("--save-baseline", action="store_true", help="Save this run as the baseline")
+    run_parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed regression (0.25 = 25%%)")
+
+    child_parser = commands.add_parser("child") # One pipeline run, started by "run"
+    child_parser.add_argument("settings")
+    child_parser.add_argument("collect_config")
+    child_parser.add_argument("tmp")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        archive = record(args.config, args.archive, args.max_articles)
+        print(f"Recorded {len(archive.responses)} responses from {len(archive.origins)} hosts to {args.archive}")
+        return
+    if args.command == "child":
+        print(json.dumps(run_pipeline(json.loads(args.settings), args.collect_config, args.tmp)))
+        return
+
+    current = run_suite(args)
+    for name, value in current["results"].items():
+        print(f"{name:<28} {value:10.2f}")
+    print()
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4)
+        print(f"Saved as the baseline: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if not compare(current, baseline, args.tolerance):
+            print(f"\nRegressed by more than {args.tolerance:.0%} compared with {args.baseline}")
+            sys.exit(1)
+    else:
+        print(f"No baseline at {args.baseline} - run with --save-baseline to compare later runs with this one.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Measure the full-text search index on the archived datasets: build time, memory and query latency,
+compared with a linear scan over the same articles (what a lookup costs without the index).
+
+The datasets can be repeated (with changed URLs) to see how both approaches grow with the archive.
+
+Run from the repository root:
+    python -m benchmarks.bench_search --copies 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from scripts.search_index import SearchIndex, tokenise
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASETS = [
+    os.path.join(BASE_DIR, "archive-scrapped-articles", "UC Today and Comms Dealer.json"),
+    os.path.join(BASE_DIR, "sample_output", "batch_articles_AI.json"),
+    os.path.join(BASE_DIR, "data", "all_articles_output.json"),
+]
+QUERIES = [
+    "openreach fibre broadband",
+    "microsoft teams",
+    "contact centre ai",
+    "acquisition",
+    "channel partner programme",
+    "5g network",
+    "cyber security",
+    "vodafone",
+]
+
+
+def load_datasets(copies: int) -> list:
+    articles = []
+    for path in DATASETS:
+        if not os.path.exists(path):
+            print(f"Skipping missing dataset {path}")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            articles.extend(a for a in json.load(f) if isinstance(a, dict) and a.get("url"))
+    repeated = []
+    for copy in range(copies):
+        for article in articles:
+            article = dict(article)
+            article["url"] = f"{article['url']}#copy{copy}"
+            repeated.append(article)
+    return repeated
+
+
+def linear_search(articles: list, query: str, limit: int = 10) -> list:
+    """Count the query words in every article - the cost of searching the JSON files directly."""
+    terms = set(tokenise(query))
+    scores = []
+    for article in articles:
+        text = " ".join([article.get("title") or "", article.get("cleaned_text") or "",
+                         json.dumps(article.get("summary_data") or {})])
+        words = tokenise(text)
+        score = sum(1 for word in words if word in terms)
+        if score:
+            scores.append((score, article["url"]))
+    return sorted(scores, reverse=True)[:limit]
+
+
+def time_queries(search, repeats: int) -> list:
+    timings = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            start = time.perf_counter()
+            search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<14} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=1, help="How many times to repeat the datasets")
+    parser.add_argument("--repeats", type=int, default=5, help="How many times to run each query")
+    parser.add_argument("--batch", type=int, default=50, help="Articles added per update, as in a pipeline run")
+    args = parser.parse_args()
+
+    articles = load_datasets(args.copies)
+    print(f"{len(articles)} articles, {len(QUERIES)} queries x {args.repeats}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = os.path.join(temp_dir, "search_index.sqlite")
+        index = SearchIndex(index_path)
+
+        start = time.perf_counter()
+        for i in range(0, len(articles), args.batch):
+            index.add_articles(articles[i:i + args.batch])
+        build_seconds = time.perf_counter() - start
+
+        # Memory is measured on a second build, as tracing slows the build down
+        tracemalloc.start()
+        traced = SearchIndex(os.path.join(temp_dir, "traced.sqlite"))
+        for i in range(0, len(articles), args.batch):
+            traced.add_articles(articles[i:i + args.batch])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        traced.close()
+
+        stats = index.stats()
+        print(f"\nBuild (in batches of {args.batch}): {build_seconds:.2f} s, "
+              f"{len(articles) / build_seconds:.0f} articles/s, peak Python memory {peak / 2**20:.1f} MiB")
+        print(f"Index: {stats['terms']} terms, postings {stats['postings_bytes'] / 2**10:.0f} KiB, "
+              f"file {os.path.getsize(index_path) / 2**20:.1f} MiB")
+        json_bytes = sum(len(json.dumps(a)) for a in articles)
+        print(f"Articles as JSON: {json_bytes / 2**20:.1f} MiB\n")
+
+        report("BM25 index", time_queries(index.search, args.repeats))
+        report("Linear scan", time_queries(lambda q: linear_search(articles, q), max(1, args.repeats // 5)))
+
+        # Re-opening the index only loads the article lengths, not the postings
+        index.close()
+        start = time.perf_counter()
+        reopened = SearchIndex(index_path)
+        print(f"\nRe-open index: {(time.perf_counter() - start) * 1000:.1f} ms")
+        reopened.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark AnalyseData summarisation against a fake Bedrock client: serially, concurrently,
+concurrently with several articles batched into each request, and with streamed responses
+(read until their JSON is complete, with some streams cut off and retried). Also checks that
+summaries cached by a batched run are only reused by batched runs, and that the legacy JSON
+outputs keep the newest articles first.
+
+Run from the repository root:
+    python -m benchmarks.bench_summarise --articles 40 --latency 0.5 --concurrency 8 --throttle-rate 0.1
+    python -m benchmarks.bench_summarise --trailing-chars 800 --malformed-rate 0.1
+"""
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.fake_bedrock import FakeBedrockClient
+from scripts.add_summaries import AnalyseData
+from scripts.summary_cache import SummaryCache
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(BASE_DIR, "examples", "summary_example.ini")
+ARTICLES_PATH = os.path.join(BASE_DIR, "archive-scrapped-articles", "UC Today and Comms Dealer.json")
+
+
+class FakeAnalyseData(AnalyseData):
+    """AnalyseData that sends every call to a FakeBedrockClient."""
+
+    def __init__(self, client: FakeBedrockClient, concurrency: int, requests_per_minute: float, max_retries: int,
+                 batch: bool = False, streaming: bool = False):
+        super().__init__(input_json="benchmark", config_path=CONFIG_PATH)
+        self.fake_client = client
+        self.summary_cache = None # Every call should reach the fake client
+        self.batch_enabled = batch
+        self.streaming = streaming
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.rate_limiter.requests = type(self.rate_limiter.requests)(requests_per_minute)
+
+    def _bedrock_client(self):
+        return self.fake_client
+
+
+def run(articles: list, args, concurrency: int, batch: bool, streaming: bool) -> dict:
+    """Summarise a copy of articles and return the timings and call counts."""
+    # The model writes a short note after its JSON, which a streamed call does not wait for
+    trailing_text = ("\n\nThis summary is based only on the article text provided. " * 50)[:args.trailing_chars]
+    client = FakeBedrockClient(args.latency, args.throttle_rate, args.max_concurrent, drop_rate=args.drop_rate,
+                               trailing_text=trailing_text, malformed_rate=args.malformed_rate)
+    analyser = FakeAnalyseData(client, concurrency, args.rpm, args.max_retries, batch, streaming)
+    data = copy.deepcopy(articles)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        analyser.summarise_articles(data)
+        elapsed = time.perf_counter() - start
+
+    in_order = all(a["url"] == b["url"] for a, b in zip(articles, data))
+    return {
+        "seconds": elapsed,
+        "articles_per_second": len(data) / elapsed,
+        "calls": client.calls,
+        "throttled": client.throttled,
+        "input_tokens": client.input_tokens,
+        "output_tokens": client.output_tokens,
+        "malformed": client.malformed,
+        "all_summarised": all("summary_data" in obj for obj in data),
+        "order_kept": in_order,
+    }
+
+
+def check_cache_namespaces(articles: list, concurrency: int):
+    """A batched run caches its summaries apart from single-article prompts, so only batched runs reuse them."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = SummaryCache(os.path.join(tmp, "summaries.sqlite"))
+        calls = {}
+        for label, batch in (("batched", True), ("single", False), ("batched again", True)):
+            client = FakeBedrockClient(0.01, 0, None, drop_rate=0)
+            analyser = FakeAnalyseData(client, concurrency, 6000, 8, batch)
+            analyser.summary_cache = cache
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                analyser.summarise_articles(copy.deepcopy(articles))
+            calls[label] = client.calls
+        cache.close()
+    ok = calls["single"] == len(articles) and calls["batched again"] == 0
+    print(f"Summary cache namespaces: Bedrock calls {calls} - {'OK' if ok else 'FAILED'}")
+
+
+def check_output_order(articles: list):
+    """Each run's articles go before the earlier ones in the legacy JSON, as they did before the JSONL store."""
+    first, second, third = articles[:3], articles[3:6], articles[6:9]
+    with tempfile.TemporaryDirectory() as tmp:
+        analyser = FakeAnalyseData(FakeBedrockClient(0), 1, 6000, 8)
+        analyser.input_json = os.path.join(tmp, "articles")
+        legacy_json = analyser.input_json + "_output.json"
+        with open(legacy_json, "w", encoding="utf-8") as f:
+            json.dump(first, f, indent=9) # Written by a run from before the store
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            analyser._append_output("_output", second)
+            analyser._append_output("_output", third)
+            with open(legacy_json, "r", encoding="utf-8") as f:
+                prepended = json.load(f)
+            # A legacy file that cannot be read is exported from the store instead
+            with open(legacy_json, "w", encoding="utf-8") as f:
+                f.write("[{")
+            analyser._append_output("_output", articles[9:10])
+            with open(legacy_json, "r", encoding="utf-8") as f:
+                exported = json.load(f)
+    urls = lambda items: [article["url"] for article in items]
+    ok = urls(prepended) == urls(third + second + first) and urls(exported)[:1] == urls(articles[9:10]) \
+        and sorted(urls(exported)) == sorted(urls(articles[:10]))
+    print(f"Legacy JSON newest first: {'OK' if ok else 'FAILED'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=40, help="number of archived articles to summarise")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake Bedrock call")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent calls for the parallel run")
+    parser.add_argument("--throttle-rate", type=float, default=0.1, help="share of calls throttled at random")
+    parser.add_argument("--max-concurrent", type=int, default=None, help="throttle calls above this many in flight")
+    parser.add_argument("--rpm", type=float, default=600, help="requests per minute allowed by the rate limiter")
+    parser.add_argument("--max-retries", type=int, default=8, help="retries per throttled call")
+    parser.add_argument("--drop-rate", type=float, default=0.05, help="share of batched results the fake leaves out")
+    parser.add_argument("--trailing-chars", type=int, default=400, help="characters the fake writes after its JSON")
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="share of streamed responses cut off")
+    args = parser.parse_args()
+
+    with open(ARTICLES_PATH, "r", encoding="utf-8") as f:
+        articles = json.load(f)[:args.articles]
+
+    runs = (("Serial", 1, False, False), ("Concurrent", args.concurrency, False, False),
+            ("Batched", args.concurrency, True, False), ("Streamed", args.concurrency, False, True),
+            ("Streamed + batched", args.concurrency, True, True))
+    for label, concurrency, batch, streaming in runs:
+        result = run(articles, args, concurrency, batch, streaming)
+        print(f"{label:<18} (concurrency {concurrency:>2}): {result['seconds']:7.2f}s | "
+              f"{result['articles_per_second']:6.2f} articles/s | {result['calls']} calls, "
+              f"{result['throttled']} throttled, {result['malformed']} malformed | "
+              f"~{result['input_tokens']} input / {result['output_tokens']} output tokens | "
+              f"all summarised: {result['all_summarised']} | order kept: {result['order_kept']}")
+    check_cache_namespaces(articles, args.concurrency)
+    check_output_order(articles)
+
+
+if __name__ == "__main__":
+    main()
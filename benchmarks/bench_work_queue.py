@@ -0,0 +1,90 @@
+"""
+Benchmark a distributed scrape: WebScraper.scrape_all_sites with a work queue, plus 0 to N worker
+processes (scripts/queue_worker.py) sharing it. Each process, the run included, downloads --threads
+pages at once, with --per-host requests to a site at once. The per-host limit applies to each process
+on its own, so every worker also adds --per-host to the requests each stub site receives at once:
+the speed-up shown comes from loading the sites harder, and is not there when the sites' limit has to
+be kept across the processes (e.g. --per-host 1 with a few sources). The output of every run is checked
+against a scrape without the queue.
+
+Run from the repository root:
+    python -m benchmarks.bench_work_queue --sources 6 --articles 20 --latency 0.2 --max-workers 3
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+
+from benchmarks.stub_server import StubSite
+from scripts.collect_data import WebScraper
+from scripts.work_queue import WorkQueue
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def scrape(config_path: str, output_name: str, args, work_queue: WorkQueue = None) -> tuple:
+    """Run one scrape with its output silenced, returning (seconds, the saved JSON)."""
+    scraper = WebScraper(config_path, max_workers=args.threads, per_host_limit=args.per_host, work_queue=work_queue)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        scraper.scrape_all_sites(output_name)
+        elapsed = time.perf_counter() - start
+    with open(output_name + ".json", encoding="utf-8") as f:
+        return elapsed, json.load(f)
+
+
+def start_workers(count: int, queue_path: str, config_path: str, args) -> list:
+    """Start worker processes on the queue, which stop once it has been idle for a few seconds."""
+    command = [sys.executable, "-m", "scripts.queue_worker", "--queue", queue_path, "--config", config_path,
+               "--threads", str(args.threads), "--per-host", str(args.per_host), "--idle-exit", "3"]
+    return [subprocess.Popen(command, cwd=BASE_DIR, stdout=subprocess.DEVNULL) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sources", type=int, default=6, help="number of stub sites")
+    parser.add_argument("--articles", type=int, default=20, help="max_articles per site")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds of latency added to every response")
+    parser.add_argument("--threads", type=int, default=4, help="pages downloaded at once by each process")
+    parser.add_argument("--per-host", type=int, default=2, help="requests sent to one site at once by each process")
+    parser.add_argument("--max-workers", type=int, default=3, help="most worker processes added to the run")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds the workers are given to start")
+    args = parser.parse_args()
+
+    with ExitStack() as stack, tempfile.TemporaryDirectory() as tmp:
+        sites = [stack.enter_context(StubSite(f"Stub {i}", args.articles, args.latency)) for i in range(args.sources)]
+        config_path = os.path.join(tmp, "collect_bench.ini")
+        with open(config_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(site.config_section(args.articles) for site in sites))
+
+        print(f"Sources: {args.sources} | Articles per source: {args.articles} | Latency: {args.latency}s | "
+              f"{args.threads} threads and {args.per_host} per host in each process")
+        expected_time, expected = scrape(config_path, os.path.join(tmp, "no_queue"), args)
+        print(f"No queue:   {expected_time:7.2f}s ({len(expected)} articles)")
+
+        first_time = None
+        for workers in range(args.max_workers + 1):
+            queue_path = os.path.join(tmp, f"queue_{workers}.sqlite")
+            work_queue = WorkQueue(queue_path)
+            processes = start_workers(workers, queue_path, config_path, args)
+            time.sleep(args.warmup if workers else 0)
+            try:
+                elapsed, output = scrape(config_path, os.path.join(tmp, f"queue_{workers}"), args, work_queue)
+            finally:
+                for process in processes:
+                    process.wait()
+            work_queue.close()
+            first_time = first_time or elapsed
+            print(f"{workers} workers: {elapsed:7.2f}s | {first_time / elapsed:4.2f}x the run alone "
+                  f"| up to {args.per_host * (workers + 1)} requests to a site at once "
+                  f"| identical output: {output == expected}")
+
+
+if __name__ == "__main__":
+    main()
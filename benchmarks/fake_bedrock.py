@@ -0,0 +1,155 @@
+"""
+A local stand-in for the boto3 "bedrock-runtime" client, for benchmarking AnalyseData offline.
+
+The fake client sleeps for a configurable latency on every call, can reject a share of calls
+with a ThrottlingException (shaped like a botocore ClientError), and answers with a canned
+summary_data JSON object in the same response format as Claude on Bedrock. Batched prompts
+(with numbered "Article N:" sections) are answered with a JSON array, optionally dropping
+some of the results.
+
+invoke_model_with_response_stream sends the same answer as Claude's streaming events, spread
+over the latency, and stops generating when the reader closes the stream. A share of streams
+can be cut off half way, as a malformed response.
+"""
+
+import io
+import json
+import random
+import re
+import threading
+import time
+
+CANNED_SUMMARY = {
+    "summary": "A UK operator announced an upgrade to its full fibre and 5G networks.",
+    "category": "Fixed Connectivity | Mobile Services",
+    "product": "Broadband | Mobile Voice & Data",
+    "technology": "FTTP (GPON/XGS-PON) | 5G (NSA/SA)",
+    "tags": "Network Investment | Launch / Go-to-Market",
+    "geography": "UK",
+    "companies_mentioned": "Openreach | EE",
+    "parent_companies_mentioned": "BT Group",
+}
+
+class FakeThrottlingError(Exception):
+    """Raised like botocore's ClientError when the fake client throttles a call."""
+
+    def __init__(self):
+        super().__init__("An error occurred (ThrottlingException) when calling the InvokeModel operation: Too many requests")
+        self.response = {"Error": {"Code": "ThrottlingException", "Message": "Too many requests"}}
+
+class FakeEventStream:
+    """The body of a streamed response: an iterable of {'chunk': {'bytes': ...}} events that can be closed early."""
+
+    def __init__(self, events):
+        self._events = events
+
+    def __iter__(self):
+        return self._events
+
+    def close(self):
+        self._events.close()
+
+class FakeBedrockClient:
+    """A thread-safe fake of the Bedrock runtime client."""
+
+    def __init__(self, latency: float = 1.0, throttle_rate: float = 0.0, max_concurrent: int = None, seed: int = 0,
+                 drop_rate: float = 0.0, trailing_text: str = "", malformed_rate: float = 0.0,
+                 chunk_chars: int = 40):
+        """
+        latency - seconds each successful call takes.
+        throttle_rate - share of calls (0-1) that are rejected with a ThrottlingException.
+        max_concurrent - calls above this many in flight are throttled, like a real quota.
+        drop_rate - share of the articles in a batched prompt left out of the answer.
+        trailing_text - text the model writes after the JSON of a summary (which takes time to generate too).
+        malformed_rate - share of streamed responses cut off half way through.
+        chunk_chars - characters of text in each streamed event.
+        """
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.max_concurrent = max_concurrent
+        self.drop_rate = drop_rate
+        self.trailing_text = trailing_text
+        self.malformed_rate = malformed_rate
+        self.chunk_chars = max(1, chunk_chars)
+        self.calls = 0
+        self.throttled = 0
+        self.malformed = 0
+        self.closed_early = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _response_text(self, prompt: str) -> str:
+        if "removing duplicate articles" in prompt:
+            return "[]"
+        batch_positions = re.findall(r"^Article (\d+):$", prompt, re.MULTILINE)
+        if batch_positions:
+            with self._lock:
+                kept = [int(n) for n in batch_positions if self._random.random() >= self.drop_rate]
+            return json.dumps([dict(CANNED_SUMMARY, index=n) for n in kept]) + self.trailing_text
+        return json.dumps(CANNED_SUMMARY) + self.trailing_text
+
+    def _start_call(self):
+        """Count a call, and throttle it if over the quota or picked by throttle_rate."""
+        with self._lock:
+            self.calls += 1
+            too_busy = self.max_concurrent is not None and self._in_flight >= self.max_concurrent
+            if too_busy or self._random.random() < self.throttle_rate:
+                self.throttled += 1
+                raise FakeThrottlingError()
+            self._in_flight += 1
+
+    def invoke_model(self, modelId: str, body: str, accept: str = None, contentType: str = None) -> dict:
+        self._start_call()
+        try:
+            time.sleep(self.latency)
+            prompt = json.loads(body)["messages"][0]["content"]
+            text = self._response_text(prompt)
+            usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}
+            with self._lock:
+                self.input_tokens += usage["input_tokens"]
+                self.output_tokens += usage["output_tokens"]
+            result = {"content": [{"type": "text", "text": text}], "usage": usage}
+            return {"body": io.BytesIO(json.dumps(result).encode("utf-8"))}
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, accept: str = None,
+                                          contentType: str = None) -> dict:
+        self._start_call()
+        prompt = json.loads(body)["messages"][0]["content"]
+        text = self._response_text(prompt)
+        with self._lock:
+            malformed = self._random.random() < self.malformed_rate
+            self.malformed += malformed
+        return {"body": FakeEventStream(self._stream_events(prompt, text, malformed))}
+
+    def _stream_events(self, prompt: str, text: str, malformed: bool):
+        """Generate the streaming events of a response, taking latency in total if read to the end."""
+        def event(message: dict) -> dict:
+            return {"chunk": {"bytes": json.dumps(message).encode("utf-8")}}
+
+        chunks = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        sent = 0
+        finished = False
+        try:
+            input_tokens = len(prompt) // 4
+            yield event({"type": "message_start", "message": {"usage": {"input_tokens": input_tokens, "output_tokens": 1}}})
+            yield event({"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+            for chunk in chunks[:len(chunks) // 2] if malformed else chunks:
+                time.sleep(self.latency / len(chunks))
+                sent += len(chunk)
+                yield event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}})
+            yield event({"type": "content_block_stop", "index": 0})
+            yield event({"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": sent // 4}})
+            yield event({"type": "message_stop"})
+            finished = True
+        finally:
+            with self._lock:
+                self.input_tokens += len(prompt) // 4
+                self.output_tokens += sent // 4 # Only the text generated before the stream was closed
+                self.closed_early += not finished
+                self._in_flight -= 1
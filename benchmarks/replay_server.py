@@ -0,0 +1,198 @@
+"""
+Record the HTTP responses of a real scrape and replay them from local servers.
+
+A recording is a gzipped JSON archive of every response the scraper received (status, content
+type, redirect location and body), keyed by URL, together with the collect config it was
+recorded with. ReplayServer serves it back with one local server per recorded host (so each
+site still counts as its own host), rewriting the links in the pages and the homepages in
+the config to the local servers. Latency and an error rate can be added to every response.
+
+Without a recording, synthetic_archive() builds one from the stub sites in stub_server.py.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.stub_server import StubSite
+from scripts.collect_data import WebScraper
+
+
+def response_key(url: str) -> str:
+    """The archive key of a URL: its host and path, so http and https share a response."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    return parts.netloc + path + (f"?{parts.query}" if parts.query else "")
+
+
+class ReplayArchive:
+    """The recorded responses of a scrape and the collect config it used."""
+
+    def __init__(self, config_text: str, responses: dict = None, origins: dict = None, recorded: str = None):
+        self.config_text = config_text
+        self.responses = responses or {} # key -> {'status', 'content_type', 'location', 'body'}
+        self.origins = origins or {} # host -> origin (scheme://host) it was recorded from
+        self.recorded = recorded or datetime.now().isoformat(timespec="seconds")
+
+    def add(self, url: str, status: int, content_type: str, body: str, location: str = None):
+        parts = urlsplit(url)
+        self.origins.setdefault(parts.netloc, f"{parts.scheme}://{parts.netloc}")
+        self.responses[response_key(url)] = {'status': status, 'content_type': content_type,
+                                             'location': location, 'body': body}
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({'recorded': self.recorded, 'config': self.config_text, 'origins': self.origins,
+                       'responses': self.responses}, f)
+
+    @classmethod
+    def load(cls, path: str):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data['config'], data['responses'], data['origins'], data['recorded'])
+
+
+def record(config_path: str, archive_path: str, max_articles: int = None, max_workers: int = 4) -> ReplayArchive:
+    """
+    Run a real scrape of every site in config_path and save every response it receives to archive_path.
+    max_articles overrides the max_articles of every site, to keep the recording small.
+    """
+    scraper = WebScraper(config_path, max_workers=max_workers) # No HTTP cache or seen index, so every page is fetched
+    if max_articles is not None:
+        for section in scraper.config.sections():
+            scraper.config.set(section, 'max_articles', str(max_articles))
+
+    config_lines = []
+    for section in scraper.config.sections():
+        config_lines.append(f"[{section}]")
+        config_lines += [f"{key} = {value}" for key, value in scraper.config.items(section, raw=True)]
+        config_lines.append("")
+    archive = ReplayArchive("\n".join(config_lines))
+    lock = threading.Lock()
+
+    def save_response(response, *args, **kwargs):
+        # Called for every response, including each redirect on the way to a page
+        with lock:
+            archive.add(response.url, response.status_code, response.headers.get("Content-Type"),
+                        response.text, response.headers.get("Location"))
+
+    scraper.session.hooks['response'].append(save_response)
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper.scrape_all_sites(os.path.join(tmp, "recording")) # Only the responses are kept
+    archive.save(archive_path)
+    return archive
+
+
+def synthetic_archive(sites: int = 5, articles: int = 20, paragraphs: int = 20) -> ReplayArchive:
+    """An archive of the stub sites' pages, for when no real scrape has been recorded."""
+    config_sections = []
+    archive = ReplayArchive("")
+    for i in range(sites):
+        site = StubSite(f"Replay {i}", num_articles=articles, paragraphs=paragraphs, per_page=10)
+        origin = f"https://replay-{i}.example"
+        config_sections.append(site.config_section(articles).replace(site.homepage, origin + "/"))
+        paths = ["/"] + [f"/page/{page}" for page in range(2, (articles + 9) // 10 + 1)]
+        paths += [f"/article/{n}" for n in range(articles)]
+        for path in paths:
+            archive.add(origin + path, 200, "text/html; charset=utf-8", site.render(path))
+        site._server.server_close()
+    archive.config_text = "\n".join(config_sections)
+    return archive
+
+
+class ReplayServer:
+    """Serves a ReplayArchive from one local HTTP server per recorded host."""
+
+    def __init__(self, archive: ReplayArchive, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        """
+        latency - seconds added before every response.
+        error_rate - share of URLs (0-1) answered with 503 Service Unavailable. The URLs that fail are
+        picked from a hash of the URL and seed, so every run fails on the same pages.
+        """
+        self.archive = archive
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.requests_served = 0
+        self.errors_served = 0
+        self._lock = threading.Lock()
+        self._servers = {}
+        for host in archive.origins:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler(host))
+            server.daemon_threads = True
+            self._servers[host] = server
+        self._threads = [threading.Thread(target=server.serve_forever, daemon=True) for server in self._servers.values()]
+
+    def local_origin(self, host: str) -> str:
+        return f"http://127.0.0.1:{self._servers[host].server_address[1]}"
+
+    def rewrite(self, text: str) -> str:
+        """Point the recorded hosts in text (links, redirects, config homepages) at the local servers."""
+        if not text:
+            return text
+        for host in sorted(self.archive.origins, key=len, reverse=True): # "example.com.au" before "example.com"
+            local = self.local_origin(host)
+            text = text.replace(f"https://{host}", local).replace(f"http://{host}", local)
+            text = text.replace(f"//{host}", "//" + local.split("//", 1)[1])
+        return text
+
+    def config_text(self) -> str:
+        """The recorded collect config, scraping the local servers."""
+        return self.rewrite(self.archive.config_text)
+
+    def _fails(self, key: str) -> bool:
+        digest = hashlib.sha1(f"{self.seed}:{key}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:4], "big") / 2**32 < self.error_rate
+
+    def _make_handler(self, host: str):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(replay.latency)
+                key = host + self.path
+                recorded = replay.archive.responses.get(key)
+                with replay._lock:
+                    replay.requests_served += 1
+                    failing = recorded is not None and replay._fails(key)
+                    replay.errors_served += failing
+                if recorded is None:
+                    self.send_error(404)
+                    return
+                if failing:
+                    self.send_error(503)
+                    return
+                body = replay.rewrite(recorded['body'] or "").encode("utf-8")
+                self.send_response(recorded['status'])
+                if recorded['location']:
+                    self.send_header("Location", replay.rewrite(recorded['location']))
+                # The body was recorded as text and is sent as UTF-8, whatever charset the site used
+                content_type = re.sub(r";\s*charset=[^;]*", "", recorded['content_type'] or "text/html")
+                self.send_header("Content-Type", content_type + "; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        return Handler
+
+    def __enter__(self):
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        for server in self._servers.values():
+            server.shutdown()
+            server.server_close()
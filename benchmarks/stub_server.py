@@ -0,0 +1,164 @@
+"""
+Local stub news sites for benchmarking the web scraper without hitting the real websites.
+
+Each stub site runs on its own port (so it counts as its own host) and serves
+listing pages of article links (newest first, with their dates) plus the article
+pages, sleeping for a fixed latency before every response. Pages carry an ETag, so conditional requests are
+answered with 304 Not Modified. A site can also be made to fail its article pages: hang, or answer
+with an error status (e.g. 403, or 503 with a Retry-After) for some or all requests.
+"""
+
+import hashlib
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LISTING_PAGE = """<html><head><title>{name}</title></head><body>
+<h1>{name} latest news</h1>
+{items}
+{next_page}
+</body></html>"""
+
+LISTING_ITEM = """<div class="card"><h2 class="title"><a href="/article/{index}">{name} story {index}</a></h2><time class="listed">{published}</time></div>"""
+
+NEXT_PAGE = """<a class="next-page" href="/page/{page}">Next page</a>"""
+
+ARTICLE_PAGE = """<html><head><title>{name} story {index}</title></head><body>
+<h1 class="headline">{name} story {index}</h1>
+<time class="published">{published}</time>
+<div class="article-body">{paragraphs}</div>
+</body></html>"""
+
+PARAGRAPH = "<p>Paragraph {n} of story {index} from {name}. Operators announced new fibre, mobile and cloud services across the UK today.</p>"
+
+
+class StubSite:
+    """A single stub news site served from a background thread."""
+
+    def __init__(self, name: str, num_articles: int = 20, latency: float = 0.1, paragraphs: int = 8,
+                 fresh_articles: int = None, per_page: int = None, article_hang: float = 0.0,
+                 article_status: int = None, retry_after: str = None, failing_requests: int = None):
+        """
+        fresh_articles is how many articles were published today (all of them by default); each later
+        article is a day older. per_page splits the listing into pages linked by a next page link.
+        article_hang adds seconds to every article page (e.g. longer than the scraper's timeout).
+        article_status answers article pages with that error status (with a Retry-After header if retry_after),
+        for the first failing_requests article requests or for all of them if None.
+        """
+        self.name = name
+        self.num_articles = num_articles
+        self.latency = latency
+        self.paragraphs = paragraphs
+        self.fresh_articles = num_articles if fresh_articles is None else fresh_articles
+        self.per_page = per_page or num_articles
+        self.article_hang = article_hang
+        self.article_status = article_status
+        self.retry_after = retry_after
+        self.failing_requests = failing_requests
+        self.article_requests = 0
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def homepage(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def published(self, index: int) -> str:
+        """The publish date of an article."""
+        days_old = max(0, index - self.fresh_articles + 1)
+        return (date.today() - timedelta(days=days_old)).strftime("%d %B %Y")
+
+    def render(self, path: str):
+        """Return the HTML for a path, or None if the page does not exist."""
+        if path == "/" or path.startswith("/page/"):
+            page = 1 if path == "/" else int(path.rsplit("/", 1)[-1])
+            first = (page - 1) * self.per_page
+            indexes = range(first, min(first + self.per_page, self.num_articles))
+            if not indexes:
+                return None
+            items = "\n".join(LISTING_ITEM.format(index=i, name=self.name, published=self.published(i)) for i in indexes)
+            next_page = NEXT_PAGE.format(page=page + 1) if first + self.per_page < self.num_articles else ""
+            return LISTING_PAGE.format(name=self.name, items=items, next_page=next_page)
+        if path.startswith("/article/"):
+            index = path.rsplit("/", 1)[-1]
+            paragraphs = "".join(PARAGRAPH.format(n=n, index=index, name=self.name) for n in range(self.paragraphs))
+            return ARTICLE_PAGE.format(name=self.name, index=index, published=self.published(int(index)), paragraphs=paragraphs)
+        return None
+
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(site.latency)
+                with site._lock:
+                    site.requests_served += 1
+                    if self.path.startswith("/article/"):
+                        site.article_requests += 1
+                        failing = site.article_status is not None and (
+                            site.failing_requests is None or site.article_requests <= site.failing_requests)
+                    else:
+                        failing = False
+                if self.path.startswith("/article/") and site.article_hang:
+                    time.sleep(site.article_hang)
+                if failing:
+                    self.send_response(site.article_status)
+                    if site.retry_after:
+                        self.send_header("Retry-After", site.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = site.render(self.path)
+                if body is None:
+                    self.send_error(404)
+                    return
+                encoded = body.encode("utf-8")
+                etag = '"' + hashlib.md5(encoded).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def handle_one_request(self):
+                try:
+                    super().handle_one_request()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass # The scraper gave up waiting for a hanging page
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+        return Handler
+
+    def config_section(self, max_articles: int, listing_dates: bool = False) -> str:
+        """Return a collect .ini section that scrapes this stub site, using the listing dates if listing_dates."""
+        return (
+            f"[{self.name}]\n"
+            f"homepage = {self.homepage}\n"
+            f"article_link_selector = h2.title a\n"
+            f"next_page_selector = a.next-page\n"
+            f"title_selector = h1.headline\n"
+            f"content_selector = div.article-body p\n"
+            f"date_selector = time.published\n"
+            + (f"listing_date_selector = time.listed\n" if listing_dates else "")
+            + f"max_articles = {max_articles}\n"
+        )
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -4,10 +4,15 @@ Main script to orchestrate the web scraping and analysis process.
 """
 
 import sys
-import json
 from scripts.collect_data import WebScraper
 from scripts.add_summaries import AnalyseData
 from scripts.convert_json_to_csv import convert_json_to_csv
+from scripts.article_query import output_path
+from scripts.search_index import SearchIndex
+from scripts.seen_index import SeenIndex
+from scripts.metrics import Metrics
+from scripts.streaming_pipeline import scrape_and_analyse
+from scripts.work_queue import WorkQueue
 import os
 
 COLLECT_CONFIG_PATH = "examples/collect_example.ini" # TODO: Change to collect.ini
@@ -16,15 +21,38 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Path to main.py
 FILE_NAME = os.path.join(BASE_DIR, "data", "all_articles")
 UPDATE_TODAY_ONLY = True
 DATE_RANGE_FLAG = False
-
-def run_collect_data():
+SCRAPE_WORKERS = 1 # Articles downloaded at once - e.g. 8 to scrape several articles at a time
+PER_HOST_LIMIT = 4 # Max concurrent requests to a single news site
+HTTP_CACHE_PATH = None # Set to e.g. os.path.join(BASE_DIR, "data", "http_cache.sqlite") to cache downloaded pages
+SEEN_INDEX_PATH = None # Set to e.g. os.path.join(BASE_DIR, "data", "seen_articles.sqlite") to skip articles collected before
+PARSE_WORKERS = 0 # Processes used to parse pages - set to the number of CPU cores to parse several pages at once
+EXTRACTOR_STATS_PATH = None # Set to e.g. os.path.join(BASE_DIR, "data", "extractor_stats.sqlite") to skip newspaper3k where it is not needed
+SEARCH_INDEX_PATH = os.path.join(BASE_DIR, "data", "search_index.sqlite") # Set to None to skip updating the search index
+RUN_REPORT_PATH = os.path.join(BASE_DIR, "data", "run_report.json") # Timings and counters of the last run, served on /metrics
+STREAM_TO_ANALYSIS = False # Set to True to summarise each article as soon as it is scraped, instead of after scraping
+STREAM_QUEUE_SIZE = 32 # Scraped articles waiting to be summarised before scraping is held back
+WORK_QUEUE_PATH = None # Set to e.g. os.path.join(BASE_DIR, "data", "work_queue.sqlite") to share scraping with scripts/queue_worker.py
+
+def create_scraper(metrics: Metrics) -> WebScraper:
+    """Create the WebScraper, filling its seen index from the earlier analysed output on its first run."""
+    scraper = WebScraper(COLLECT_CONFIG_PATH, max_workers=SCRAPE_WORKERS, per_host_limit=PER_HOST_LIMIT,
+                         cache_path=HTTP_CACHE_PATH, seen_index_path=SEEN_INDEX_PATH, parse_workers=PARSE_WORKERS,
+                         extractor_stats_path=EXTRACTOR_STATS_PATH, metrics=metrics, work_queue=WorkQueue(WORK_QUEUE_PATH) if WORK_QUEUE_PATH else None)
+    if scraper.seen_index is not None and len(scraper.seen_index) == 0:
+        # First run with the seen index - fill it from the articles already collected
+        seeded = scraper.seen_index.seed_from_json([FILE_NAME + "_output.json"])
+        print(f"Seen index seeded with {seeded} articles from earlier runs.")
+    return scraper
+
+def run_collect_data(metrics: Metrics):
     print("--- Starting Data Collection ---")
     # Get output file name
     scraped_data_file = FILE_NAME
 
     try:
-        scraper = WebScraper(COLLECT_CONFIG_PATH)
-        all_articles = scraper.scrape_all_sites(scraped_data_file, UPDATE_TODAY_ONLY, DATE_RANGE_FLAG)
+        scraper = create_scraper(metrics)
+        with metrics.timer("pipeline_stage_seconds", stage="collect"):
+            all_articles = scraper.scrape_all_sites(scraped_data_file, UPDATE_TODAY_ONLY, DATE_RANGE_FLAG)
 
         print(f"✓ Results saved to: {scraped_data_file}")
     except ValueError as ve:
@@ -48,37 +76,121 @@ def run_collect_data():
     print("\n--- Data Collection Complete ---")
     return scraped_data_file
 
-def run_analysis(scraped_data_file):
+def run_analysis(scraped_data_file, metrics: Metrics):
     print("\n--- Starting Analysis ---")
     try:
         # Pass the scraped file directly to the analysis class
-        analyser = AnalyseData(input_json=scraped_data_file, config_path=ANALYSE_CONFIG_PATH)
-        analysed_json = analyser.run()
+        analyser = AnalyseData(input_json=scraped_data_file, config_path=ANALYSE_CONFIG_PATH, metrics=metrics)
+        with metrics.timer("pipeline_stage_seconds", stage="analyse"):
+            analysed_json = analyser.run()
         print("\n--- ✓ Analysis Complete ---")
     except Exception as e:
         print(f"An error occurred during analysis: {e}")
         sys.exit(1)
 
+    export_analysis(analyser, analysed_json, metrics)
+
+def record_collected(analyser: AnalyseData):
+    """Add the articles analysed and saved in this run to the seen index, so later runs skip them."""
+    if not SEEN_INDEX_PATH:
+        return
+    try:
+        seen_index = SeenIndex(SEEN_INDEX_PATH)
+        added = seen_index.add_articles(analyser.analysed_articles)
+        print(f"Added {added} articles to the seen index ({len(seen_index)} in total).")
+        seen_index.close()
+    except Exception as e:
+        # The articles are scraped again next run, so carry on
+        print(f"Could not update the seen index: {e}")
+
+def export_analysis(analyser: AnalyseData, analysed_json: str, metrics: Metrics):
+    """Record the analysed articles in the seen index, export them to CSV and add them to the search index."""
+    record_collected(analyser)
+
     print("\n--- Converting to CSV format ---")
     try:
-        with open(analysed_json, "r", encoding="utf-8") as f:
-            analysed_data = json.load(f)  # e.g. a list of JSON objects
+        if UPDATE_TODAY_ONLY:
+            analysed_data = analyser.new_articles # Only this run's articles are appended
+        else:
+            analysed_data = output_path(analysed_json[:-5]) # Streamed one article at a time
         csv_output_name = analysed_json[:-5] + ".csv"
-        convert_json_to_csv(analysed_data, csv_output_name, UPDATE_TODAY_ONLY)
+        with metrics.timer("pipeline_stage_seconds", stage="csv_export"):
+            convert_json_to_csv(analysed_data, csv_output_name, UPDATE_TODAY_ONLY)
 
         print(f"✓ All results saved to {csv_output_name}")
     except Exception as e:
         print(f"An error occurred during converting json to csv format: {e}")
         sys.exit(1)
 
-def main():
+    if SEARCH_INDEX_PATH:
+        print("\n--- Updating search index ---")
+        try:
+            with metrics.timer("pipeline_stage_seconds", stage="search_index"):
+                search_index = SearchIndex(SEARCH_INDEX_PATH)
+                if len(search_index) == 0:
+                    # First run with the search index - add every article analysed before
+                    added = search_index.add_file(output_path(analysed_json[:-5]))
+                else:
+                    added = search_index.add_articles(analyser.new_articles)
+            print(f"Search index: {added} articles added, {len(search_index)} in total.")
+            search_index.close()
+        except Exception as e:
+            # The search index can be rebuilt with scripts/search_index.py, so carry on
+            print(f"Could not update the search index: {e}")
+
+def run_streamed_pipeline(metrics: Metrics):
+    """
+    Scrape and analyse at the same time, summarising each article as soon as it is scraped.
+    Both questions are asked before starting, as the analysis starts with the first article.
+    """
+    analyse = ""
+    while analyse.lower() not in ['y', 'n']:
+        analyse = input("Would you like AWS Bedrock (AI) to analyse the results as they are scraped? (y/n): ")
+    if analyse.lower() == 'n':
+        run_collect_data(metrics)
+        return
+
+    save_to_csv = ""
+    while save_to_csv.lower() not in ['y', 'n']:
+        save_to_csv = input("Would you to save the initial web scrapped .json as a .csv? (y/n): ")
+
+    print("--- Starting Data Collection and Analysis ---")
+    scraped_data_file = FILE_NAME
+    try:
+        scraper = create_scraper(metrics)
+        analyser = AnalyseData(input_json=scraped_data_file, config_path=ANALYSE_CONFIG_PATH, metrics=metrics)
+        all_articles, analysed_json = scrape_and_analyse(scraper, analyser, scraped_data_file, STREAM_QUEUE_SIZE,
+                                                         today_flag=UPDATE_TODAY_ONLY, date_range_flag=DATE_RANGE_FLAG)
+    except ValueError as ve:
+        print(f"Config Error: {ve}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"An error occurred: {e}\nData collection and analysis failed. Exiting.")
+        sys.exit(1)
+    if all_articles is False:
+        print("Data collection failed. Exiting.")
+        sys.exit(1)
+
+    print(f"✓ Results saved to: {scraped_data_file}")
+    if save_to_csv.lower() == 'y':
+        print("--- Saving Data Collection to csv format ---")
+        convert_json_to_csv(all_articles, scraped_data_file + ".csv", False) # Always re-write file
+    print("\n--- ✓ Analysis Complete ---")
+
+    export_analysis(analyser, analysed_json, metrics)
+
+def run_pipeline(metrics: Metrics):
     """
     This script first runs the web scraper to collect articles,
     and then asks the user if they want to proceed with analysing the results.
+    With STREAM_TO_ANALYSIS the articles are analysed while they are scraped instead.
     """
+    if STREAM_TO_ANALYSIS:
+        run_streamed_pipeline(metrics)
+        return
 
     # Run news article web scraping
-    web_scraped_json = run_collect_data()
+    web_scraped_json = run_collect_data(metrics)
 
     # Ask the user if they want to analyse the results
     analyse = ""
@@ -90,8 +202,23 @@ def main():
         sys.exit(0)
 
     # Run analysis of web scrapped file
-    run_analysis(web_scraped_json)
-    
+    run_analysis(web_scraped_json, metrics)
+
+def save_run_report(metrics: Metrics):
+    """Save the timings and counters of the run as a JSON report."""
+    try:
+        metrics.write_report(RUN_REPORT_PATH)
+        print(f"Run report saved to {RUN_REPORT_PATH}")
+    except OSError as e:
+        print(f"Could not save the run report: {e}")
+
+def main():
+    metrics = Metrics()
+    try:
+        run_pipeline(metrics)
+    finally:
+        # Also saved when a stage fails and exits, to show where the run stopped
+        save_run_report(metrics)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
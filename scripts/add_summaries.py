@@ -1,16 +1,49 @@
 import json
+import os
 import boto3
 import sys
 import configparser
+import random
 import re
+import statistics
+import threading
+import time
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from scripts.rate_limit import RateLimiter
+    from scripts.summary_cache import SummaryCache, cache_key
+    from scripts.near_duplicates import DEFAULT_THRESHOLD, article_text, find_duplicate_clusters, most_detailed
+    from scripts.article_store import ArticleStore, prepend_to_json_array
+    from scripts.metrics import Metrics
+    from scripts.json_scanner import JsonValueScanner, MalformedJsonError, find_json_values
+except ImportError: # Running from inside the scripts folder
+    from rate_limit import RateLimiter
+    from summary_cache import SummaryCache, cache_key
+    from near_duplicates import DEFAULT_THRESHOLD, article_text, find_duplicate_clusters, most_detailed
+    from article_store import ArticleStore, prepend_to_json_array
+    from metrics import Metrics
+    from json_scanner import JsonValueScanner, MalformedJsonError, find_json_values
 
 ANALYSE_CONFIG_PATH = "../examples/summary_example.ini"
+DEFAULT_REGION = "us-east-1"
+DEFAULT_MODEL_ID = "us.anthropic.claude-3-5-sonnet-20241022-v2:0"
+DEDUPE_MODES = ("local", "hybrid", "bedrock")
+MAX_TEXT_BEFORE_JSON = 2000 # Streamed responses with no JSON in this many characters are treated as malformed
+
+# Bedrock error codes that mean "slow down and try again"
+RETRYABLE_ERROR_CODES = {"ThrottlingException", "TooManyRequestsException", "ServiceUnavailableException",
+                         "ModelNotReadyException", "ModelStreamErrorException"}
 
 class AnalyseData:
     """A class to encapsulate the data analysis process."""
 
-    def __init__(self, input_json: str=None, config_path: str=None):
-        """Initialize the analysis object and setup the environment."""
+    def __init__(self, input_json: str=None, config_path: str=None, metrics: Metrics=None):
+        """
+        Initialize the analysis object and setup the environment.
+        metrics is the Metrics object the Bedrock calls are recorded in (e.g. shared with the scraper for a run report).
+        """
 
         # Check that input_json has been provided
         if not input_json:
@@ -26,6 +59,15 @@ class AnalyseData:
         # Get config file and set up
         self._setup_config(config_path)
 
+        # The Bedrock client is created on first use and shared by every call
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        # Per-call latency in seconds, split by stage
+        self.latency = {"client_setup": [], "network": [], "parsing": []}
+        self._latency_lock = threading.Lock()
+        self.metrics = metrics if metrics is not None else Metrics()
+
     def _setup_config(self, config_path: str):
         """Setup configuration and parse command-line arguments."""
         # Config file setup
@@ -41,11 +83,76 @@ class AnalyseData:
             print(f"Error: config.ini is missing required fields: {e}")
             sys.exit(1)
 
+        # Optional concurrency and rate limit settings
+        try:
+            self.concurrency = max(1, self.config.getint("data", "concurrency", fallback=1))
+            self.max_retries = self.config.getint("data", "max_retries", fallback=5)
+            requests_per_minute = self.config.getfloat("data", "requests_per_minute", fallback=50)
+            tokens_per_minute = self.config.getfloat("data", "tokens_per_minute", fallback=200000)
+        except ValueError as e:
+            print(f"Error: invalid concurrency or rate limit in config.ini: {e}")
+            sys.exit(1)
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+
+        # Optional Bedrock settings
+        self.region = self.config.get("bedrock", "region", fallback=DEFAULT_REGION)
+        self.model_id = self.config.get("bedrock", "model_id", fallback=DEFAULT_MODEL_ID)
+        try:
+            self.streaming = self.config.getboolean("bedrock", "streaming", fallback=False)
+        except ValueError as e:
+            print(f"Error: invalid [bedrock] streaming in config.ini: {e}")
+            sys.exit(1)
+
+        # Optional de-duplication settings
+        self.dedupe_mode = self.config.get("dedupe", "mode", fallback="bedrock").strip().lower()
+        if self.dedupe_mode not in DEDUPE_MODES:
+            print(f"Error: [dedupe] mode must be one of {', '.join(DEDUPE_MODES)}, not '{self.dedupe_mode}'")
+            sys.exit(1)
+        try:
+            self.dedupe_threshold = self.config.getfloat("dedupe", "similarity_threshold", fallback=DEFAULT_THRESHOLD)
+        except ValueError as e:
+            print(f"Error: invalid [dedupe] similarity_threshold in config.ini: {e}")
+            sys.exit(1)
+
+        # Optional batch settings
+        try:
+            self.batch_enabled = self.config.getboolean("batch", "enabled", fallback=False)
+            self.batch_token_budget = self.config.getint("batch", "token_budget", fallback=12000)
+            self.batch_max_articles = max(1, self.config.getint("batch", "max_articles", fallback=8))
+        except ValueError as e:
+            print(f"Error: invalid [batch] settings in config.ini: {e}")
+            sys.exit(1)
+        self.batch_prompt_template = self.config.get("analyse_prompt", "batch_prompt_template", fallback=None)
+        if self.batch_enabled and not self.batch_prompt_template:
+            print("WARNING: [batch] is enabled but [analyse_prompt] has no batch_prompt_template. Batching is off.")
+            self.batch_enabled = False
+
+        # Optional summary cache - a relative path is relative to the config file
+        self.summary_cache = None
+        cache_path = self.config.get("cache", "summary_cache_path", fallback=None)
+        if cache_path:
+            cache_path = os.path.join(os.path.dirname(os.path.abspath(config_path)), cache_path)
+            try:
+                max_bytes = self.config.getint("cache", "max_bytes", fallback=None)
+            except ValueError as e:
+                print(f"Error: invalid summary cache size in config.ini: {e}")
+                sys.exit(1)
+            self.summary_cache = SummaryCache(cache_path, max_bytes) if max_bytes else SummaryCache(cache_path)
+
     def parse_json_response(self, text: list):
         # Try to extract JSON from the response
         parsed = []
-        
-        # First, try to find JSON array pattern
+
+        # First, find the complete JSON objects and arrays in one pass
+        for value in find_json_values(str(text)):
+            if isinstance(value, dict):
+                parsed.append(value)
+            elif isinstance(value, list):
+                parsed.extend(item for item in value if isinstance(item, dict))
+        if parsed:
+            return parsed
+
+        # Otherwise (e.g. the JSON has trailing commas), try to find JSON array pattern
         array_match = re.search(r'\[.*?\]', str(text), re.DOTALL)
         if array_match:
             try:
@@ -78,54 +185,205 @@ class AnalyseData:
         return parsed
 
 
-    def analyse_with_bedrock(self, prompt: str, model_id: str="us.anthropic.claude-3-5-sonnet-20241022-v2:0") -> list:
+    def _bedrock_client(self):
+        """
+        Return the shared Bedrock runtime client, creating it on first use.
+        Its connection pool is sized so every concurrent call gets a connection.
+        """
+        with self._client_lock:
+            if self._client is None:
+                self._client = boto3.client(
+                    "bedrock-runtime",
+                    region_name=self.region,
+                    config=Config(max_pool_connections=max(10, self.concurrency))
+                )
+            return self._client
+
+    def _record_latency(self, stage: str, seconds: float):
+        with self._latency_lock:
+            self.latency[stage].append(seconds)
+        self.metrics.observe("bedrock_call_seconds", seconds, stage=stage)
+
+    def _record_usage(self, model_id: str, result: dict, response_bytes: int):
+        """Count a Bedrock call, its response size and the input/output tokens reported in its response body."""
+        self.metrics.count("bedrock_calls", model=model_id)
+        self.metrics.count("bedrock_response_bytes", response_bytes, model=model_id)
+        usage = result.get("usage") if isinstance(result, dict) else None
+        if isinstance(usage, dict):
+            self.metrics.count("bedrock_tokens", usage.get("input_tokens", 0), model=model_id, direction="input")
+            self.metrics.count("bedrock_tokens", usage.get("output_tokens", 0), model=model_id, direction="output")
+
+    def print_latency_summary(self):
+        """Print the count, mean and 95th percentile of the per-call latency of each stage."""
+        print("Bedrock call latency:")
+        for stage, values in self.latency.items():
+            if not values:
+                continue
+            p95 = statistics.quantiles(values, n=20)[-1] if len(values) > 1 else values[0]
+            print(f"  {stage:<13} calls: {len(values):>4} | mean: {statistics.mean(values) * 1000:8.1f} ms "
+                  f"| p95: {p95 * 1000:8.1f} ms | total: {sum(values):7.2f} s")
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """Check if a Bedrock error is throttling (or a temporary outage, or a malformed stream) and the call can be retried."""
+        if isinstance(error, MalformedJsonError):
+            return True
+        response = getattr(error, "response", None)
+        if isinstance(response, dict):
+            return response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+        return False
+
+    def _estimate_tokens(self, prompt: str, max_tokens: int) -> int:
+        """Roughly estimate the tokens used by a call (about 4 characters per token, plus the output)."""
+        return len(prompt) // 4 + max_tokens
+
+    def _read_stream(self, response: dict, expect_array: bool = False) -> tuple:
+        """
+        Read a response of invoke_model_with_response_stream until the first valid JSON object or array in its text
+        is complete, then close the stream so the rest is not generated. With expect_array (e.g. a batch prompt),
+        read until a whole JSON array is complete; if the response ends without one, the objects it held are
+        returned as an array. Returns (the JSON text, the usage, the bytes read).
+        Raises MalformedJsonError if there is no JSON in the first characters, or the response ends without any.
+        """
+        scanner = JsonValueScanner(MAX_TEXT_BEFORE_JSON)
+        stream = response['body']
+        usage = {}
+        received_bytes = 0
+        received_chars = 0
+        values = []
+
+        def wanted():
+            if expect_array:
+                return next((value for value in values if value.startswith('[')), None)
+            return values[0] if values else None
+
+        try:
+            for event in stream:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                received_bytes += len(chunk['bytes'])
+                message = json.loads(chunk['bytes'])
+                if message.get('type') == 'message_start':
+                    usage['input_tokens'] = message.get('message', {}).get('usage', {}).get('input_tokens', 0)
+                elif message.get('type') == 'message_delta':
+                    usage['output_tokens'] = message.get('usage', {}).get('output_tokens', 0)
+                elif message.get('type') == 'content_block_delta':
+                    text = message.get('delta', {}).get('text', "")
+                    received_chars += len(text)
+                    values.extend(scanner.feed(text))
+                    if wanted() is not None:
+                        # Stopped before Bedrock reported the output tokens - estimate them from the text received
+                        usage.setdefault('output_tokens', received_chars // 4)
+                        return wanted(), usage, received_bytes
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+
+        values.extend(scanner.finish())
+        json_text = wanted()
+        if json_text is None and expect_array and values:
+            json_text = "[" + ", ".join(values) + "]" # Answered with separate objects instead of an array
+        if json_text is None:
+            raise MalformedJsonError("The response ended before its JSON was complete")
+        usage.setdefault('output_tokens', received_chars // 4)
+        return json_text, usage, received_bytes
+
+    def analyse_with_bedrock(self, prompt: str, model_id: str=None, max_tokens: int=None, expect_array: bool=False) -> list:
+        """Send a prompt to Bedrock and return the text of its answer. expect_array - the prompt asks for a JSON array."""
+        model_id = model_id or self.model_id
+        max_tokens = max_tokens or int(self.tokens)
+
         # Set up AWS Bedrock
-        bedrock = boto3.client("bedrock-runtime", region_name="us-east-1")
+        start = time.perf_counter()
+        bedrock = self._bedrock_client()
+        self._record_latency("client_setup", time.perf_counter() - start)
 
         body = {
             "anthropic_version": "bedrock-2023-05-31",
             "messages": [
                 {"role": "user", "content": prompt}
             ],
-            "max_tokens": int(self.tokens), # CHANGE IF MORE TOKENS NEEDED
+            "max_tokens": max_tokens, # CHANGE IF MORE TOKENS NEEDED
             "temperature": 0.2
         }
 
-        try:
-            response = bedrock.invoke_model(
-                modelId=model_id,
-                body=json.dumps(body),
-                accept="application/json",
-                contentType="application/json"
-            )
-            result = json.loads(response['body'].read())
-            content = result.get("content", "")
-        except Exception as e:
-            print(f"Error invoking Bedrock: {e}")
-            sys.exit(1)
+        # Retry throttled calls with exponential backoff and jitter, and malformed streams straight away
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire(self._estimate_tokens(prompt, max_tokens))
+            try:
+                start = time.perf_counter()
+                if self.streaming:
+                    # The text is scanned as it arrives, and the stream is closed once its JSON is complete
+                    response = bedrock.invoke_model_with_response_stream(
+                        modelId=model_id,
+                        body=json.dumps(body),
+                        accept="application/json",
+                        contentType="application/json"
+                    )
+                    json_text, usage, response_bytes = self._read_stream(response, expect_array)
+                    self._record_latency("network", time.perf_counter() - start)
+
+                    start = time.perf_counter()
+                    result = {"content": [{"type": "text", "text": json_text}], "usage": usage}
+                    content = result["content"]
+                    self._record_usage(model_id, result, response_bytes)
+                    break
+
+                response = bedrock.invoke_model(
+                    modelId=model_id,
+                    body=json.dumps(body),
+                    accept="application/json",
+                    contentType="application/json"
+                )
+                raw_body = response['body'].read()
+                self._record_latency("network", time.perf_counter() - start)
+
+                start = time.perf_counter()
+                result = json.loads(raw_body)
+                content = result.get("content", "")
+                self._record_usage(model_id, result, len(raw_body))
+                break
+            except Exception as e:
+                if self._is_retryable(e) and attempt < self.max_retries:
+                    if isinstance(e, MalformedJsonError):
+                        self.metrics.count("bedrock_retries", model=model_id, reason="malformed")
+                        print(f"Malformed Bedrock response, retrying ({attempt + 1}/{self.max_retries}): {e}")
+                        continue
+                    self.metrics.count("bedrock_retries", model=model_id, reason="throttled")
+                    delay = min(60, 2 ** attempt) * random.uniform(0.5, 1.5)
+                    print(f"Bedrock throttled, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries}): {e}")
+                    time.sleep(delay)
+                    continue
+                print(f"Error invoking Bedrock: {e}")
+                sys.exit(1)
 
         # If content is a list with 'type':'text', extract the 'text' field
         if isinstance(content, list) and content and isinstance(content[0], dict) and 'text' in content[0]:
             text = content[0]['text']
         else:
             text = content
+        self._record_latency("parsing", time.perf_counter() - start)
 
         print(text) # Print AWS Bedrock output
 
         return text
         
 
-    def remove_duplicate_articles(self, json_list: list) -> list:
+    def _bedrock_duplicate_indexes(self, json_list: list, indexes: list) -> set:
+        """Ask Bedrock which of the articles at the given indexes are duplicates, and return the indexes to remove."""
         prompt_template = self.de_duplicate_prompt_template
         summarised_data = []
-        for i, obj in enumerate(json_list):
+        for i in indexes:
+            obj = json_list[i]
             summarised_data.append([i, obj["title"], obj["summary_data"]["summary"]])
 
         # print(summarised_data)
         prompt = prompt_template.format(data=summarised_data)
 
         # Get indexes of duplicates to remove
-        response = self.analyse_with_bedrock(prompt)
+        response = self.analyse_with_bedrock(prompt, expect_array=True)
         # print(response)
         response_converted = json.loads(response)
 
@@ -135,65 +393,335 @@ class AnalyseData:
             for sublist in dct.values():
                 indexes_to_remove.extend(sublist)
 
-        # Convert to list of ints and sort descending
-        indexes_to_remove = [int(i) for i in indexes_to_remove]
-        indexes_to_remove = sorted(set(indexes_to_remove), reverse=True)
+        # Only remove articles that were sent in this prompt
+        allowed = set(indexes)
+        return {int(i) for i in indexes_to_remove if int(i) in allowed}
+
+    def remove_duplicate_articles(self, json_list: list) -> list:
+        """
+        Remove duplicate articles from json_list, depending on the [dedupe] mode:
+        - local: near-duplicates are found with MinHash/LSH and the most detailed article of each group is kept.
+        - hybrid: near-duplicate groups are found locally and only those small groups are sent to Bedrock.
+        - bedrock: every article is sent to Bedrock in a single prompt.
+        """
+        if self.dedupe_mode == "bedrock":
+            indexes_to_remove = self._bedrock_duplicate_indexes(json_list, list(range(len(json_list))))
+        else:
+            clusters = find_duplicate_clusters([article_text(obj) for obj in json_list], self.dedupe_threshold)
+            print(f"Found {len(clusters)} groups of near-duplicate articles.")
+
+            indexes_to_remove = set()
+            for cluster in clusters:
+                if self.dedupe_mode == "hybrid":
+                    indexes_to_remove.update(self._bedrock_duplicate_indexes(json_list, cluster))
+                else:
+                    keep = most_detailed(json_list, cluster)
+                    print(f"  Keeping '{json_list[keep]['title']}', removing {len(cluster) - 1} duplicate(s).")
+                    indexes_to_remove.update(i for i in cluster if i != keep)
 
         # Remove indexes in descending order so correct items are removed
-        for index in indexes_to_remove:
-            if 0 <= index < len(summarised_data):
+        for index in sorted(indexes_to_remove, reverse=True):
+            if 0 <= index < len(json_list):
                 json_list.pop(index)
 
         return json_list
 
-    def run(self) -> str:
-        with open(self.input_json + ".json", "r", encoding="utf-8") as f:
-            data = json.load(f)  # a list of JSON objects
-        analyse_prompt_template = self.analyse_prompt_template
+    def _article_prompt(self, obj: dict) -> str:
+        """Render the analyse prompt for a single article."""
+        return self.analyse_prompt_template.format(title=obj['title'], cleaned_text=obj['cleaned_text'])
+
+    def _batch_article(self, position: int, obj: dict) -> str:
+        """Render one article as it appears in batch_prompt_template."""
+        return f"Article {position}:\nTitle: {obj['title']}\nFull Text: {obj['cleaned_text']}"
+
+    def _batch_cache_prompt(self, obj: dict) -> str:
+        """
+        The prompt a batch summary is cached under. Batch answers are kept apart from
+        single-article summaries, so each is only reused by the mode (and template) that made it.
+        """
+        return "batch\0" + self.batch_prompt_template.format(articles=self._batch_article(0, obj))
+
+    def _cached_summary(self, prompt: str):
+        """Return the cached summary_data for a prompt, or None."""
+        if self.summary_cache is None:
+            return None
+        summary = self.summary_cache.get(cache_key(prompt, self.model_id))
+        self.metrics.count("summary_cache_lookups", result="miss" if summary is None else "hit")
+        return summary
+
+    def _cache_summary(self, prompt: str, summary: dict):
+        """Store the summary_data for a prompt."""
+        if self.summary_cache is not None:
+            self.summary_cache.put(cache_key(prompt, self.model_id), summary)
+
+    def _summarise_article(self, i: int, total: int, obj: dict) -> dict:
+        """Summarise a single article with Bedrock and return its summary_data."""
+        news_title = obj['title']
+        print(f"({i}/{total}) Summarising: {news_title}" )
+
+        analyse_prompt = self._article_prompt(obj)
+
+        # Reuse the summary if this exact prompt has been sent to this model before
+        cached = self._cached_summary(analyse_prompt)
+        if cached is not None:
+            print(f"  Summary found in cache: {news_title}")
+            return cached
+
+        # Call AWS Bedrock summarization API with prompt
+        response = self.analyse_with_bedrock(analyse_prompt)
+        parsed_response = self.parse_json_response(response)
+
+        if parsed_response:
+            self._cache_summary(analyse_prompt, parsed_response[0])
+        return parsed_response[0]
+
+    def parse_batch_response(self, text: str, count: int) -> dict:
+        """
+        Map the JSON array returned for a batch back to the positions of the articles in the batch.
+        Results that are missing, malformed or out of range are left out.
+        """
+        text = str(text)
+        items = None
+        start, end = text.find('['), text.rfind(']')
+        if start != -1 and end > start:
+            try:
+                items = json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                items = None
+        if not isinstance(items, list):
+            items = self.parse_json_response(text)
+
+        results = {}
+        for item in items:
+            if not isinstance(item, dict) or 'summary' not in item:
+                continue
+            try:
+                position = int(item.pop('index'))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if 0 <= position < count and position not in results:
+                results[position] = item
+        return results
+
+    def _build_batches(self, data: list, indexes: list) -> list:
+        """Group the articles at indexes into batches that fit the token budget and max_articles."""
+        overhead = len(self.batch_prompt_template) // 4
+        batches = []
+        batch, batch_tokens = [], overhead
+        for i in indexes:
+            article_tokens = (len(data[i]['title']) + len(data[i]['cleaned_text'])) // 4 + 10
+            if batch and (batch_tokens + article_tokens > self.batch_token_budget or len(batch) >= self.batch_max_articles):
+                batches.append(batch)
+                batch, batch_tokens = [], overhead
+            batch.append(i)
+            batch_tokens += article_tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _summarise_batch(self, data: list, batch: list, total: int) -> dict:
+        """
+        Summarise a batch of articles in one Bedrock request. Returns {index in data: summary_data}.
+        Articles whose result is missing or malformed are summarised again on their own.
+        """
+        if len(batch) == 1:
+            return {batch[0]: self._summarise_article(batch[0], total, data[batch[0]])}
+
+        print(f"({batch[0]}-{batch[-1]}/{total}) Summarising a batch of {len(batch)} articles")
+        articles = "\n\n".join(self._batch_article(position, data[i]) for position, i in enumerate(batch))
+        prompt = self.batch_prompt_template.format(articles=articles)
+        response = self.analyse_with_bedrock(prompt, max_tokens=int(self.tokens) * len(batch), expect_array=True)
+        results = self.parse_batch_response(response, len(batch))
+
+        summaries = {}
+        for position, i in enumerate(batch):
+            if position in results:
+                summaries[i] = results[position]
+                self._cache_summary(self._batch_cache_prompt(data[i]), results[position])
+            else:
+                print(f"  No valid result for '{data[i]['title']}' in the batch, retrying it on its own.")
+                summaries[i] = self._summarise_article(i, total, data[i])
+        return summaries
+
+    def summarise_articles(self, data: list) -> list:
+        """
+        Add summary_data to each article in data, calling Bedrock for up to `concurrency` articles (or batches) at once.
+        Results are written back to the article they belong to, so the order of data is unchanged.
+        """
+        total = len(data)
+        if self.batch_enabled:
+            return self._summarise_in_batches(data)
 
-        # Process each JSON object
+        if self.concurrency == 1:
+            for i, obj in enumerate(data):
+                obj["summary_data"] = self._summarise_article(i, total, obj)
+            return data
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = [pool.submit(self._summarise_article, i, total, obj) for i, obj in enumerate(data)]
+            for obj, future in zip(data, futures):
+                # Add summary back into the JSON object
+                obj["summary_data"] = future.result()
+
+        return data
+
+    def _summarise_in_batches(self, data: list) -> list:
+        """Summarise data with several articles per Bedrock request. Cached articles are not sent."""
         total = len(data)
+        pending = []
         for i, obj in enumerate(data):
-            text_to_summarise = obj['cleaned_text']
-            news_title = obj['title']
-            print(f"({i}/{total}) Summarising: {news_title}" )
-
-            analyse_prompt = analyse_prompt_template.format(title=news_title, cleaned_text=text_to_summarise)
+            cached = self._cached_summary(self._batch_cache_prompt(obj))
+            if cached is not None:
+                obj["summary_data"] = cached
+            else:
+                pending.append(i)
+
+        batches = self._build_batches(data, pending)
+        print(f"Summarising {len(pending)} articles in {len(batches)} requests "
+              f"({total - len(pending)} summaries found in cache).")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for summaries in pool.map(lambda batch: self._summarise_batch(data, batch, total), batches):
+                for i, summary in summaries.items():
+                    data[i]["summary_data"] = summary
+
+        return data
+
+    def summarise_stream(self, articles) -> list:
+        """
+        Add summary_data to articles as they arrive from an iterable (e.g. an ArticleStream filled by the scraper),
+        with up to `concurrency` articles (or batches) being summarised at once. Reading waits while every worker is
+        busy, so a slow Bedrock holds the articles back in the iterable. Returns the articles in the order they
+        arrived, with the same summaries and batches as summarise_articles on the whole list.
+        """
+        data = []
+        pending = [] # Batch mode: the articles not yet in a full batch
+        futures = []
+        failed = []
+        in_flight = threading.BoundedSemaphore(self.concurrency)
+
+        def finished(future):
+            in_flight.release()
+            if not future.cancelled() and future.exception() is not None:
+                failed.append(future)
+
+        def submit(batch):
+            in_flight.acquire()
+            future = pool.submit(self._summarise_batch, data, batch, "?") # The total is not known yet
+            future.add_done_callback(finished)
+            futures.append(future)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            try:
+                for obj in articles:
+                    if failed:
+                        break # Stop reading, the error is raised below
+                    i = len(data)
+                    data.append(obj)
+                    if not self.batch_enabled:
+                        submit([i])
+                        continue
+
+                    cached = self._cached_summary(self._batch_cache_prompt(obj))
+                    if cached is not None:
+                        obj["summary_data"] = cached
+                        continue
+                    # Send each batch once the next article does not fit in it, like _build_batches
+                    pending.append(i)
+                    batches = self._build_batches(data, pending)
+                    for batch in batches[:-1]:
+                        submit(batch)
+                    pending = batches[-1]
+                if pending and not failed:
+                    submit(pending)
+
+                for future in futures:
+                    for i, summary in future.result().items():
+                        data[i]["summary_data"] = summary
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+            if failed:
+                failed[0].result()
+
+        return data
+
+    def load_articles(self) -> list:
+        """Load the scraped articles from the input JSONL store, or from the legacy JSON file."""
+        input_store = ArticleStore(self.input_json + ".jsonl")
+        if input_store.exists():
+            return list(input_store)
+        with open(self.input_json + ".json", "r", encoding="utf-8") as f:
+            return json.load(f)  # a list of JSON objects
+
+    def _append_output(self, suffix: str, articles: list):
+        """
+        Append articles to an output's JSONL store and keep its legacy JSON file (read by the website) in sync.
+        The legacy JSON lists the newest articles first, so they are written before the rest of the history,
+        which is copied after them without being parsed.
+        """
+        store = ArticleStore(self.input_json + suffix + ".jsonl")
+        legacy_json = self.input_json + suffix + ".json"
+
+        # First run with the store - start it from the existing JSON output
+        if not store.exists() and os.path.exists(legacy_json):
+            print(f"Creating {store.path} from {legacy_json}")
+            try:
+                store.import_json(legacy_json, newest_first=True)
+            except json.JSONDecodeError as e:
+                print(f"Could not read {legacy_json}, starting a new store: {e}")
 
-            # Call AWS Bedrock summarization API with prompt
-            response = self.analyse_with_bedrock(analyse_prompt)
-            parsed_response = self.parse_json_response(response)
-            
-            # Add summary back into the JSON object or store it separately
-            obj["summary_data"] = parsed_response[0]
+        with self.metrics.timer("json_write_seconds", output=suffix.strip("_")):
+            store.append(articles)
+            try:
+                prepend_to_json_array(legacy_json, articles, indent=9)
+            except (ValueError, OSError) as e:
+                print(f"Could not add to {legacy_json} ({e}), exporting it from {store.path} instead.")
+                store.export_json(legacy_json, indent=9, newest_first=True)
+
+    def run(self, articles=None) -> str:
+        """
+        Summarise and de-duplicate the scraped articles and append them to the outputs.
+        articles is an iterable of the scraped articles to summarise as they arrive (see summarise_stream),
+        instead of loading them from the input file once scraping is done. Nothing is saved if it raises.
+        """
+        self.new_articles = []
+        self.analysed_articles = []
+        if articles is None:
+            data = self.load_articles()
+            if not data: # e.g. every article was already collected in an earlier run
+                print("No new articles to analyse.")
+                return (self.input_json + '_output_AI.json')
+            with self.metrics.timer("analysis_stage_seconds", stage="summarise"):
+                self.summarise_articles(data)
+        else:
+            with self.metrics.timer("analysis_stage_seconds", stage="summarise"):
+                data = self.summarise_stream(articles)
+            if not data:
+                print("No new articles to analyse.")
+                return (self.input_json + '_output_AI.json')
+        self.metrics.count("articles_analysed", len(data))
 
         # Append data
-        try:
-            with open(self.input_json + "_output.json", "r", encoding="utf-8") as file:
-                appended_data = data.extend(json.load(file))
-        except FileNotFoundError:
-            appended_data = data
-            print("File not found. Writing to file instead of appending.")
-
-        with open(self.input_json + '_output.json', "w", encoding="utf-8") as f:
-            json.dump(appended_data, f, ensure_ascii=False, indent=9)
+        self._append_output("_output", data)
+        self.analysed_articles = data
         
         print("--- Analysis completed successfully! Attempting to remove duplicates now... ---")
 
         # Remove duplicate summaries - only run on the articles added
-        list_to_save = self.remove_duplicate_articles(data)
+        with self.metrics.timer("analysis_stage_seconds", stage="dedupe"):
+            list_to_save = self.remove_duplicate_articles(data)
+        self.metrics.count("duplicates_removed", len(data) - len(list_to_save))
 
-        # Append data
-        try:
-            with open(self.input_json + "_output.json", "r", encoding="utf-8") as file:
-                list_to_save.extend(json.load(file))
-        except FileNotFoundError:
-            print("File not found. Writing to file instead of appending.")
-
-        # Save updated data and appended data
-        with open(self.input_json + '_output_AI.json', "w", encoding="utf-8") as f:
-            json.dump(list_to_save, f, ensure_ascii=False, indent=9)
+        # Append the de-duplicated articles
+        self._append_output("_output_AI", list_to_save)
+        self.new_articles = list_to_save
         print("Duplicates removed successfully!")
+        self.print_latency_summary()
+        if self.summary_cache is not None:
+            self.summary_cache.evict()
+            self.summary_cache.print_stats()
 
         return (self.input_json + '_output_AI.json')
             
@@ -0,0 +1,209 @@
+"""
+Query index over the analysed articles, used by server.py's /articles API.
+
+The index is built once from the output file (JSONL store or legacy JSON) and answers
+filtered, paginated queries without scanning every article:
+- source, date and the summary_data fields (category, tags, geography, companies, ...) map
+  each distinct lower-case value to the set of articles that have it. Filters match values
+  containing the search text, like the website's search bars, by scanning the distinct values only.
+- dates are kept in a sorted list for date range queries.
+- the words of the titles and summaries map to the articles that contain them. q searches the sorted
+  vocabulary by prefix, so results update while the user is still typing a word. The title and summary
+  filters match any part of the text, like the website's search bars always have: the vocabulary narrows
+  the articles down to those with a word containing the longest word of the search text, and only their
+  text is searched.
+"""
+
+import bisect
+import json
+import os
+import re
+from datetime import datetime
+
+try:
+    from scripts.article_store import ArticleStore
+except ImportError: # Running from inside the scripts folder
+    from article_store import ArticleStore
+
+# Query parameter -> summary_data field. Pipe-separated fields are split into separate values.
+FACET_FIELDS = {
+    "category": "category",
+    "product": "product",
+    "technology": "technology",
+    "tags": "tags",
+    "geography": "geography",
+    "companies": "companies_mentioned",
+    "parent_companies": "parent_companies_mentioned",
+}
+DATE_FORMATS = ("%d-%m-%Y", "%Y-%m-%d")
+SORT_OPTIONS = ("date_desc", "date_asc", "title_asc", "title_desc")
+MAX_PAGE_SIZE = 200
+_WORD_PATTERN = re.compile(r"\w+")
+
+def parse_date(text: str):
+    """Parse an article date in one of the formats used in the output files, or return None."""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except (TypeError, ValueError):
+            continue
+    return None
+
+def tokenise(text: str) -> list:
+    return _WORD_PATTERN.findall(str(text).lower())
+
+class ArticleIndex:
+    """Indexes over a list of analysed articles."""
+
+    def __init__(self, articles):
+        # Same rule as the website: only articles with a title and summary are shown
+        self.articles = [a for a in articles if a.get("title") and isinstance(a.get("summary_data"), dict)]
+
+        self.values = {"source": {}, "date": {}}
+        self.values.update({param: {} for param in FACET_FIELDS})
+        self.words = {"title": {}, "summary": {}}
+        self.texts = {"title": [], "summary": []} # Lower-case, for the title and summary filters
+        self.dates = [] # Sorted (date, article id)
+
+        for i, article in enumerate(self.articles):
+            summary_data = article["summary_data"]
+            self._add_value("source", article.get("source"), i)
+            self._add_value("date", article.get("date"), i)
+            for param, field in FACET_FIELDS.items():
+                for value in str(summary_data.get(field) or "").split("|"):
+                    self._add_value(param, value, i)
+
+            self.texts["title"].append(str(article["title"]).lower())
+            self.texts["summary"].append(str(summary_data.get("summary", "")).lower())
+            for word in tokenise(article["title"]):
+                self.words["title"].setdefault(word, set()).add(i)
+            for word in tokenise(summary_data.get("summary", "")):
+                self.words["summary"].setdefault(word, set()).add(i)
+
+            article_date = parse_date(article.get("date"))
+            if article_date:
+                self.dates.append((article_date, i))
+
+        self.dates.sort()
+        self.vocabulary = {field: sorted(words) for field, words in self.words.items()}
+
+    def _add_value(self, param: str, value, i: int):
+        value = str(value or "").strip().lower()
+        if value:
+            self.values[param].setdefault(value, set()).add(i)
+
+    @classmethod
+    def from_path(cls, path: str):
+        """Build the index from a JSONL store, or from a legacy JSON array file."""
+        if path.endswith(".jsonl"):
+            return cls(ArticleStore(path))
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def sources(self) -> list:
+        """The distinct sources, as written in the articles."""
+        return sorted({a["source"] for a in self.articles if a.get("source")})
+
+    def _matching_values(self, param: str, text: str) -> set:
+        """The articles with a value of param containing text."""
+        text = text.strip().lower()
+        ids = set()
+        for value, value_ids in self.values[param].items():
+            if text in value:
+                ids |= value_ids
+        return ids
+
+    def _matching_words(self, fields: tuple, text: str) -> set:
+        """The articles whose fields contain every word of text (the last word can be the start of a word)."""
+        result = None
+        for word in tokenise(text):
+            ids = set()
+            for field in fields:
+                vocabulary = self.vocabulary[field]
+                position = bisect.bisect_left(vocabulary, word)
+                while position < len(vocabulary) and vocabulary[position].startswith(word):
+                    ids |= self.words[field][vocabulary[position]]
+                    position += 1
+            result = ids if result is None else result & ids
+            if not result:
+                break
+        return result if result is not None else set(range(len(self.articles)))
+
+    def _containing(self, field: str, text: str) -> set:
+        """The articles whose field (title or summary) contains text."""
+        text = text.strip().lower()
+        words = tokenise(text)
+        if words:
+            longest = max(words, key=len)
+            candidates = set()
+            for word in self.vocabulary[field]:
+                if longest in word:
+                    candidates |= self.words[field][word]
+        else:
+            candidates = range(len(self.articles))
+        texts = self.texts[field]
+        return {i for i in candidates if text in texts[i]}
+
+    def _date_range(self, date_from, date_to) -> set:
+        start = bisect.bisect_left(self.dates, (date_from, -1)) if date_from else 0
+        end = bisect.bisect_right(self.dates, (date_to, len(self.articles))) if date_to else len(self.dates)
+        return {i for _, i in self.dates[start:end]}
+
+    def query(self, q: str = None, title: str = None, summary: str = None, source: str = None, date: str = None,
+              date_from: str = None, date_to: str = None, sort: str = None, page: int = 1, page_size: int = 50,
+              **facets) -> dict:
+        """
+        Return one page of the articles matching every filter given.
+        q searches the words of the titles and summaries, date_from and date_to are dd-mm-yyyy, and the other
+        filters match the articles whose value contains the text.
+        """
+        ids = None
+        def narrow(matching):
+            nonlocal ids
+            ids = matching if ids is None else ids & matching
+
+        if q:
+            narrow(self._matching_words(("title", "summary"), q))
+        if title:
+            narrow(self._containing("title", title))
+        if summary:
+            narrow(self._containing("summary", summary))
+        if source:
+            narrow(self._matching_values("source", source))
+        if date:
+            narrow(self._matching_values("date", date))
+        if date_from or date_to:
+            start, end = parse_date(date_from), parse_date(date_to)
+            if (date_from and not start) or (date_to and not end):
+                raise ValueError("date_from and date_to must be in the format dd-mm-yyyy")
+            narrow(self._date_range(start, end))
+        for param, text in facets.items():
+            if param not in FACET_FIELDS:
+                raise ValueError(f"Unknown filter '{param}'")
+            if text:
+                narrow(self._matching_values(param, text))
+
+        ids = sorted(ids) if ids is not None else list(range(len(self.articles)))
+
+        if sort:
+            if sort not in SORT_OPTIONS:
+                raise ValueError(f"sort must be one of {', '.join(SORT_OPTIONS)}")
+            if sort.startswith("date"):
+                oldest = datetime.min.date()
+                ids.sort(key=lambda i: parse_date(self.articles[i].get("date")) or oldest, reverse=sort == "date_desc")
+            else:
+                ids.sort(key=lambda i: self.articles[i]["title"].lower(), reverse=sort == "title_desc")
+
+        page = max(1, page)
+        page_size = min(max(1, page_size), MAX_PAGE_SIZE)
+        start = (page - 1) * page_size
+        return {
+            "total": len(ids),
+            "page": page,
+            "page_size": page_size,
+            "articles": [self.articles[i] for i in ids[start:start + page_size]],
+        }
+
+def output_path(base_path: str) -> str:
+    """The file to index for an output: its JSONL store if there is one, otherwise the legacy JSON file."""
+    return base_path + ".jsonl" if os.path.exists(base_path + ".jsonl") else base_path + ".json"
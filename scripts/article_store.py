@@ -0,0 +1,263 @@
+"""
+Append-only, line-delimited JSON (JSONL) store for articles.
+
+Each article is one line of JSON, so new articles are appended without reading or rewriting
+the rest of the file, and the store can be read back one article at a time. The store can be
+compacted (keeping only the latest record for each URL) and exported to the legacy JSON array
+format that website/script.js reads. The store keeps articles in the order they were added, while
+the analysis outputs' legacy JSON files list the newest articles first (--newest-first).
+
+Usage:
+    python -m scripts.article_store compact <store.jsonl>
+    python -m scripts.article_store export <store.jsonl> <output.json> [--newest-first]
+    python -m scripts.article_store import <input.json> <store.jsonl> [--newest-first]
+"""
+
+import codecs
+import json
+import os
+import sys
+
+class ArticleStore:
+    """A JSONL file of article dicts."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def __iter__(self):
+        """Yield the articles in the store one at a time."""
+        if not self.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                article = self._decode(line, line_number)
+                if article is not None:
+                    yield article
+
+    def __reversed__(self):
+        """Yield the articles in the store one at a time, the last one added first."""
+        if not self.exists():
+            return
+        with open(self.path, "rb") as f:
+            # Only the offset of each line is kept, the articles are read back one at a time
+            offsets = []
+            position = 0
+            for line in f:
+                offsets.append(position)
+                position += len(line)
+            for line_number in range(len(offsets), 0, -1):
+                f.seek(offsets[line_number - 1])
+                article = self._decode(f.readline().decode("utf-8"), line_number)
+                if article is not None:
+                    yield article
+
+    def _decode(self, line: str, line_number: int):
+        """Return the article on a line of the store, or None for a blank or invalid line."""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            # e.g. a line cut short by an interrupted run
+            print(f"Skipping invalid line {line_number} in {self.path}: {e}")
+            return None
+
+    def append(self, articles) -> int:
+        """Append articles to the end of the store. Returns the number appended."""
+        count = 0
+        with open(self.path, "a", encoding="utf-8") as f:
+            for article in articles:
+                f.write(json.dumps(article, ensure_ascii=False) + "\n")
+                count += 1
+        return count
+
+    def write(self, articles) -> int:
+        """Replace the contents of the store with articles. Returns the number written."""
+        temp_path = self.path + ".tmp"
+        count = ArticleStore(temp_path).append(articles)
+        os.replace(temp_path, self.path)
+        return count
+
+    def compact(self, key: str = "url") -> tuple:
+        """
+        Rewrite the store keeping only the latest record for each key (records without the key are kept).
+        Returns the number of records (before, after).
+        """
+        # First pass: find the line of the latest record of each key
+        latest = {}
+        total = 0
+        for position, article in enumerate(self):
+            total += 1
+            if article.get(key):
+                latest[article[key]] = position
+
+        # Second pass: stream the records to keep into the new file
+        kept = self.write(
+            article for position, article in enumerate(self)
+            if not article.get(key) or latest[article[key]] == position
+        )
+        return total, kept
+
+    def export_json(self, output_path: str, indent: int = 4, newest_first: bool = False) -> int:
+        """
+        Stream the store into a legacy JSON array file. Returns the number of articles exported.
+        With newest_first the last article added is written first.
+        """
+        count = 0
+        temp_path = output_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for article in (reversed(self) if newest_first else self):
+                f.write(",\n" if count else "\n")
+                f.write(json.dumps(article, ensure_ascii=False, indent=indent))
+                count += 1
+            f.write("\n]" if count else "]")
+        os.replace(temp_path, output_path)
+        return count
+
+    def import_json(self, input_path: str, newest_first: bool = False) -> int:
+        """
+        Append the articles of a legacy JSON array file to the store. Returns the number imported.
+        With newest_first the file lists the newest articles first, so they are added last.
+        """
+        with open(input_path, "r", encoding="utf-8") as f:
+            articles = json.load(f)
+        if not isinstance(articles, list):
+            print(f"{input_path} does not contain a list of articles, nothing imported.")
+            return 0
+        return self.append(reversed(articles) if newest_first else articles)
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16):
+    """
+    Yield the items of a JSON array file one at a time, reading it in chunks of chunk_size characters,
+    so an archive-sized file is never held in memory. Raises ValueError if the file is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} is not a JSON array")
+        position = 1
+        while True:
+            # Skip the whitespace and commas between items, reading more of the file if needed
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position == len(buffer):
+                buffer, position = f.read(chunk_size), 0
+                if not buffer:
+                    raise ValueError(f"{path} ends before its JSON array is closed")
+                continue
+            if buffer[position] == "]":
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                # A number cut off by the end of the chunk (e.g. "-1500." of "-1500.0") decodes too early,
+                # so an item is only complete if it is followed by a separator
+                complete = end < len(buffer) and buffer[end] in " \t\r\n,]"
+            except json.JSONDecodeError:
+                complete = False
+            if not complete:
+                # Keep the start of the item and read more (at least doubling the buffer for long items)
+                more = f.read(max(chunk_size, len(buffer) - position))
+                if not more:
+                    raise ValueError(f"{path} ends before its JSON array is closed")
+                buffer, position = buffer[position:] + more, 0
+                continue
+            yield item
+            position = end
+
+class JsonArrayFile:
+    """A legacy JSON array file of articles, read one article at a time like an ArticleStore."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def __iter__(self):
+        if not self.exists():
+            return iter(())
+        return iter_json_array(self.path)
+
+def open_articles(path: str):
+    """The articles of a JSONL store or a JSON array file, streamed one at a time (and re-iterable)."""
+    return ArticleStore(path) if path.endswith(".jsonl") else JsonArrayFile(path)
+
+def prepend_to_json_array(path: str, articles: list, indent: int = 4, chunk_size: int = 1 << 16) -> int:
+    """
+    Insert articles at the start of a legacy JSON array file, so it lists the newest articles first.
+    The rest of the file is copied after them in chunks, without being parsed or held in memory.
+    The file is created if it does not exist. Returns the number of articles added.
+    """
+    if not articles:
+        return 0
+    encoded = ",\n".join(json.dumps(article, ensure_ascii=False, indent=indent) for article in articles)
+
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[\n" + encoded + "\n]")
+        return len(articles)
+
+    with open(path, "rb") as old:
+        head = old.read(chunk_size)
+        old.seek(max(0, os.path.getsize(path) - 64))
+        tail = old.read()
+    opening = head.find(b"[")
+    prefix = head[:opening]
+    if prefix.startswith(codecs.BOM_UTF8):
+        prefix = prefix[len(codecs.BOM_UTF8):]
+    if opening < 0 or prefix.strip() or not tail.rstrip().endswith(b"]"):
+        raise ValueError(f"{path} is not a JSON array")
+
+    temp_path = path + ".tmp"
+    with open(path, "rb") as old, open(temp_path, "wb") as new:
+        # Copy the old articles from just after the opening bracket
+        old.seek(opening + 1)
+        rest = old.read(chunk_size).lstrip()
+        while not rest:
+            rest = old.read(chunk_size)
+            if not rest:
+                break
+            rest = rest.lstrip()
+
+        new.write(("[\n" + encoded).encode("utf-8"))
+        if rest.startswith(b"]") or not rest:
+            # The file held an empty array
+            new.write(b"\n]")
+        else:
+            new.write(b",\n")
+            while rest:
+                new.write(rest)
+                rest = old.read(chunk_size)
+    os.replace(temp_path, path)
+    return len(articles)
+
+def main():
+    newest_first = "--newest-first" in sys.argv
+    args = [arg for arg in sys.argv if arg != "--newest-first"]
+    if len(args) < 3:
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[1]
+    if command == "compact":
+        before, after = ArticleStore(args[2]).compact()
+        print(f"Compacted {args[2]}: {before} -> {after} articles")
+    elif command == "export" and len(args) == 4:
+        count = ArticleStore(args[2]).export_json(args[3], newest_first=newest_first)
+        print(f"Exported {count} articles to {args[3]}")
+    elif command == "import" and len(args) == 4:
+        count = ArticleStore(args[3]).import_json(args[2], newest_first=newest_first)
+        print(f"Imported {count} articles into {args[3]}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
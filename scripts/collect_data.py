@@ -1,25 +1,66 @@
 """
-Generic Web Scraper for News Articles using newspaper3k and BeautifulSoup as a backup.
+Generic Web Scraper for News Articles using newspaper3k and CSS selectors as a backup.
 
 This script scrapes full text from news articles based on configurations
 in a .ini file and stores the content in a JSON file.
 """
 
-import json
-import re
+import threading
+import time
 import requests
 import configparser
-from urllib.parse import urljoin
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
 from datetime import datetime, date
-from dateutil import parser
-from newspaper import Article
-from bs4 import BeautifulSoup
+
+QUEUE_POLL_SECONDS = 0.2 # How often the queue is checked for new tasks and results
+
+try:
+    from scripts.http_cache import ResponseCache
+    from scripts.seen_index import SeenIndex
+    from scripts.article_store import ArticleStore
+    from scripts.extraction import extract_article, select_links, NEWSPAPER
+    from scripts.extractor_stats import ExtractorStats
+    from scripts.date_normaliser import DateNormaliser, OUTPUT_FORMAT, has_explicit_date
+    from scripts.metrics import Metrics
+    from scripts.host_health import HostHealthTracker
+    from scripts.work_queue import WorkQueue, DONE, worker_name
+except ImportError: # Running from inside the scripts folder
+    from http_cache import ResponseCache
+    from seen_index import SeenIndex
+    from article_store import ArticleStore
+    from extraction import extract_article, select_links, NEWSPAPER
+    from extractor_stats import ExtractorStats
+    from date_normaliser import DateNormaliser, OUTPUT_FORMAT, has_explicit_date
+    from metrics import Metrics
+    from host_health import HostHealthTracker
+    from work_queue import WorkQueue, DONE, worker_name
 
 class WebScraper:
     """A class to scrape news articles from various websites."""
     
-    def __init__(self, config_path: str):
-        """Initialize the scraper with a configuration file."""
+    def __init__(self, config_path: str, max_workers: int = 1, per_host_limit: int = 4, cache_path: str = None,
+                 cache_ttl: float = None, cache_max_bytes: int = None, seen_index_path: str = None,
+                 parse_workers: int = 0, metrics: Metrics = None, host_health: HostHealthTracker = None,
+                 work_queue: WorkQueue = None, extractor_stats_path: str = None):
+        """
+        Initialize the scraper with a configuration file.
+
+        max_workers > 1 scrapes sources and articles concurrently on a thread pool.
+        per_host_limit caps how many requests can be in flight to a single host at once.
+        cache_path enables the on-disk HTTP response cache, which revalidates pages with conditional requests.
+        seen_index_path enables incremental scraping: articles collected in an earlier run are skipped. Articles are
+        only added to the index once they have been analysed and saved (see main.py).
+        parse_workers > 0 parses pages on a process pool of that size, so parsing is not limited by the GIL.
+        metrics is the Metrics object the timings and counters of each stage are recorded in.
+        host_health sets the timeouts, backoff and circuit breakers of each host (see scripts/host_health.py),
+        None uses the defaults.
+        work_queue shares scrape_all_sites with other worker processes (see scripts/queue_worker.py): the links of
+        each source and then each article are put on the queue as tasks, which this scraper's threads work on too.
+        extractor_stats_path enables adaptive extraction: sources whose articles come out the same with the CSS
+        selectors alone as with newspaper3k first skip newspaper3k (see scripts/extractor_stats.py).
+        """
         self.config = configparser.ConfigParser()
         read_files = self.config.read(config_path)
 
@@ -31,7 +72,7 @@ class WebScraper:
             raise ValueError(f"Config file '{config_path}' does not contain any sections.")
 
         # Check for required keys in each section - homepage and article_link_selector are vital for newspaper3k
-        # The rest are required for beautiful soup as a back up web scraper when newspaper cannot find the content
+        # The rest are required for the CSS selector back up web scraper when newspaper cannot find the content
         required_keys = ['homepage', 'article_link_selector', 'title_selector', 'date_selector', 'content_selector']
         for section in self.config.sections():
             for key in required_keys:
@@ -46,24 +87,210 @@ class WebScraper:
             "Referer": "https://www.google.com/"
         })
 
-    def _get_soup(self, url: str):
-        """Fetch a URL and return a BeautifulSoup object."""
-        try:
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            return BeautifulSoup(response.text, 'lxml')
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching {url}:\n{e}")
-            return None
+        # Concurrency setup - the connection pool must be at least as big as the worker pool
+        self.max_workers = max(1, int(max_workers))
+        self.per_host_limit = max(1, int(per_host_limit))
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        self.host_health = host_health if host_health is not None else HostHealthTracker()
+        self.work_queue = work_queue
+
+        # HTTP response cache setup
+        self.cache = None
+        if cache_path:
+            cache_options = {}
+            if cache_ttl is not None:
+                cache_options['ttl'] = cache_ttl
+            if cache_max_bytes is not None:
+                cache_options['max_bytes'] = cache_max_bytes
+            self.cache = ResponseCache(cache_path, **cache_options)
+
+        # Seen article index setup
+        self.seen_index = SeenIndex(seen_index_path) if seen_index_path else None
+        self.known_links = {} # Number of already collected links skipped per source
+
+        # Date parsing setup - date_format (optional, several separated by |) is tried before anything else
+        date_formats = {}
+        for section in self.config.sections():
+            configured = self.config.get(section, 'date_format', raw=True, fallback=None)
+            if configured:
+                date_formats[section] = [f.strip() for f in configured.split('|') if f.strip()]
+        self.dates = DateNormaliser(date_formats)
+
+        # HTML parsing setup - the process pool is only started when a page is first parsed
+        self.parse_workers = max(0, int(parse_workers))
+        self._parse_pool = None
+        self._parse_pool_lock = threading.Lock()
+        self.extractor_stats = ExtractorStats(extractor_stats_path) if extractor_stats_path else None
+
+        # Count the HTTP fetches and HTML parses of a run, and time each stage per source
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the fetch and parse counters."""
+        with self._stats_lock:
+            self.stats = {'fetches': 0, 'not_modified': 0, 'newspaper_parses': 0, 'selector_parses': 0,
+                          'known_links_skipped': 0, 'known_content_skipped': 0, 'listing_date_skipped': 0,
+                          'pagination_stopped_early': 0, 'retries': 0, 'circuit_skipped': 0, 'newspaper_skipped': 0}
+
+    def _count(self, name: str, amount: int = 1):
+        """Increment one of the fetch/parse counters."""
+        with self._stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + amount
+        self.metrics.count("scraper_" + name, amount)
+
+    def print_stats(self):
+        """Print the fetch, parse and date parsing counters."""
+        print(f"HTTP fetches: {self.stats['fetches']} (not modified: {self.stats['not_modified']}) | newspaper3k parses: {self.stats['newspaper_parses']} "
+              f"| selector parses: {self.stats['selector_parses']}")
+        if self.extractor_stats is not None:
+            for row in self.extractor_stats.report(self.config.sections()):
+                rates = " | ".join(f"{extractor}: " + ", ".join(f"{field} {rate:.0%}" for field, rate in fields.items())
+                                   for extractor, fields in row['rates'].items())
+                print(f"Extraction of {row['source']} - {row['strategy']} | newspaper3k skipped for "
+                      f"{row['run_newspaper_skipped']} articles ({row['run_seconds_saved']:.1f}s saved, "
+                      f"{row['seconds_saved']:.1f}s in total) | fields found by {rates} | same value: "
+                      + ", ".join(f"{field} {rate:.0%}" for field, rate in row['agreement'].items()))
+        if self.seen_index is not None:
+            print(f"Already collected - links skipped: {self.stats['known_links_skipped']} "
+                  f"| duplicate content skipped: {self.stats['known_content_skipped']}")
+        if self.stats['listing_date_skipped'] or self.stats['pagination_stopped_early']:
+            print(f"Listing dates - article fetches saved: {self.stats['listing_date_skipped']} "
+                  f"| sources that stopped paginating early: {self.stats['pagination_stopped_early']}")
+        opened = self.host_health.open_circuits()
+        if self.stats['retries'] or self.stats['circuit_skipped'] or opened:
+            print(f"Host health - retries: {self.stats['retries']} | requests skipped: {self.stats['circuit_skipped']} "
+                  f"| failing hosts: {', '.join(host for host, _ in opened) or 'none'}")
+        date_stats = self.dates.stats
+        print(f"Dates - remembered: {date_stats['memo_hits']} | known format: {date_stats['fast_path']} "
+              f"| fuzzy parsed: {date_stats['fuzzy']} | unreadable: {date_stats['failed']}")
+
+    @contextmanager
+    def _host_slot(self, url: str):
+        """Limit the number of concurrent requests made to the host of a URL."""
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+        with slot:
+            yield
+
+    def _host_failed(self, host: str, source: str) -> bool:
+        """Record a failed request to host. Returns True if its circuit opened, so its requests are now skipped."""
+        if not self.host_health.record_failure(host):
+            return False
+        self.metrics.count("circuit_opened", source=source, host=host)
+        print(f"  {host} keeps failing - skipping its requests for {self.host_health.cooldown:.0f}s")
+        return True
 
-    def find_article_links(self, source: str) -> list:
-        """Find all unique article links from a source's homepage, preserving order."""
+    def _fetch_html(self, url: str, source: str = None, page: str = None):
+        """
+        Fetch a URL with the shared session and return its HTML, revalidating any cached copy.
+        The host's health sets the timeout, and 429/503 responses are retried after a backoff. Returns None
+        without sending the request while the host's circuit is open (see scripts/host_health.py).
+        source and page (listing or article) label the request in the metrics.
+        """
+        host = urlparse(url).netloc
+        cached = self.cache.get(url) if self.cache else None
+        headers = ResponseCache.conditional_headers(cached) if cached else None
+
+        attempt = 0
+        while True:
+            try:
+                waiting = time.perf_counter()
+                self.host_health.wait_turn(host) # Back off from a host that asked us to, before taking a slot
+                with self._host_slot(url):
+                    start = time.perf_counter()
+                    self.metrics.observe("host_wait_seconds", start - waiting, source=source)
+                    # Checked once a slot is free, as the host may have started failing while this request waited
+                    allowed = self.host_health.start_request(host)
+                    delay = None
+                    if allowed:
+                        self._count('fetches')
+                        try:
+                            response = self.session.get(url, timeout=self.host_health.timeout(host), headers=headers)
+                        except Exception:
+                            self._host_failed(host, source)
+                            raise
+                        finally:
+                            elapsed = time.perf_counter() - start
+                            self.metrics.observe("http_request_seconds", elapsed, source=source, page=page)
+                        # Recorded before the slot is freed, so the requests waiting for it see a failing host.
+                        # A response that will be retried is not a failure yet, only the last attempt counts.
+                        if self.host_health.is_failure(response.status_code):
+                            delay = self.host_health.retry_delay(host, response.status_code,
+                                                                 response.headers.get("Retry-After"), attempt)
+                            if delay is None:
+                                self._host_failed(host, source)
+                            else:
+                                self.host_health.record_retry(host)
+                        else:
+                            self.host_health.record_success(host, elapsed)
+                if not allowed:
+                    self._count('circuit_skipped')
+                    self.metrics.count("http_skipped", source=source, page=page, reason="circuit_open")
+                    print(f"Skipped {url}: {host} is failing")
+                    return None
+                self.metrics.count("http_responses", source=source, page=page, status=response.status_code)
+                self.metrics.count("http_bytes", len(response.content), source=source, page=page)
+
+                if delay is not None:
+                    attempt += 1
+                    self._count('retries')
+                    self.metrics.count("http_retries", source=source, page=page, status=response.status_code)
+                    print(f"{response.status_code} from {url}, retrying in {delay:.1f}s")
+                    continue
+
+                if cached and response.status_code == 304:
+                    self._count('not_modified')
+                    self.cache.touch(url)
+                    return cached['text']
+                response.raise_for_status()
+                if self.cache:
+                    self.cache.store(url, response)
+                return response.text
+            except requests.exceptions.RequestException as e:
+                self.metrics.count("http_errors", source=source, page=page)
+                print(f"Error fetching {url}:\n{e}")
+                return None
+
+    def _parse(self, function, *args):
+        """Run an extraction function from scripts/extraction.py, on the process pool if parse_workers > 0."""
+        if not self.parse_workers:
+            return function(*args)
+        with self._parse_pool_lock:
+            if self._parse_pool is None:
+                self._parse_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return self._parse_pool.submit(function, *args).result()
+
+    def close_parse_pool(self):
+        """Stop the parsing processes, if any were started."""
+        with self._parse_pool_lock:
+            if self._parse_pool is not None:
+                self._parse_pool.shutdown()
+                self._parse_pool = None
+
+    def find_article_links(self, source: str, date_window: tuple = None) -> list:
+        """
+        Find all unique article links from a source's homepage, preserving order.
+        date_window - the (start, end) dates of the articles wanted: links listed outside them are skipped.
+        """
 
         config_section = self.config[source]
         homepage = config_section.get('homepage')
         selector = config_section.get('article_link_selector')
         next_page_selector = config_section.get('next_page_selector')
         link_text_contains = config_section.get('link_text_contains')
+        listing_date_selector = config_section.get('listing_date_selector')
+        listing_date_attribute = config_section.get('listing_date_attribute')
         max_articles = int(self.config.get(source, 'max_articles', fallback='10'))
 
         print(f"Starting from homepage: {homepage}")
@@ -75,55 +302,90 @@ class WebScraper:
         seen_links = set()
         current_url = homepage
         pages_visited = 0
+        self.known_links[source] = 0
 
         while current_url and len(links) < max_articles:
             print(f"\nFetching page {pages_visited + 1}: {current_url}")
-            soup = self._get_soup(current_url)
-            if not soup:
-                print("Failed to get soup, breaking loop.")
+            html = self._fetch_html(current_url, source, "listing")
+            if html is None:
+                print("Failed to get page, breaking loop.")
                 break
+            self.metrics.count("listing_pages", source=source)
+            with self.metrics.timer("parse_seconds", source=source, parser="listing"):
+                page = self._parse(select_links, html, current_url, selector, next_page_selector, link_text_contains,
+                                   listing_date_selector, listing_date_attribute)
+            self._count('selector_parses')
 
             # Collect article links on current page
             # print("Finding article links...")
             new_links_found = 0
-            for a in soup.select(selector):
-                href = a.get('href')
-                if href:
-                    full_url = urljoin(current_url, href)
-                    if full_url not in seen_links:
-                        print(f"Found new article link: {full_url}")
-                        if source == "Comms Dealer" and full_url == "https://www.comms-dealer.com/magazine/july-issue-2025":
-                            print("-- Magazine link ignored")
-                            continue
-                        links.append(full_url)
+            known_links_found = 0
+            older_links_found = 0
+            newer_links_found = 0
+            listing_dates = page['dates'] or [None] * len(page['links'])
+            for full_url, listing_date in zip(page['links'], listing_dates):
+                if full_url not in seen_links:
+                    if self.seen_index is not None and self.seen_index.has_url(full_url):
+                        print(f"Already collected, skipped: {full_url}")
+                        seen_links.add(full_url)
+                        known_links_found += 1
+                        continue
+                    # Skip links listed outside the dates wanted without downloading them
+                    listed_on = self._parse_listing_date(listing_date, source)
+                    if listed_on and date_window and not date_window[0] <= listed_on <= date_window[1]:
+                        if listed_on < date_window[0]:
+                            older_links_found += 1
+                            print(f"Listed on {listing_date}, before the dates wanted, skipped: {full_url}")
+                        else:
+                            newer_links_found += 1
+                            print(f"Listed on {listing_date}, after the dates wanted, skipped: {full_url}")
+                        self._count('listing_date_skipped')
                         seen_links.add(full_url)
-                        new_links_found += 1
-                        if len(links) >= max_articles:
-                            print("Reached max_articles limit.")
-                            return links
-                    else:
-                        print(f"Duplicate article link ignored: {full_url}")
+                        continue
+                    print(f"Found new article link: {full_url}")
+                    if source == "Comms Dealer" and full_url == "https://www.comms-dealer.com/magazine/july-issue-2025":
+                        print("-- Magazine link ignored")
+                        continue
+                    links.append(full_url)
+                    seen_links.add(full_url)
+                    new_links_found += 1
+                    if len(links) >= max_articles:
+                        print("Reached max_articles limit.")
+                        return links
+                else:
+                    print(f"Duplicate article link ignored: {full_url}")
+
+            # Pages are newest first, so the next pages only contain articles from earlier runs
+            if known_links_found:
+                self.known_links[source] += known_links_found
+                self._count('known_links_skipped', known_links_found)
+                print("Reached articles collected in an earlier run, stopping pagination.")
+                break
+
+            # Pages are newest first, so the next pages only contain older articles
+            if older_links_found:
+                self._count('pagination_stopped_early')
+                print("Reached articles listed before the dates wanted, stopping pagination.")
+                break
 
             # Find next page URL
             next_url = None
-            if new_links_found == 0:
+            if new_links_found == 0 and newer_links_found == 0: # Keep going past pages of articles that are too new
                 print(f"No new links found, stopping.")
                 break
 
             # Try next_page_selector first
             if next_page_selector:
-                next_link = soup.select_one(next_page_selector)
-                if next_link and next_link.has_attr('href'):
-                    next_url = urljoin(current_url, next_link['href'])
+                next_url = page['next_by_selector']
+                if next_url:
                     print(f"Next page found using selector: {next_url}")
                 else:
                     print("No next page link found using selector.")
 
             # If not found, try link_text_contains fallback
             if not next_url and link_text_contains:
-                next_link = soup.find('a', string=lambda t: t and link_text_contains in t)
-                if next_link and next_link.has_attr('href'):
-                    next_url = urljoin(current_url, next_link['href'])
+                next_url = page['next_by_text']
+                if next_url:
                     print(f"Next page found using link text contains '{link_text_contains}': {next_url}")
                 else:
                     print(f"No next page link found using link text contains '{link_text_contains}'.")
@@ -139,97 +401,131 @@ class WebScraper:
         return links
 
 
-    def standardise_date(self, text: str) -> str:
-        """Standardises the date so all dates are in the same format."""
+    def _parse_listing_date(self, text: str, source: str):
+        """
+        Return the date shown next to a link on a listing page, or None if it cannot be read.
+        Relative dates (e.g. "3 days ago") are not read, so the link is checked with the article's own date.
+        """
+        if not text or not has_explicit_date(text):
+            return None
         try:
-            cleaned = re.sub(r'(\d{1,2})(st|nd|rd|th)', r'\1', text)
-            cleaned = re.split(r'[-–](?!\d)', cleaned)[0]
-            dt = parser.parse(cleaned.strip(), fuzzy=True)
-            return dt.strftime('%d-%m-%Y')
-        except Exception as e:
-            return f"Could not parse: {text} ({e})"
-
-    def scrape_article(self, source: str, url: str, today_flag: bool, date_range_flag: bool, start_date: datetime, end_date: datetime) -> dict:
-        """Scrape title, publish date, and content using newspaper3k. If failed with newspaper3k, use BeautifulSoup as a backup"""
-
-        article_failed = False
+            with self.metrics.timer("date_parse_seconds", source=source, date="listing"):
+                return self.dates.normalise(text, source)
+        except (ValueError, TypeError, OverflowError):
+            return None
 
+    def standardise_date(self, text: str, source: str = None) -> str:
+        """Standardises the date so all dates are in the same format."""
         try:
-            article = Article(url)
-            article.download()
-            article.parse()
+            return self.dates.format(text, source)
         except Exception as e:
-            article_failed = True # Use Beautiful Soup
-            print(f"Using BeautifulSoup to scrape {url}: {e}")
-
-        soup = self._get_soup(url) # For backup
+            return f"Could not parse: {text} ({e})"
 
-        if article_failed and not soup:
-            return None # Both failed
-        
-        # Try get newspaper3k date first
-        publish_date = article.publish_date
-        if publish_date:
-            article_date = publish_date.strftime('%d-%m-%Y')
+    def _article_date(self, fields: dict, source: str) -> tuple:
+        """Return the date of an article (or None if it is unknown) and the text saved for it."""
+        if fields['date']:
+            article_day = fields['date'].date()
+        elif fields['date_missing']:
+            return None, "Date not found"
         else:
-            # If failed, try soup
-            date_selector = self.config.get(source, 'date_selector')
-            date_attribute = self.config.get(source, 'date_attribute', fallback=None)
-            
             try:
-                date_element = soup.select_one(date_selector)
-                if date_attribute:
-                    article_date = date_element.get(date_attribute)
-                else:
-                    article_date = date_element.get_text(strip=True) if date_element else "Date not found"
-                article_date = self.standardise_date(article_date)
-            except AttributeError:
-                article_date = "Date not found"
+                article_day = self.dates.normalise(fields['date_text'], source)
+            except Exception as e:
+                return None, f"Could not parse: {fields['date_text']} ({e})"
+        return article_day, article_day.strftime(OUTPUT_FORMAT)
+
+    def _extractors_agree(self, fields: dict, source: str) -> dict:
+        """
+        Check which fields the CSS selectors give the same value as newspaper3k first, for the fields both ran on.
+        Titles and text are compared apart from their whitespace.
+        """
+        values = fields['newspaper_values']
+        if values is None:
+            return {}
+        agrees = {}
+        for field, selected in fields['selected'].items():
+            if not values[field]:
+                agrees[field] = True # newspaper3k first uses the selectors for a field it misses
+            elif selected is None:
+                agrees[field] = False
+            elif field == 'date':
+                try:
+                    agrees[field] = self.dates.normalise(selected, source) == values[field].date()
+                except Exception:
+                    agrees[field] = False
+            else:
+                # The selectors' text has its whitespace collapsed, newspaper3k's keeps paragraph breaks
+                agrees[field] = selected.split() == values[field].split()
+        return agrees
+
+    def scrape_article(self, source: str, url: str, today_flag: bool, date_range_flag: bool, start_date: date, end_date: date) -> dict:
+        """
+        Scrape title, publish date, and content using newspaper3k. If failed with newspaper3k, use the CSS selectors as a backup.
+        The page is only downloaded once and only parsed for the selectors when a field is missing.
+        """
+
+        # Download the page once and share the HTML between newspaper3k and the CSS selectors
+        html = self._fetch_html(url, source, "article")
+        if html is None:
+            self.metrics.count("articles", source=source, result="download_failed")
+            return None
+
+        # The sources whose articles come out the same without newspaper3k are extracted with the CSS selectors alone
+        strategy, probe = self.extractor_stats.strategy(source) if self.extractor_stats is not None else (NEWSPAPER, False)
+        fields = self._parse(
+            extract_article, url, html,
+            self.config.get(source, 'date_selector'),
+            self.config.get(source, 'date_attribute', fallback=None),
+            self.config.get(source, 'title_selector'),
+            self.config.get(source, 'content_selector'),
+            strategy,
+            probe,
+        )
+        self.metrics.count("extractions", source=source, strategy=strategy)
+        if self.extractor_stats is not None:
+            changed = self.extractor_stats.record(source, fields['found'], self._extractors_agree(fields, source),
+                                                  fields['timings'],
+                                                  self.config.getboolean(source, 'selector_text', fallback=False))
+            if changed:
+                self.metrics.count("extractor_changes", source=source, strategy=changed)
+                print(f"Extracting {source} articles with {changed} first from now on")
+        if fields['found']['newspaper'] is None:
+            self._count('newspaper_skipped')
+        else:
+            self.metrics.observe("parse_seconds", fields['timings']['newspaper'], source=source, parser="newspaper")
+            if fields['newspaper_parsed']:
+                self._count('newspaper_parses')
+            else:
+                print(f"Using CSS selectors to scrape {url}: {fields['newspaper_error']}")
+        if fields['page_parsed']:
+            self._count('selector_parses')
+            self.metrics.observe("parse_seconds", fields['timings']['selectors'], source=source, parser="selectors")
 
-        # Get today's date
-        date_today = str(date.today().strftime("%d-%m-%Y"))
+        # Use the newspaper3k date first, otherwise the date found with date_selector
+        with self.metrics.timer("date_parse_seconds", source=source, date="article"):
+            article_day, article_date = self._article_date(fields, source)
 
         # Compare dates
-        print(f"Date today: {date_today} | Article date: {article_date}")
-        if today_flag and (article_date != date_today):
+        date_today = date.today()
+        print(f"Date today: {date_today.strftime(OUTPUT_FORMAT)} | Article date: {article_date}")
+        if today_flag and article_day != date_today:
+            self.metrics.count("articles", source=source, result="outside_dates")
             return False
 
-        # Convert dates to datetime for comparison
-        if date_range_flag:
-            article_datetime = datetime.strptime(article_date, "%d-%m-%Y")
+        # An article with an unknown date cannot be in the date range
+        if date_range_flag and (article_day is None or not start_date <= article_day <= end_date):
+            self.metrics.count("articles", source=source, result="outside_dates")
+            return False
 
-            if article_datetime < start_date or article_datetime > end_date:
-                return False
+        self.metrics.count("articles", source=source, result="scraped")
         
-        # Get article title
-        if article.title: # Using newspaper3k
-            title = article.title
-        else: # Using soup
-            title_selector = self.config.get(source, 'title_selector')
-            title_element = soup.select_one(title_selector)
-            title = title_element.get_text(strip=True) if title_element else "Title not found"
-
-        # Get article content
-        if article.text: # Using newspaper3k
-            text = article.text
-        else: # Using soup
-            content_selector = self.config.get(source, 'content_selector')
-            content_element = soup.select(content_selector)
-            if content_element:
-                # Join the text from all found elements
-                text_parts = [elem.get_text(separator=' ', strip=True) for elem in content_element]
-                text = ' '.join(text_parts).split()
-                text = ' '.join(text)
-            else:
-                text = "Content not found"
-
         # Return article data
         return {
             'source': source,
             'url': url,
             'date': article_date,
-            'title': title,
-            'cleaned_text': text
+            'title': fields['title'],
+            'cleaned_text': fields['text']
         }
 
     def valid_date_flags(self, today_only_flag: bool, date_range_flag: bool, start_date: str, end_date: str) -> bool:
@@ -268,45 +564,321 @@ class WebScraper:
         return True
 
 
-    def scrape_all_sites(self, output_name: str, today_flag: bool = False, date_range_flag: bool = False, start_date: str = None, end_date: str = None) -> list:
-        """Scrape all websites defined in the config and save to JSON."""
+    def _print_source_header(self, source: str):
+        print("\n----------------------------------------------------")
+        print(f"Scraping {source}...")
+        print("----------------------------------------------------")
 
-        if not self.valid_date_flags(today_flag, date_range_flag, start_date, end_date):
-            return False
-        if date_range_flag:
-            start_date = datetime.strptime(start_date, "%d-%m-%Y")
-            end_date = datetime.strptime(end_date, "%d-%m-%Y")
+    def _no_new_links(self, source: str) -> bool:
+        """
+        Called when a source has no links to scrape.
+        Returns True if that is because every link was collected in an earlier run, otherwise it is a failure.
+        """
+        if self.known_links.get(source):
+            print(f"  No new articles for {source} since the last run.")
+            return True
+        print(f"  WARNING: No articles found for {source}.")
+        return False
+
+    def _collect_source_articles(self, source: str, links: list, get_article, on_article=None) -> list:
+        """
+        Walk the scraped articles of a source in link order and keep the valid ones.
+        get_article(link) returns the result of scrape_article for that link.
+        on_article(article) is called with each article kept, in the order of the output.
+        """
+        articles = []
+
+        print(f"Scraping top {len(links)} articles.")
+        for i, link in enumerate(links, 1):
+            print(f"  [{i}/{len(links)}] Scraping: {link}")
+            article_data = get_article(link)
+            if article_data:
+                if not article_data['cleaned_text'] or article_data['cleaned_text'] == 'Content not found':
+                    print(f"    WARNING: No content found for {link}.")
+                elif self.seen_index is not None and self.seen_index.has_content(article_data['cleaned_text']):
+                    print(f"    Same content already collected under another URL, skipped: {link}")
+                    self._count('known_content_skipped')
+                else:
+                    articles.append(article_data)
+                    if on_article is not None:
+                        on_article(article_data)
+            elif article_data == False:
+                print(" -- Skipped rest of articles as not today's date or in date range specified")
+                break
+            else:
+                print(f"    WARNING: Failed to scrape article at {link}. (May not be today's date)")
 
+        return articles
+
+    def _scrape_serially(self, today_flag: bool, date_range_flag: bool, start_date: date, end_date: date,
+                         on_article=None):
+        """Scrape each source and each article one after another."""
         all_articles = []
 
         for source in self.config.sections():
-            print("\n----------------------------------------------------")
-            print(f"Scraping {source}...")
-            print("----------------------------------------------------")
-            
-            links_to_scrape = self.find_article_links(source)
+            self._print_source_header(source)
+
+            links_to_scrape = self.find_article_links(source, self._date_window(today_flag, date_range_flag, start_date, end_date))
             if not links_to_scrape:
-                print(f"  WARNING: No articles found for {source}.")
-                return False  # Signal failure, do not write JSON
+                if self._no_new_links(source):
+                    continue
+                return False
             else:
                 print(f"\nFound {len(links_to_scrape)} articles.")
 
             # Scrape all the links found
-            print(f"Scraping top {len(links_to_scrape)} articles.")
-            for i, link in enumerate(links_to_scrape, 1):
-                print(f"  [{i}/{len(links_to_scrape)}] Scraping: {link}")
-                article_data = self.scrape_article(source, link, today_flag, date_range_flag, start_date, end_date)
-                if article_data:
-                    if not article_data['cleaned_text'] or article_data['cleaned_text'] == 'Content not found':
-                        print(f"    WARNING: No content found for {link}.")
-                    else:
-                        all_articles.append(article_data)
-                elif article_data == False:
-                    print(" -- Skipped rest of articles as not today's date or in date range specified")
-                    break
-                else:
-                    print(f"    WARNING: Failed to scrape article at {link}. (May not be today's date)")
-        
+            all_articles.extend(self._collect_source_articles(
+                source, links_to_scrape,
+                lambda link: self.scrape_article(source, link, today_flag, date_range_flag, start_date, end_date),
+                on_article
+            ))
+
+        return all_articles
+
+    def _scrape_concurrently(self, today_flag: bool, date_range_flag: bool, start_date: date, end_date: date,
+                             on_article=None):
+        """
+        Scrape all sources and articles on a thread pool.
+        Results are collected in the same order as the serial scraper so the output is identical.
+        """
+        sources = self.config.sections()
+        all_articles = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Find the links of every source at once
+            date_window = self._date_window(today_flag, date_range_flag, start_date, end_date)
+            links_by_source = dict(zip(sources, pool.map(lambda source: self.find_article_links(source, date_window), sources)))
+
+            for source in sources:
+                if not links_by_source[source] and not self._no_new_links(source):
+                    return False
+
+            # Queue every article of every source
+            futures = {}
+            for source in sources:
+                for link in links_by_source[source]:
+                    futures[(source, link)] = pool.submit(
+                        self.scrape_article, source, link, today_flag, date_range_flag, start_date, end_date
+                    )
+
+            try:
+                for source in sources:
+                    if not links_by_source[source]:
+                        continue
+                    self._print_source_header(source)
+                    print(f"\nFound {len(links_by_source[source])} articles.")
+                    all_articles.extend(self._collect_source_articles(
+                        source, links_by_source[source],
+                        lambda link: futures[(source, link)].result(),
+                        on_article
+                    ))
+
+                    # Articles after an out-of-date one are not needed, so do not start them
+                    for link in links_by_source[source]:
+                        futures[(source, link)].cancel()
+            except BaseException:
+                # e.g. on_article failed - do not start the articles still queued
+                for future in futures.values():
+                    future.cancel()
+                raise
+
+        return all_articles
+
+    @staticmethod
+    def _parse_dates(date_range_flag: bool, start_date: str, end_date: str) -> tuple:
+        """Return the start and end dates of a date range as dates (or as given without a date range)."""
+        if date_range_flag:
+            start_date = datetime.strptime(start_date, "%d-%m-%Y").date()
+            end_date = datetime.strptime(end_date, "%d-%m-%Y").date()
+        return start_date, end_date
+
+    @staticmethod
+    def _date_window(today_flag: bool, date_range_flag: bool, start_date: date, end_date: date) -> tuple:
+        """
+        The (start, end) dates of the articles wanted, or None for every date. Links with a listing date outside
+        them are skipped before their articles are downloaded.
+        """
+        if today_flag:
+            return date.today(), date.today()
+        if date_range_flag:
+            return start_date, end_date
+        return None
+
+    def _do_task(self, work_queue: WorkQueue, task):
+        """Find the links of a source or scrape an article for a queue task, and save the result to the queue."""
+        options = work_queue.run_options(task.run_id)
+        # The dates come with each task's run, as the threads of a worker can be on tasks of different runs
+        start_date, end_date = self._parse_dates(options['date_range_flag'], options['start_date'], options['end_date'])
+        source = task.group
+        if task.kind == "links":
+            date_window = self._date_window(options['today_flag'], options['date_range_flag'], start_date, end_date)
+            links = self.find_article_links(source, date_window)
+            article_tasks = [("article", source, position, {'url': link}) for position, link in enumerate(links)]
+            work_queue.complete(task, {'links': links, 'known_links': self.known_links.get(source, 0)}, article_tasks)
+            return
+
+        article = self.scrape_article(source, task.payload['url'], options['today_flag'], options['date_range_flag'],
+                                      start_date, end_date)
+        if work_queue.complete(task, article) and article is False:
+            # Articles after an out-of-date one are not needed, so do not start them
+            work_queue.cancel_group(task.run_id, "article", source, task.position)
+
+    def work_on_queue(self, work_queue: WorkQueue, stop: threading.Event = None, idle_exit: float = None,
+                      owner: str = None) -> int:
+        """
+        Work on the tasks of work_queue on max_workers threads, until stop is set or (with idle_exit) no task has
+        been found for idle_exit seconds. A task that raises is given back to the queue to be tried again.
+        Returns the number of tasks done.
+        """
+        stop = stop if stop is not None else threading.Event()
+        owner = owner or worker_name()
+        done = []
+
+        def work():
+            idle_since = time.monotonic()
+            while not stop.is_set():
+                task = work_queue.claim(owner)
+                if task is None:
+                    if idle_exit is not None and time.monotonic() - idle_since > idle_exit:
+                        return
+                    stop.wait(QUEUE_POLL_SECONDS)
+                    continue
+                try:
+                    self._do_task(work_queue, task)
+                    done.append(task.task_id)
+                except Exception as e:
+                    retry = work_queue.fail(task, repr(e))
+                    print(f"Task {task.kind} {task.group} {task.payload} failed{', will be retried' if retry else ''}: {e!r}")
+                idle_since = time.monotonic()
+
+        threads = [threading.Thread(target=work, name=f"queue-worker-{i}", daemon=True) for i in range(self.max_workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            # Renew the leases of the tasks in progress, so slow tasks are not given to another worker
+            renewed = time.monotonic()
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(QUEUE_POLL_SECONDS)
+                    if time.monotonic() - renewed > work_queue.lease_seconds / 3:
+                        work_queue.renew(owner)
+                        renewed = time.monotonic()
+        finally:
+            stop.set()
+            self.close_parse_pool()
+            if self.extractor_stats is not None:
+                self.extractor_stats.save()
+        return len(done)
+
+    def _queued_result(self, run_id: str, kind: str, source: str, position: int, helper: dict) -> tuple:
+        """Wait for a task of a run to finish. Returns its status and result."""
+        while True:
+            status, result = self.work_queue.result(run_id, kind, source, position)
+            if status not in (None, "pending", "leased"):
+                return status, result
+            if 'error' in helper:
+                raise helper['error'] # This process stopped working on the queue, so it could wait forever
+            time.sleep(QUEUE_POLL_SECONDS)
+
+    def _scrape_distributed(self, date_options: dict, on_article=None):
+        """
+        Put the sources and then their articles on the work queue, and collect the results in the same order as
+        the serial scraper. This scraper's threads work on the queue too, so the run also finishes without workers.
+        """
+        sources = self.config.sections()
+        all_articles = []
+        run_id = self.work_queue.start_run(date_options, [("links", source, 0, {}) for source in sources])
+        print(f"Work queue run {run_id}: {len(sources)} sources queued in {self.work_queue.path}")
+
+        stop = threading.Event()
+        helper = {}
+
+        def work():
+            try:
+                self.work_on_queue(self.work_queue, stop)
+            except BaseException as e:
+                helper['error'] = e
+
+        worker = threading.Thread(target=work, name="queue-coordinator", daemon=True)
+        worker.start()
+        try:
+            # Wait for the links of every source
+            links_by_source = {}
+            for source in sources:
+                status, result = self._queued_result(run_id, "links", source, 0, helper)
+                links_by_source[source] = result['links'] if status == DONE else []
+                self.known_links[source] = result['known_links'] if status == DONE else 0
+
+            for source in sources:
+                if not links_by_source[source] and not self._no_new_links(source):
+                    return False
+
+            for source in sources:
+                if not links_by_source[source]:
+                    continue
+                self._print_source_header(source)
+                print(f"\nFound {len(links_by_source[source])} articles.")
+                positions = {link: position for position, link in enumerate(links_by_source[source])}
+
+                def get_article(link):
+                    status, article = self._queued_result(run_id, "article", source, positions[link], helper)
+                    return article if status == DONE else None # A task that kept failing is a failed download
+
+                all_articles.extend(self._collect_source_articles(source, links_by_source[source], get_article,
+                                                                  on_article))
+                self.work_queue.cancel_group(run_id, "article", source)
+        finally:
+            # Cancels the tasks still queued if the run stopped early
+            self.work_queue.finish_run(run_id)
+            stop.set()
+            worker.join()
+            stats = self.work_queue.stats(run_id)
+            print(f"Work queue - tasks: {', '.join(f'{n} {status}' for status, n in sorted(stats['statuses'].items()))} "
+                  f"| retried: {stats['retried']} | done by: "
+                  f"{', '.join(f'{owner} ({n})' for owner, n in sorted(stats['workers'].items()))}")
+
+        return all_articles
+
+    def scrape_all_sites(self, output_name: str, today_flag: bool = False, date_range_flag: bool = False, start_date: str = None, end_date: str = None,
+                         on_article=None) -> list:
+        """
+        Scrape all websites defined in the config and save to JSON.
+        on_article(article) is called with each article as soon as it is scraped, in the order of the output
+        (e.g. to start summarising it before the other sites are done). If it raises, scraping stops.
+        """
+
+        if not self.valid_date_flags(today_flag, date_range_flag, start_date, end_date):
+            return False
+        date_options = {'today_flag': today_flag, 'date_range_flag': date_range_flag,
+                        'start_date': start_date, 'end_date': end_date}
+        start_date, end_date = self._parse_dates(date_range_flag, start_date, end_date)
+
+        self.reset_stats()
+        if self.extractor_stats is not None:
+            self.extractor_stats.start_run()
+        try:
+            if self.work_queue is not None:
+                all_articles = self._scrape_distributed(date_options, on_article)
+            elif self.max_workers > 1:
+                all_articles = self._scrape_concurrently(today_flag, date_range_flag, start_date, end_date, on_article)
+            else:
+                all_articles = self._scrape_serially(today_flag, date_range_flag, start_date, end_date, on_article)
+        finally:
+            self.close_parse_pool()
+            if self.extractor_stats is not None:
+                self.extractor_stats.save()
+
+        self.print_stats()
+        if self.extractor_stats is not None:
+            for row in self.extractor_stats.report(self.config.sections()):
+                if row['run_seconds_saved']:
+                    self.metrics.count("extraction_seconds_saved", row['run_seconds_saved'], source=row['source'])
+        if self.cache:
+            self.cache.evict()
+            print(f"HTTP cache: {self.cache.stats}")
+        if all_articles is False:
+            return False  # Signal failure, do not write JSON
+
         # # To append to json?
         # appended_list = all_articles
         # # Append data
@@ -316,9 +888,11 @@ class WebScraper:
         # except FileNotFoundError:
         #     print("File not found. Writing to file instead of appending.")
 
-        # Save to json file
-        with open(output_name + ".json", "w", encoding="utf-8") as f:
-            json.dump(all_articles, f, ensure_ascii=False, indent=4)
+        # Save to a JSONL store, and export it to the legacy json file
+        with self.metrics.timer("json_write_seconds", output="scraped"):
+            store = ArticleStore(output_name + ".jsonl")
+            store.write(all_articles)
+            store.export_json(output_name + ".json", indent=4)
 
         return all_articles
 
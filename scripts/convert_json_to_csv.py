@@ -1,73 +1,149 @@
+"""
+Export articles to CSV, streaming them one at a time.
+
+Articles are read once, one at a time (from a list, an ArticleStore or a JSON/JSONL file), and
+written in chunks, so the memory used does not grow with the size of the archive. The columns are
+the keys of the first article, with its summary_data expanded in place, plus any summary_data keys
+only later articles have. As those are only known once every article has been read, the rows are
+kept in a temporary file until then. In append mode the rows are added under the header already in the CSV.
+
+Usage:
+    python scripts/convert_json_to_csv.py <input.json | input.jsonl>
+"""
+
 import csv
-import sys
 import json
+import sys
+import tempfile
 
-def convert_json_to_csv(json_data, output_csv, append_flag):
-    """
-    Converts a list of JSON objects to a CSV file.
-    Keeps column order based on the first JSON object, including ordered nested fields.
-    """
-    if not json_data:
-        print("No data to write.")
-        return
+try:
+    from scripts.article_store import open_articles
+except ImportError: # Running from inside the scripts folder
+    from article_store import open_articles
 
-    max_cell_length = 32500  # Excel-safe limit
+MAX_CELL_LENGTH = 32500  # Excel-safe limit
+WRITE_CHUNK_SIZE = 500 # Rows written to the CSV at a time
 
-    # Extract initial key order from first JSON object
-    first_entry = json_data[0]
+def csv_fieldnames(first_entry: dict, summary_keys: dict) -> list:
+    """
+    The CSV columns: the keys of the first article in order, with summary_data replaced by the
+    summary_data keys of every article (summary_keys, in the order they were first seen).
+    """
     fieldnames = []
-
     for key in first_entry:
         if key == "summary_data":
-            # Add nested summary_data keys in their insertion order
-            summary_data = first_entry["summary_data"]
-            if isinstance(summary_data, dict):
-                fieldnames.extend(summary_data.keys())
+            fieldnames.extend(summary_keys)
         else:
             fieldnames.append(key)
+    if "summary_data" not in first_entry:
+        fieldnames.extend(summary_keys)
+    return list(dict.fromkeys(fieldnames))
 
-    if append_flag:
-        open_type = "a"
-    else:
-        open_type = "w"
-
+def existing_header(output_csv: str) -> list:
+    """The header of an existing CSV file, or None if the file is missing or empty."""
     try:
-        with open(output_csv, open_type, newline="", encoding="utf-8-sig") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for entry in json_data:
-                row = {}
-
-                for key in first_entry:
-                    if key == "cleaned_text":
-                        text = entry.get("cleaned_text", "")
-
-                        if (len(text) > max_cell_length):
-                            row["cleaned_text"] = text[:max_cell_length] + " [READ MORE FROM URL]"
-                        else:
-                            row["cleaned_text"] = text
-                    elif key == "summary_data":
-                        summary_data = entry.get("summary_data", {})
-                        if isinstance(summary_data, dict):
-                            for subkey in summary_data:
-                                row[subkey] = summary_data.get(subkey, "")
-                    else:
-                        row[key] = entry.get(key, "")
-
-                writer.writerow(row)
+        with open(output_csv, newline="", encoding="utf-8-sig") as csvfile:
+            return next(csv.reader(csvfile), None)
+    except FileNotFoundError:
+        return None
+
+def csv_row(entry: dict) -> dict:
+    """Flatten an article into a CSV row: summary_data is expanded and long text is cut to fit a cell."""
+    row = {}
+    for key, value in entry.items():
+        if key == "cleaned_text":
+            text = value or ""
+            if len(text) > MAX_CELL_LENGTH:
+                row["cleaned_text"] = text[:MAX_CELL_LENGTH] + " [READ MORE FROM URL]"
+            else:
+                row["cleaned_text"] = text
+        elif key == "summary_data":
+            if isinstance(value, dict):
+                row.update(value)
+        else:
+            row[key] = value
+    return row
+
+def convert_json_to_csv(json_data, output_csv, append_flag):
+    """
+    Converts a list (or any iterable, e.g. an ArticleStore) of JSON objects, or the path of a
+    JSON/JSONL file of them, to a CSV file.
+    Keeps column order based on the first JSON object, including ordered nested fields.
+    With append_flag the rows are added to the end of an existing CSV, under its header.
+    """
+    if not json_data: # e.g. False from a scrape that found nothing
+        print("No data to write.")
+        return
+    if isinstance(json_data, str):
+        json_data = open_articles(json_data) # Streamed one article at a time
 
+    header = existing_header(output_csv) if append_flag else None
+    try:
+        if header:
+            rows, fieldnames = (csv_row(entry) for entry in json_data), header
+        else:
+            rows, fieldnames = _spool_rows(json_data)
+            if not fieldnames:
+                print("No data to write.")
+                return
+
+        with open(output_csv, "a" if header else "w", newline="", encoding="utf-8-sig") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction="ignore")
+            if not header:
+                writer.writeheader()
+
+            # Columns the existing header does not have cannot be added without rewriting the file
+            left_out = {}
+            chunk = []
+            for row in rows:
+                if header:
+                    left_out.update(dict.fromkeys(key for key in row if key not in writer.fieldnames))
+                chunk.append(row)
+                if len(chunk) >= WRITE_CHUNK_SIZE:
+                    writer.writerows(chunk)
+                    chunk = []
+            writer.writerows(chunk)
+
+        if left_out:
+            print(f"Columns not in the header of {output_csv} were left out: {', '.join(left_out)}")
         print(f"Saved to {output_csv}")
     except Exception as e:
         print(e)
 
+def _spool_rows(articles) -> tuple:
+    """
+    Read the articles once, keeping their rows in a temporary file while the columns are collected.
+    Returns (an iterator over the rows, the columns), or (None, []) if there are no articles.
+    """
+    first_entry = None
+    summary_keys = {}
+    spool = tempfile.TemporaryFile("w+", encoding="utf-8")
+    for entry in articles:
+        if first_entry is None:
+            first_entry = entry
+        summary_data = entry.get("summary_data")
+        if isinstance(summary_data, dict):
+            summary_keys.update(dict.fromkeys(summary_data))
+        spool.write(json.dumps(csv_row(entry), ensure_ascii=False, default=str) + "\n")
+    if first_entry is None:
+        spool.close()
+        return None, []
+
+    def rows():
+        with spool:
+            spool.seek(0)
+            for line in spool:
+                yield json.loads(line)
+
+    return rows(), csv_fieldnames(first_entry, summary_keys)
+
 def open_csv(input_csv):
     """ Reads a csv file and prints it out """
     with open(input_csv, newline="", encoding="utf-8") as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
             print(row)  # Each row is an OrderedDict (like a dict)
-    
+
 def main():
     # open_csv("Telecoms_Grouped.csv")
 
@@ -76,10 +152,12 @@ def main():
         sys.exit(1)
 
     input_json = sys.argv[1] # Assumes correct file name
-    with open(input_json, "r", encoding="utf-8") as f:
-        data = json.load(f)  # e.g. a list of JSON objects
+    if input_json.endswith(".jsonl"):
+        output_csv = input_json[:-6] + ".csv"
+    else:
+        output_csv = input_json[:-5] + ".csv"
 
-    convert_json_to_csv(data, input_json[:-5] + ".csv", False)
+    convert_json_to_csv(input_json, output_csv, False) # Streamed one article at a time
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,136 @@
+"""
+Fast, memoised normalisation of the dates found on news sites.
+
+Parsing every date with dateutil's fuzzy parser is slow, and each site only ever uses one or two
+date formats. DateNormaliser tries, in order:
+1. a memo (LRU) of the raw strings already normalised,
+2. the site's own strptime formats: any set with date_format in the collect config, then formats
+   learned from earlier dates of the same site,
+3. dateutil's fuzzy parser, as WebScraper.standardise_date always did.
+
+A format is only learned if it cannot be read two ways (the month is written as a word, or the
+date is ISO, year first) and it gives the same date as the fuzzy parser, so the fast path never
+changes a result. Numeric day/month formats are only used if they are set in the config.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+
+from dateutil import parser
+
+OUTPUT_FORMAT = "%d-%m-%Y"
+DEFAULT_MEMO_SIZE = 4096
+
+# Unambiguous formats that can be learned from a site's dates, after ordinals ("24th") are removed
+LEARNABLE_FORMATS = (
+    "%d %B %Y", "%d %b %Y", "%B %d, %Y", "%b %d, %Y", "%B %d %Y", "%b %d %Y",
+    "%A %d %B %Y", "%A, %d %B %Y", "%a %d %b %Y", "%a, %d %b %Y", "%A, %B %d, %Y",
+    "%d %B %Y %H:%M", "%d %b %Y %H:%M", "%B %d, %Y %H:%M", "%d %B, %Y", "%d/%b/%Y",
+    "%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M%z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y/%m/%d",
+)
+MAX_LEARNED_FORMATS = 4 # Per source
+
+_ORDINALS = re.compile(r'(\d{1,2})(st|nd|rd|th)')
+_TRAILING_TEXT = re.compile(r'[-–](?!\d)')
+# A month name, or a numeric date with its day, month and year (e.g. 2025-07-02 or 02/07/25)
+_EXPLICIT_DATE = re.compile(
+    r'\b(january|february|march|april|may|june|july|august|september|october|november|december'
+    r'|jan|feb|mar|apr|jun|jul|aug|sept|sep|oct|nov|dec)\b'
+    r'|(?<!\d)\d{4}[-/.]\d{1,2}[-/.]\d{1,2}(?!\d)|(?<!\d)\d{1,2}[-/.]\d{1,2}[-/.]\d{2,4}(?!\d)',
+    re.IGNORECASE
+)
+
+def clean_date_text(text: str) -> str:
+    """Remove ordinals ("24th" -> "24") and anything after a dash that does not start a number."""
+    cleaned = _ORDINALS.sub(r'\1', text)
+    return _TRAILING_TEXT.split(cleaned)[0].strip()
+
+def has_explicit_date(text: str) -> bool:
+    """
+    Check if text writes out a date, rather than e.g. "3 days ago", which the fuzzy parser would read as
+    the 3rd of this month.
+    """
+    return bool(_EXPLICIT_DATE.search(text))
+
+class DateNormaliser:
+    """Turns the date strings of each source into date objects."""
+
+    def __init__(self, formats: dict = None, memo_size: int = DEFAULT_MEMO_SIZE):
+        """formats maps a source to the strptime formats set for it in the config, which are tried first."""
+        self.configured = {source: list(source_formats) for source, source_formats in (formats or {}).items()}
+        self.learned = {}
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memo_hits': 0, 'fast_path': 0, 'fuzzy': 0, 'failed': 0, 'formats_learned': 0}
+
+    def normalise(self, text: str, source: str = None) -> date:
+        """Return the date in text. Raises ValueError (or TypeError for a non-string) if it cannot be read."""
+        key = (source, text)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.stats['memo_hits'] += 1
+                result = self._memo[key]
+                if isinstance(result, Exception):
+                    raise result.with_traceback(None)
+                return result
+
+        cleaned = clean_date_text(text)
+        try:
+            result = self._parse(cleaned, source)
+        except (ValueError, OverflowError) as e:
+            result = e
+            with self._lock:
+                self.stats['failed'] += 1
+
+        with self._lock:
+            self._memo[key] = result
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _parse(self, cleaned: str, source: str) -> date:
+        for date_format in self.configured.get(source, []) + self.learned.get(source, []):
+            try:
+                parsed = _strptime(cleaned, date_format)
+            except ValueError:
+                continue
+            with self._lock:
+                self.stats['fast_path'] += 1
+            return parsed
+
+        parsed = parser.parse(cleaned, fuzzy=True).date()
+        with self._lock:
+            self.stats['fuzzy'] += 1
+        self._learn(cleaned, parsed, source)
+        return parsed
+
+    def _learn(self, cleaned: str, parsed: date, source: str):
+        """Remember the first unambiguous format that reads cleaned as the same date as the fuzzy parser."""
+        with self._lock:
+            known = self.learned.setdefault(source, [])
+            if len(known) >= MAX_LEARNED_FORMATS:
+                return
+            for date_format in LEARNABLE_FORMATS:
+                if date_format in known:
+                    continue
+                try:
+                    if _strptime(cleaned, date_format) == parsed:
+                        known.append(date_format)
+                        self.stats['formats_learned'] += 1
+                        return
+                except ValueError:
+                    continue
+
+    def format(self, text: str, source: str = None) -> str:
+        """Return the date in text in the output format (dd-mm-yyyy)."""
+        return self.normalise(text, source).strftime(OUTPUT_FORMAT)
+
+def _strptime(text: str, date_format: str) -> date:
+    return datetime.strptime(text, date_format).date()
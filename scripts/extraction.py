@@ -0,0 +1,375 @@
+"""
+Selector-driven extraction of article links and article fields from HTML.
+
+The scraper only ever reads a handful of CSS selectors from each page, so instead of building
+a full BeautifulSoup tree, pages are parsed with lxml (the same libxml2 parser BeautifulSoup
+uses with 'lxml', so the document tree is identical) and the selectors are compiled once to
+XPath and run directly on that tree. Text is gathered with the same rules as
+BeautifulSoup's get_text, so the extracted values match the BeautifulSoup ones exactly.
+Selectors that cannot be compiled to XPath fall back to BeautifulSoup.
+
+The functions only take and return plain values, so they can run in a process pool
+(see WebScraper's parse_workers) to parse several pages at once without the GIL.
+"""
+
+import time
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from cssselect import HTMLTranslator, SelectorError
+from lxml import etree, html as lxml_html
+from newspaper import Article
+
+# BeautifulSoup leaves the text inside these tags out of get_text()
+_HIDDEN_TEXT_TAGS = frozenset(("script", "style", "template", "rt", "rp"))
+_translator = HTMLTranslator()
+_UTF8_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+LISTING_DATE_LEVELS = 5 # How far up from a link to look for its listing date
+
+# The extractors extract_article can take an article's fields from first
+NEWSPAPER = "newspaper"
+SELECTORS = "selectors"
+FIELDS = ('date', 'title', 'text')
+
+@lru_cache(maxsize=256)
+def _compile(selector: str):
+    """Compile a CSS selector to XPath, or return None if it needs BeautifulSoup's selector engine."""
+    try:
+        return etree.XPath(_translator.css_to_xpath(selector))
+    except (SelectorError, etree.XPathError):
+        return None
+
+class Page:
+    """A parsed HTML page, queried with CSS selectors."""
+
+    def __init__(self, html: str):
+        self.html = html
+        self._soup = None
+        try:
+            self.tree = lxml_html.document_fromstring(html)
+        except ValueError:
+            # lxml only takes a page with an XML encoding declaration (<?xml ... encoding=...?>) as bytes
+            try:
+                self.tree = lxml_html.document_fromstring(html.encode('utf-8'), parser=_UTF8_PARSER)
+            except (etree.ParserError, ValueError):
+                self.tree = None
+        except etree.ParserError:
+            self.tree = None # e.g. an empty page
+
+    def soup(self) -> BeautifulSoup:
+        """The BeautifulSoup tree of the page, only built for selectors lxml cannot run."""
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.html, 'lxml')
+        return self._soup
+
+    def select(self, selector: str) -> list:
+        """All elements matching a CSS selector, in document order."""
+        xpath = _compile(selector)
+        if xpath is None or self.tree is None:
+            # BeautifulSoup also reads the pages lxml cannot, so they give the same results as before
+            return [SoupElement(tag) for tag in self.soup().select(selector)]
+        return [LxmlElement(element) for element in xpath(self.tree)]
+
+    def select_one(self, selector: str):
+        """The first element matching a CSS selector, or None."""
+        matches = self.select(selector)
+        return matches[0] if matches else None
+
+    def find_link_with_text(self, text: str):
+        """The first <a> whose only string contains text, like soup.find('a', string=...)."""
+        if self.tree is None:
+            tag = self.soup().find('a', string=lambda t: t and text in t)
+            return SoupElement(tag) if tag else None
+        for element in self.tree.iter("a"):
+            string = _single_string(element)
+            if string and text in string:
+                return LxmlElement(element)
+        return None
+
+class LxmlElement:
+    def __init__(self, element):
+        self.element = element
+
+    def ancestors(self, levels: int) -> list:
+        return [LxmlElement(a) for a in self.element.iterancestors()][:levels]
+
+    def select_one(self, selector: str):
+        """The first element in this element's subtree matching a CSS selector (that lxml can run), or None."""
+        xpath = _compile(selector)
+        if xpath is None or self.element is None:
+            return None
+        matches = xpath(self.element)
+        return LxmlElement(matches[0]) if matches else None
+
+    def key(self):
+        return self.element
+
+    def get(self, attribute: str):
+        return self.element.get(attribute)
+
+    def has_attr(self, attribute: str) -> bool:
+        return attribute in self.element.attrib
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        strings = _strings(self.element)
+        if strip:
+            strings = (s.strip() for s in strings)
+            strings = (s for s in strings if s)
+        return separator.join(strings)
+
+class SoupElement:
+    """A BeautifulSoup tag with the same interface as LxmlElement."""
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    def ancestors(self, levels: int) -> list:
+        return [SoupElement(a) for a in self.tag.parents if a.name != '[document]'][:levels]
+
+    def select_one(self, selector: str):
+        match = self.tag.select_one(selector)
+        return SoupElement(match) if match else None
+
+    def key(self):
+        return id(self.tag)
+
+    def get(self, attribute: str):
+        return self.tag.get(attribute)
+
+    def has_attr(self, attribute: str) -> bool:
+        return self.tag.has_attr(attribute)
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        return self.tag.get_text(separator=separator, strip=strip)
+
+def _is_element(node) -> bool:
+    return isinstance(node.tag, str) # Comments and processing instructions have a function as their tag
+
+def _strings(root):
+    """Yield the text of an element in document order, leaving out the same strings as BeautifulSoup's get_text."""
+    # Text inside a script, style, template, rt or rp tag only counts when get_text is called on that tag
+    hidden_by = next((a for a in root.iterancestors() if a.tag in _HIDDEN_TEXT_TAGS), None)
+    wanted = root if root.tag in _HIDDEN_TEXT_TAGS else None
+    container = root if root.tag in _HIDDEN_TEXT_TAGS else hidden_by
+
+    if root.text and container is wanted:
+        yield root.text
+    # Walk the tree with a stack of (element, its remaining children, the tag hiding its text)
+    stack = [(root, iter(root), container)]
+    while stack:
+        element, children, container = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if stack and element.tail and stack[-1][2] is wanted:
+                yield element.tail
+        elif _is_element(child):
+            child_container = child if child.tag in _HIDDEN_TEXT_TAGS else container
+            if child.text and child_container is wanted:
+                yield child.text
+            stack.append((child, iter(child), child_container))
+        elif child.tail and container is wanted:
+            yield child.tail # The text after a comment
+
+def _single_string(element):
+    """The element's only string, like BeautifulSoup's Tag.string, or None."""
+    contents = [element.text] if element.text else []
+    for child in element:
+        contents.append(child)
+        if child.tail:
+            contents.append(child.tail)
+    if len(contents) != 1:
+        return None
+    child = contents[0]
+    if isinstance(child, str):
+        return child
+    if not _is_element(child):
+        return child.text # A comment is a string to BeautifulSoup
+    return _single_string(child)
+
+def _listing_dates(link_elements: list, urls: list, date_selector: str, date_attribute: str = None) -> list:
+    """
+    Find the listing date of each link: the first date_selector match in the nearest ancestor of the link
+    that holds a date, climbing at most LISTING_DATE_LEVELS levels. Ancestors that also hold links to other
+    articles are not used, so an undated link does not take the date of the article next to it.
+    """
+    # The article URLs found under each ancestor
+    urls_under = {}
+    for element, url in zip(link_elements, urls):
+        for ancestor in element.ancestors(LISTING_DATE_LEVELS):
+            urls_under.setdefault(ancestor.key(), set()).add(url)
+
+    dates = []
+    for element, url in zip(link_elements, urls):
+        found = None
+        for ancestor in element.ancestors(LISTING_DATE_LEVELS):
+            if len(urls_under[ancestor.key()]) > 1:
+                break
+            date_element = ancestor.select_one(date_selector)
+            if date_element is not None:
+                found = date_element.get(date_attribute) if date_attribute else date_element.get_text(strip=True)
+                break
+        dates.append(found or None)
+    return dates
+
+def select_links(html: str, page_url: str, link_selector: str, next_page_selector: str = None,
+                 link_text_contains: str = None, listing_date_selector: str = None,
+                 listing_date_attribute: str = None) -> dict:
+    """
+    Return the absolute URLs of the article links on a listing page (in page order, with duplicates),
+    and the next page URL found with next_page_selector and with link_text_contains.
+    With listing_date_selector, dates holds the date text shown next to each link on the page (or None).
+    """
+    page = Page(html)
+    if listing_date_selector and _compile(listing_date_selector) is None:
+        # Only BeautifulSoup can run the date selector, so find the links in the BeautifulSoup tree too
+        link_matches = [SoupElement(tag) for tag in page.soup().select(link_selector)]
+    else:
+        link_matches = page.select(link_selector)
+
+    links = []
+    link_elements = []
+    for a in link_matches:
+        href = a.get('href')
+        if href:
+            links.append(urljoin(page_url, href))
+            link_elements.append(a)
+
+    dates = None
+    if listing_date_selector:
+        dates = _listing_dates(link_elements, links, listing_date_selector, listing_date_attribute)
+
+    next_by_selector = next_by_text = None
+    if next_page_selector:
+        next_link = page.select_one(next_page_selector)
+        if next_link and next_link.has_attr('href'):
+            next_by_selector = urljoin(page_url, next_link.get('href'))
+    if link_text_contains:
+        next_link = page.find_link_with_text(link_text_contains)
+        if next_link and next_link.has_attr('href'):
+            next_by_text = urljoin(page_url, next_link.get('href'))
+
+    return {'links': links, 'dates': dates, 'next_by_selector': next_by_selector, 'next_by_text': next_by_text}
+
+def _selector_date(page: Page, date_selector: str, date_attribute: str) -> tuple:
+    """The date text found with date_selector (or None), and True if the date_attribute element is not on the page."""
+    date_element = page.select_one(date_selector)
+    if date_attribute:
+        if date_element is None:
+            return None, True
+        return date_element.get(date_attribute), False
+    return (date_element.get_text(strip=True) if date_element else None), False
+
+def _selector_title(page: Page, title_selector: str):
+    title_element = page.select_one(title_selector)
+    return title_element.get_text(strip=True) if title_element else None
+
+def _selector_text(page: Page, content_selector: str):
+    content_elements = page.select(content_selector)
+    if not content_elements:
+        return None
+    # Join the text from all found elements
+    text_parts = [element.get_text(separator=' ', strip=True) for element in content_elements]
+    return ' '.join(' '.join(text_parts).split())
+
+def extract_article(url: str, html: str, date_selector: str, date_attribute: str, title_selector: str,
+                    content_selector: str, strategy: str = NEWSPAPER, probe: bool = False) -> dict:
+    """
+    Extract the publish date, title and text of an article.
+
+    strategy (see scripts/extractor_stats.py):
+    - NEWSPAPER - newspaper3k, using the CSS selectors for any field it cannot find. The page is only
+      parsed for the selectors when needed.
+    - SELECTORS - only the CSS selectors. If they miss a field, newspaper3k is run after all and the
+      fields are taken as with NEWSPAPER.
+    probe runs both extractors on every field, to compare them. The fields are still taken as the strategy says.
+
+    date is newspaper3k's publish date (a datetime) if it found one. Otherwise date_text is the text to
+    standardise, or date_missing is True if the date_attribute element is not on the page.
+    found holds which fields (date, title, text) each extractor found, for the extractors and fields it ran.
+    selected and newspaper_values hold the values each extractor gave, for the fields it ran (date as its text
+    for the selectors, as a datetime for newspaper3k), or None. timings holds the seconds spent in each extractor.
+    """
+    result = {'date': None, 'date_text': None, 'date_missing': False, 'title': None, 'text': None,
+              'newspaper_error': None, 'newspaper_parsed': False, 'page_parsed': False,
+              'found': {'newspaper': None, 'selectors': {}}, 'selected': {}, 'newspaper_values': None,
+              'timings': {'newspaper': 0.0, 'selectors': 0.0}}
+    found = result['found']['selectors']
+    selected = {}
+
+    page = None
+    def get_page():
+        nonlocal page
+        if page is None:
+            page = Page(html)
+            result['page_parsed'] = True
+        return page
+
+    def select(field):
+        """Run the selector of a field once, timing it with the other selectors."""
+        if field not in selected:
+            start = time.perf_counter()
+            if field == 'date':
+                selected['date'] = _selector_date(get_page(), date_selector, date_attribute)
+                found['date'] = bool(selected['date'][0])
+            elif field == 'title':
+                selected['title'] = _selector_title(get_page(), title_selector)
+                found['title'] = bool(selected['title'])
+            else:
+                selected['text'] = _selector_text(get_page(), content_selector)
+                found['text'] = bool(selected['text'])
+            result['timings']['selectors'] += time.perf_counter() - start
+            result['selected'][field] = selected[field][0] if field == 'date' else selected[field]
+        return selected[field]
+
+    def use_selectors():
+        result['date_text'] = selected['date'][0]
+        result['title'] = selected['title']
+        result['text'] = selected['text']
+        return result
+
+    if strategy == SELECTORS or probe:
+        for field in FIELDS:
+            select(field)
+    if strategy == SELECTORS and not probe and all(found.values()):
+        return use_selectors()
+
+    start = time.perf_counter()
+    article = Article(url)
+    try:
+        article.download(input_html=html)
+        article.parse()
+        result['newspaper_parsed'] = True
+    except Exception as e:
+        result['newspaper_error'] = str(e)
+    result['timings']['newspaper'] = time.perf_counter() - start
+    result['found']['newspaper'] = {'date': bool(article.publish_date), 'title': bool(article.title),
+                                    'text': bool(article.text)}
+    result['newspaper_values'] = {'date': article.publish_date or None, 'title': article.title or None,
+                                  'text': article.text or None}
+    if strategy == SELECTORS and all(found.values()):
+        return use_selectors() # A probe of a source extracted with the selectors gives the same fields as the others
+
+    if article.publish_date:
+        result['date'] = article.publish_date
+    else:
+        date_text, result['date_missing'] = select('date')
+        if date_attribute:
+            result['date_text'] = date_text
+        else:
+            result['date_text'] = date_text if date_text is not None else "Date not found"
+
+    if article.title:
+        result['title'] = article.title
+    else:
+        title = select('title')
+        result['title'] = title if title is not None else "Title not found"
+
+    if article.text:
+        result['text'] = article.text
+    else:
+        text = select('text')
+        result['text'] = text if text is not None else "Content not found"
+
+    return result
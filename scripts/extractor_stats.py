@@ -0,0 +1,221 @@
+"""
+Per-source statistics of which extractor finds each article field, used to choose how articles are extracted.
+
+Every article is extracted with newspaper3k first and the CSS selectors of the collect config for the fields
+it misses. For some sites newspaper3k never finds a field (e.g. the date), so its parse - by far the slowest
+part of extracting an article - is paid for on every article only for the selectors to fill the field in.
+
+For each source and each field (date, title, text), the share of articles in which newspaper3k and the
+selectors found it, and in which both give the same value, is kept, weighted towards recent articles, in a
+SQLite database so it carries over between runs. The first articles of a source are probes, extracted with
+both. Once a source has had enough probes, it is extracted with the selectors alone (newspaper3k is still run
+for an article whose selectors miss a field) if the selectors find every field and every field comes out the
+same as with newspaper3k first, apart from whitespace (the selectors' text has no paragraph breaks) - in
+practice, where newspaper3k misses the date and finds the same title and text as the selectors. Otherwise
+newspaper3k stays first, so the words saved never change.
+
+Sources with selector_text = true in the collect config opt in to the selectors' title and text even where
+newspaper3k finds different text (e.g. it leaves out a caption the selectors keep): they are extracted with
+the selectors alone whenever the selectors find every field and newspaper3k keeps missing one.
+
+Every reprobe_every articles one is probed again, so a change to the site changes the choice.
+"""
+
+import sqlite3
+import threading
+
+try:
+    from scripts.extraction import NEWSPAPER, SELECTORS, FIELDS
+except ImportError: # Running from inside the scripts folder
+    from extraction import NEWSPAPER, SELECTORS, FIELDS
+
+EXTRACTORS = (NEWSPAPER, SELECTORS)
+AGREEMENT = "agreement" # Stored as an extractor: the articles in which both extractors give a field the same value
+DECAY = 0.9 # Weight of the earlier articles each time an article is recorded, so the rates follow changes
+MIN_PROBES = 5 # Articles extracted with both extractors before one is chosen
+WORKS_RATE = 0.9 # Share of articles an extractor must find a field in to count as working for it
+AGREES_RATE = 0.999 # Share of probes the extractors must agree on a field in, so one difference keeps newspaper3k first
+REPROBE_EVERY = 25 # Articles between probes once an extractor has been chosen
+
+class SourceStats:
+    """The field rates of one source's extractors, its chosen strategy and the time saved with it."""
+
+    def __init__(self):
+        self.found = {(extractor, field): 0.0 for extractor in EXTRACTORS + (AGREEMENT,) for field in FIELDS} # Weighted finds
+        self.seen = {(extractor, field): 0.0 for extractor in EXTRACTORS + (AGREEMENT,) for field in FIELDS} # Weighted articles
+        self.probes = 0
+        self.strategy = NEWSPAPER
+        self.since_probe = 0
+        self.newspaper_seconds = None # Weighted mean time of a newspaper3k parse
+        self.newspaper_skipped = 0
+        self.seconds_saved = 0.0
+        self.run_skipped = 0 # This run's share of newspaper_skipped and seconds_saved
+        self.run_saved = 0.0
+
+    def rate(self, extractor: str, field: str) -> float:
+        seen = self.seen[(extractor, field)]
+        return self.found[(extractor, field)] / seen if seen else 0.0
+
+    def works(self, extractor: str) -> bool:
+        """Check if an extractor finds every field in enough of the source's articles."""
+        return all(self.rate(extractor, field) >= WORKS_RATE for field in FIELDS)
+
+    def agrees(self) -> bool:
+        """Check if the selectors have given every field the same value as newspaper3k first in the probes."""
+        return all(self.seen[(AGREEMENT, field)] and self.rate(AGREEMENT, field) >= AGREES_RATE for field in FIELDS)
+
+    def choose(self, selector_text: bool) -> str:
+        if not self.works(SELECTORS):
+            return NEWSPAPER
+        if selector_text:
+            return NEWSPAPER if self.works(NEWSPAPER) else SELECTORS
+        return SELECTORS if self.agrees() else NEWSPAPER
+
+class ExtractorStats:
+    """The SourceStats of every source, saved to a SQLite database."""
+
+    def __init__(self, path: str, min_probes: int = MIN_PROBES, reprobe_every: int = REPROBE_EVERY):
+        """Open (or create) the statistics database at path and load it."""
+        self.path = path
+        self.min_probes = min_probes
+        self.reprobe_every = reprobe_every
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS field_stats (
+                source TEXT NOT NULL,
+                extractor TEXT NOT NULL,
+                field TEXT NOT NULL,
+                found REAL NOT NULL,
+                seen REAL NOT NULL,
+                PRIMARY KEY (source, extractor, field)
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sources (
+                source TEXT PRIMARY KEY,
+                strategy TEXT NOT NULL,
+                probes INTEGER NOT NULL,
+                since_probe INTEGER NOT NULL,
+                newspaper_seconds REAL,
+                newspaper_skipped INTEGER NOT NULL,
+                seconds_saved REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        self._sources = {}
+        for row in self._conn.execute("SELECT source, strategy, probes, since_probe, newspaper_seconds, "
+                                      "newspaper_skipped, seconds_saved FROM sources"):
+            stats = self._source(row[0])
+            (stats.strategy, stats.probes, stats.since_probe, stats.newspaper_seconds, stats.newspaper_skipped,
+             stats.seconds_saved) = row[1:]
+        for source, extractor, field, found, seen in self._conn.execute(
+                "SELECT source, extractor, field, found, seen FROM field_stats"):
+            if extractor in EXTRACTORS + (AGREEMENT,) and field in FIELDS:
+                stats = self._source(source)
+                stats.found[(extractor, field)] = found
+                stats.seen[(extractor, field)] = seen
+
+    def _source(self, source: str) -> SourceStats:
+        stats = self._sources.get(source)
+        if stats is None:
+            stats = self._sources[source] = SourceStats()
+        return stats
+
+    def start_run(self):
+        """Start counting the articles and time saved in a new run."""
+        with self._lock:
+            for stats in self._sources.values():
+                stats.run_skipped = 0
+                stats.run_saved = 0.0
+
+    def strategy(self, source: str) -> tuple:
+        """The strategy to extract the next article of source with, and whether to probe it (see extract_article)."""
+        with self._lock:
+            stats = self._source(source)
+            if stats.probes < self.min_probes or stats.since_probe >= self.reprobe_every:
+                stats.since_probe = 0
+                return stats.strategy, True
+            stats.since_probe += 1
+            return stats.strategy, False
+
+    def record(self, source: str, found: dict, agrees: dict, timings: dict, selector_text: bool = False) -> str:
+        """
+        Record which fields each extractor found in an article (the found and timings of extract_article), and
+        which fields came out the same with either extractor first, for the fields both ran on.
+        selector_text - the source opted in to the selectors' title and text (see the module docstring).
+        Returns the source's new strategy if this changed it, otherwise None.
+        """
+        with self._lock:
+            stats = self._source(source)
+            for extractor, fields in ((NEWSPAPER, found[NEWSPAPER]), (SELECTORS, found[SELECTORS]), (AGREEMENT, agrees)):
+                for field, was_found in (fields or {}).items():
+                    key = (extractor, field)
+                    stats.found[key] = stats.found[key] * DECAY + was_found
+                    stats.seen[key] = stats.seen[key] * DECAY + 1
+
+            if found[NEWSPAPER] is None:
+                # Extracted with the selectors alone - count the newspaper3k parse it would have had
+                stats.newspaper_skipped += 1
+                stats.run_skipped += 1
+                saved = max(0.0, (stats.newspaper_seconds or 0.0) - timings['selectors'])
+                stats.seconds_saved += saved
+                stats.run_saved += saved
+            elif stats.newspaper_seconds is None:
+                stats.newspaper_seconds = timings['newspaper']
+            else:
+                stats.newspaper_seconds = stats.newspaper_seconds * DECAY + timings['newspaper'] * (1 - DECAY)
+
+            if found[NEWSPAPER] is not None and len(found[SELECTORS]) == len(FIELDS):
+                stats.probes += 1 # Both extractors ran on every field
+            if stats.probes < self.min_probes:
+                return None
+            chosen = stats.choose(selector_text)
+            if chosen == stats.strategy:
+                return None
+            stats.strategy = chosen
+            return chosen
+
+    def report(self, sources: list = None) -> list:
+        """The strategy, field rates and time saved of each source (all of them by default)."""
+        with self._lock:
+            rows = []
+            for source in sources if sources is not None else sorted(self._sources):
+                stats = self._sources.get(source)
+                if stats is None:
+                    continue
+                rows.append({
+                    'source': source,
+                    'strategy': stats.strategy,
+                    'probes': stats.probes,
+                    'rates': {extractor: {field: round(stats.rate(extractor, field), 3) for field in FIELDS}
+                              for extractor in EXTRACTORS},
+                    'agreement': {field: round(stats.rate(AGREEMENT, field), 3) for field in FIELDS},
+                    'newspaper_skipped': stats.newspaper_skipped,
+                    'seconds_saved': stats.seconds_saved,
+                    'run_newspaper_skipped': stats.run_skipped,
+                    'run_seconds_saved': stats.run_saved,
+                })
+            return rows
+
+    def save(self):
+        """Write the statistics to the database."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sources (source, strategy, probes, since_probe, newspaper_seconds, "
+                "newspaper_skipped, seconds_saved) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(source, s.strategy, s.probes, s.since_probe, s.newspaper_seconds, s.newspaper_skipped, s.seconds_saved)
+                 for source, s in self._sources.items()]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO field_stats (source, extractor, field, found, seen) VALUES (?, ?, ?, ?, ?)",
+                [(source, extractor, field, s.found[(extractor, field)], s.seen[(extractor, field)])
+                 for source, s in self._sources.items() for extractor, field in s.found]
+            )
+            self._conn.commit()
+
+    def close(self):
+        """Close the statistics database."""
+        with self._lock:
+            self._conn.close()
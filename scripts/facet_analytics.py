@@ -0,0 +1,253 @@
+"""
+Facet analytics over the summary_data fields of the analysed articles.
+
+The pipe-separated fields (tags, geography, companies, ...) are split once, when the table is
+built, into NumPy arrays: every distinct value gets an integer code, and each field is stored
+as two parallel arrays of (article row, value code) pairs. Article sources and dates are stored
+as one array each. Counts, co-occurrence matrices and time-bucketed counts are then worked out
+with vectorised NumPy operations instead of re-splitting the strings of every article.
+
+Usage:
+    python -m scripts.facet_analytics counts tags [--top 20] [--source "ISPreview"]
+    python -m scripts.facet_analytics cooccurrence companies_mentioned [--other tags] [--top 10]
+    python -m scripts.facet_analytics timeseries companies_mentioned Openreach [--bucket week] [--by source]
+    python -m scripts.facet_analytics export <aggregates.json>
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+try:
+    from scripts.article_query import output_path, parse_date
+    from scripts.search_index import load_articles
+except ImportError: # Running from inside the scripts folder
+    from article_query import output_path, parse_date
+    from search_index import load_articles
+
+FIELDS = ("category", "product", "technology", "tags", "geography", "companies_mentioned", "parent_companies_mentioned")
+BUCKETS = ("day", "week", "month")
+DEFAULT_INPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "all_articles_output")
+_MONDAY = np.datetime64("1970-01-05") # Weeks start on a Monday
+
+class Facet:
+    """One dictionary-encoded field: the distinct values and the (article row, value code) pairs."""
+
+    def __init__(self, values: list, rows: np.ndarray, codes: np.ndarray):
+        self.values = values
+        self.rows = rows
+        self.codes = codes
+
+    def matching_codes(self, text: str) -> np.ndarray:
+        """The codes of the values containing text (case-insensitive)."""
+        text = text.lower()
+        return np.array([code for code, value in enumerate(self.values) if text in value.lower()], dtype=np.int32)
+
+class FacetTable:
+    """Columnar arrays over the analysed articles, built once and queried many times."""
+
+    def __init__(self, articles):
+        sources = {}
+        source_codes = []
+        dates = []
+        pairs = {field: ([], []) for field in FIELDS}
+        lookups = {field: {} for field in FIELDS}
+        values = {field: [] for field in FIELDS}
+
+        row = 0
+        for article in articles:
+            summary_data = article.get("summary_data")
+            if not isinstance(summary_data, dict):
+                continue
+
+            source = article.get("source") or "Unknown"
+            source_codes.append(sources.setdefault(source, len(sources)))
+            article_date = parse_date(article.get("date"))
+            dates.append(np.datetime64(article_date, "D") if article_date else np.datetime64("NaT"))
+
+            for field in FIELDS:
+                lookup = lookups[field]
+                seen = set()
+                for value in str(summary_data.get(field) or "").split("|"):
+                    value = value.strip()
+                    key = value.lower()
+                    if not value or key in ("n/a", "none") or key in seen:
+                        continue
+                    seen.add(key) # Count each value once per article
+                    if key not in lookup:
+                        lookup[key] = len(values[field])
+                        values[field].append(value) # The first spelling seen is shown
+                    pairs[field][0].append(row)
+                    pairs[field][1].append(lookup[key])
+            row += 1
+
+        self.size = row
+        self.sources = list(sources)
+        self.source_codes = np.array(source_codes, dtype=np.int32)
+        self.dates = np.array(dates, dtype="datetime64[D]")
+        self.facets = {
+            field: Facet(values[field], np.array(rows, dtype=np.int32), np.array(codes, dtype=np.int32))
+            for field, (rows, codes) in pairs.items()
+        }
+
+    @classmethod
+    def from_path(cls, path: str):
+        """Build the table from a JSONL store or a JSON array file."""
+        return cls(load_articles(path))
+
+    def facet(self, field: str) -> Facet:
+        if field not in self.facets:
+            raise ValueError(f"Unknown field '{field}' - choose from {', '.join(FIELDS)}")
+        return self.facets[field]
+
+    def article_mask(self, source: str = None, date_from: str = None, date_to: str = None) -> np.ndarray:
+        """A boolean array of the articles from a source (substring) and a date range (dd-mm-yyyy)."""
+        mask = np.ones(self.size, dtype=bool)
+        if source:
+            codes = [code for code, name in enumerate(self.sources) if source.lower() in name.lower()]
+            mask &= np.isin(self.source_codes, codes)
+        for text, compare in ((date_from, np.greater_equal), (date_to, np.less_equal)):
+            if text:
+                bound = parse_date(text)
+                if bound is None:
+                    raise ValueError("date_from and date_to must be in the format dd-mm-yyyy")
+                mask &= compare(self.dates, np.datetime64(bound, "D")) # NaT dates never match
+        return mask
+
+    def counts(self, field: str, top: int = None, **filters) -> list:
+        """The number of articles mentioning each value of field, most mentioned first."""
+        facet = self.facet(field)
+        keep = self.article_mask(**filters)[facet.rows]
+        totals = np.bincount(facet.codes[keep], minlength=len(facet.values))
+        order = np.argsort(-totals, kind="stable")
+        order = order[totals[order] > 0][:top]
+        return [(facet.values[code], int(totals[code])) for code in order]
+
+    def _incidence(self, facet: Facet, codes: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """An articles x values matrix with 1 where the article mentions the value."""
+        columns = np.full(len(facet.values), -1, dtype=np.int32)
+        columns[codes] = np.arange(len(codes), dtype=np.int32)
+        keep = (columns[facet.codes] >= 0) & mask[facet.rows]
+        matrix = np.zeros((self.size, len(codes)), dtype=np.int32)
+        matrix[facet.rows[keep], columns[facet.codes[keep]]] = 1
+        return matrix
+
+    def cooccurrence(self, field: str, other: str = None, top: int = 10, **filters) -> dict:
+        """
+        How many articles mention each pair of the top values of field (and of other, if given).
+        Returns the row values, the column values and the matrix as nested lists.
+        """
+        other = other or field
+        mask = self.article_mask(**filters)
+        labels = {}
+        matrices = []
+        for name in (field, other):
+            facet = self.facet(name)
+            top_values = self.counts(name, top=top, **filters)
+            labels[name] = [value for value, _ in top_values]
+            codes = np.array([facet.values.index(value) for value in labels[name]], dtype=np.int32)
+            matrices.append(self._incidence(facet, codes, mask))
+        matrix = matrices[0].T @ matrices[1]
+        return {"rows": labels[field], "columns": labels[other], "matrix": matrix.tolist()}
+
+    def _bucket_dates(self, bucket: str) -> np.ndarray:
+        if bucket == "day":
+            return self.dates
+        if bucket == "week":
+            return _MONDAY + ((self.dates - _MONDAY) // 7) * 7
+        if bucket == "month":
+            return self.dates.astype("datetime64[M]").astype("datetime64[D]")
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+
+    def time_series(self, field: str, value: str = None, bucket: str = "week", by: str = None, **filters) -> dict:
+        """
+        The number of articles per day, week or month mentioning a value of field (substring match),
+        or every article if value is not given. With by="source" there is one series per source.
+        """
+        mask = self.article_mask(**filters) & ~np.isnat(self.dates)
+        if value:
+            facet = self.facet(field)
+            mentions = np.zeros(self.size, dtype=bool)
+            mentions[facet.rows[np.isin(facet.codes, facet.matching_codes(value))]] = True
+            mask &= mentions
+
+        buckets = self._bucket_dates(bucket)[mask]
+        periods, period_codes = np.unique(buckets, return_inverse=True)
+        if by == "source":
+            groups, group_codes = self.sources, self.source_codes[mask]
+        elif by is None:
+            groups, group_codes = ["all"], np.zeros(len(period_codes), dtype=np.int32)
+        else:
+            raise ValueError("by must be 'source' or left out")
+
+        table = np.zeros((len(groups), len(periods)), dtype=np.int64)
+        np.add.at(table, (group_codes, period_codes), 1)
+        series = {group: table[i].tolist() for i, group in enumerate(groups) if table[i].any()}
+        return {"periods": [str(period) for period in periods], "series": series}
+
+    def export(self, top: int = 20) -> dict:
+        """The top values of every field, overall and per source, for saving or serving as JSON."""
+        return {
+            "articles": self.size,
+            "counts": {field: dict(self.counts(field, top=top)) for field in FIELDS},
+            "counts_by_source": {
+                source: {field: dict(self.counts(field, top=top, source=source)) for field in FIELDS}
+                for source in self.sources
+            },
+            "articles_per_week": self.time_series(FIELDS[0], by="source"),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Count the values of the summary_data fields of the analysed articles.")
+    parser.add_argument("--input", default=None, help="Output .json or .jsonl file (default: data/all_articles_output)")
+    parser.add_argument("--source", help="Only count articles from sources containing this text")
+    parser.add_argument("--date-from", help="dd-mm-yyyy")
+    parser.add_argument("--date-to", help="dd-mm-yyyy")
+    commands = parser.add_subparsers(dest="command", required=True)
+    counts = commands.add_parser("counts", help="How many articles mention each value of a field")
+    counts.add_argument("field", choices=FIELDS)
+    counts.add_argument("--top", type=int, default=20)
+    cooccurrence = commands.add_parser("cooccurrence", help="How often the top values of two fields are mentioned together")
+    cooccurrence.add_argument("field", choices=FIELDS)
+    cooccurrence.add_argument("--other", choices=FIELDS)
+    cooccurrence.add_argument("--top", type=int, default=10)
+    timeseries = commands.add_parser("timeseries", help="Articles mentioning a value per day, week or month")
+    timeseries.add_argument("field", choices=FIELDS)
+    timeseries.add_argument("value", nargs="?")
+    timeseries.add_argument("--bucket", choices=BUCKETS, default="week")
+    timeseries.add_argument("--by", choices=["source"])
+    export = commands.add_parser("export", help="Save the top values of every field as JSON")
+    export.add_argument("output")
+    export.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    table = FacetTable.from_path(args.input or output_path(DEFAULT_INPUT))
+    filters = {"source": args.source, "date_from": args.date_from, "date_to": args.date_to}
+
+    if args.command == "counts":
+        for value, count in table.counts(args.field, top=args.top, **filters):
+            print(f"{count:6}  {value}")
+    elif args.command == "cooccurrence":
+        result = table.cooccurrence(args.field, args.other, top=args.top, **filters)
+        width = max([len(label) for label in result["rows"]] + [0])
+        print(" " * width + "  " + "  ".join(f"{i:>4}" for i in range(len(result["columns"]))))
+        for label, counts_row in zip(result["rows"], result["matrix"]):
+            print(f"{label:<{width}}  " + "  ".join(f"{count:>4}" for count in counts_row))
+        for i, label in enumerate(result["columns"]):
+            print(f"{i:>4}: {label}")
+    elif args.command == "timeseries":
+        result = table.time_series(args.field, args.value, bucket=args.bucket, by=args.by, **filters)
+        for group, series in result["series"].items():
+            print(group)
+            for period, count in zip(result["periods"], series):
+                if count:
+                    print(f"    {period}  {count}")
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(table.export(top=args.top), f, indent=4, ensure_ascii=False)
+        print(f"Aggregates saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
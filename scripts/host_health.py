@@ -0,0 +1,195 @@
+"""
+Per-host health for the web scraper: adaptive timeouts, backoff and circuit breakers.
+
+Every request to a host is recorded in its HostHealth: how long successful responses took and
+whether each request failed (a timeout, a connection error, 403, 429 or a 5xx). From that:
+- the request timeout follows the host's own response times (a multiple of their 95th
+  percentile), so a fast site that stops answering is given up on in seconds, not 10;
+- 429 and 503 responses are retried after the Retry-After the site asks for, or a jittered
+  exponential backoff, and every thread waits before sending that host another request. Only the
+  last attempt counts as a failure, so one rate-limited page does not open the circuit;
+- after a failure, only one request at a time is sent to the host until one succeeds, so requests
+  queued for a host that has stopped answering do not all wait out their timeouts;
+- once a host keeps failing, its circuit opens and its requests are skipped without being sent.
+  After a cool-down one request is let through to test it, which closes the circuit if it works.
+
+Every request started with start_request must be finished with record_success, record_retry or record_failure.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+DEFAULT_TIMEOUT = 10 # Seconds, used until a host has enough responses for its own timeout
+MIN_TIMEOUT = 3
+TIMEOUT_MULTIPLIER = 4 # Times the 95th percentile response time
+MIN_SAMPLES = 5 # Successful responses needed before the timeout adapts
+WINDOW = 50 # Requests remembered per host
+FAILURE_STATUSES = {403, 429} # As well as every 5xx
+RETRY_STATUSES = {429, 503}
+
+class HostHealth:
+    """The recent requests to one host and the state of its circuit breaker."""
+
+    def __init__(self, window: int = WINDOW):
+        self.latencies = deque(maxlen=window) # Seconds taken by successful responses
+        self.outcomes = deque(maxlen=window) # True for each failed request
+        self.consecutive_failures = 0
+        self.open_until = None # Time the circuit can be tested again, None while closed
+        self.probing = False # A test request is in flight while half open
+        self.blocked_until = 0.0 # No requests before this time (backoff asked for by the host)
+        self.in_flight = 0
+        self.times_opened = 0
+
+    def p95_latency(self) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def error_rate(self) -> float:
+        return sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+class HostHealthTracker:
+    """Thread-safe HostHealth of every host the scraper sends requests to."""
+
+    def __init__(self, default_timeout: float = DEFAULT_TIMEOUT, min_timeout: float = MIN_TIMEOUT,
+                 failure_threshold: int = 3, error_rate_threshold: float = 0.5, min_requests: int = 10,
+                 cooldown: float = 60, max_retries: int = 2, backoff_base: float = 1.0, max_backoff: float = 30):
+        """
+        failure_threshold - failures in a row that open a host's circuit.
+        error_rate_threshold and min_requests - a share of failed requests that also opens it, once a host has had
+        at least min_requests requests.
+        cooldown - seconds a circuit stays open before one request is let through to test the host.
+        max_retries - retries of a 429/503 response. A Retry-After longer than max_backoff is not waited for.
+        """
+        self.default_timeout = default_timeout
+        self.min_timeout = min(min_timeout, default_timeout)
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self._hosts = {}
+        self._lock = threading.Condition()
+
+    def _health(self, host: str) -> HostHealth:
+        health = self._hosts.get(host)
+        if health is None:
+            health = self._hosts[host] = HostHealth()
+        return health
+
+    def start_request(self, host: str) -> bool:
+        """
+        Check if a request can be sent to host: False while its circuit is open, or a test request is in flight.
+        While the host's last request failed, this waits for the requests in flight to finish first.
+        """
+        with self._lock:
+            health = self._health(host)
+            while health.consecutive_failures and health.in_flight and health.open_until is None:
+                self._lock.wait()
+            if health.open_until is not None:
+                if time.monotonic() < health.open_until or health.probing:
+                    return False
+                health.probing = True # Half open - let this one request test the host
+            health.in_flight += 1
+            return True
+
+    def timeout(self, host: str) -> float:
+        """The request timeout for host, from the response times seen so far."""
+        with self._lock:
+            health = self._health(host)
+            if len(health.latencies) < MIN_SAMPLES:
+                return self.default_timeout
+            return min(self.default_timeout, max(self.min_timeout, TIMEOUT_MULTIPLIER * health.p95_latency()))
+
+    def wait_turn(self, host: str) -> float:
+        """Sleep until a backoff the host asked for is over. Returns the seconds waited."""
+        with self._lock:
+            delay = self._health(host).blocked_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+            return delay
+        return 0.0
+
+    def record_success(self, host: str, seconds: float):
+        with self._lock:
+            health = self._health(host)
+            health.in_flight -= 1
+            self._lock.notify_all()
+            health.latencies.append(seconds)
+            health.outcomes.append(False)
+            health.consecutive_failures = 0
+            health.open_until = None
+            health.probing = False
+
+    def record_retry(self, host: str):
+        """Record a 429/503 response that will be retried, which is not counted as a failure."""
+        with self._lock:
+            health = self._health(host)
+            health.in_flight -= 1
+            self._lock.notify_all()
+            health.probing = False # The retry tests the host again
+
+    def record_failure(self, host: str) -> bool:
+        """Record a failed request. Returns True if this opened the host's circuit."""
+        with self._lock:
+            health = self._health(host)
+            health.in_flight -= 1
+            self._lock.notify_all()
+            health.outcomes.append(True)
+            health.consecutive_failures += 1
+            failing = (health.consecutive_failures >= self.failure_threshold or
+                       (len(health.outcomes) >= self.min_requests and health.error_rate() >= self.error_rate_threshold))
+            if health.probing or (failing and health.open_until is None):
+                # A failed test request opens the circuit again for another cool-down
+                health.probing = False
+                health.open_until = time.monotonic() + self.cooldown
+                health.times_opened += 1
+                return True
+            return False
+
+    @staticmethod
+    def is_failure(status_code: int) -> bool:
+        """Check if a response status means the host is failing (rather than e.g. a missing page)."""
+        return status_code in FAILURE_STATUSES or status_code >= 500
+
+    def retry_delay(self, host: str, status_code: int, retry_after: str, attempt: int) -> float:
+        """
+        The seconds to wait before retrying a response with status_code, or None if it should not be retried.
+        Every request to the host waits for the same backoff.
+        """
+        if status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+            return None
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.backoff_base * 2 ** attempt * random.uniform(0.5, 1.5)
+        if delay > self.max_backoff:
+            return None
+        with self._lock:
+            health = self._health(host)
+            health.blocked_until = max(health.blocked_until, time.monotonic() + delay)
+        return delay
+
+    def open_circuits(self) -> list:
+        """The hosts whose circuit has opened at least once, with how often."""
+        with self._lock:
+            return [(host, health.times_opened) for host, health in self._hosts.items() if health.times_opened]
+
+def parse_retry_after(value: str) -> float:
+    """The seconds asked for by a Retry-After header (a number of seconds or an HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
@@ -0,0 +1,124 @@
+"""
+On-disk HTTP response cache for the web scraper.
+
+Responses are stored in a SQLite database keyed by URL, with the bodies compressed by zlib.
+Cached pages are revalidated with conditional requests (ETag / Last-Modified), so a page that
+has not changed costs a 304 response instead of a full download.
+Entries that have not been revalidated within the TTL are evicted, and the least recently used
+entries are evicted once the stored bodies go over the size cap.
+"""
+
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_TTL = 7 * 24 * 60 * 60 # 1 week
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024 # 200 MB of compressed bodies
+
+class ResponseCache:
+    """A persistent, size-capped cache of HTTP responses."""
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Open (or create) the cache database at path."""
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._conn.commit()
+        self.stats = {'revalidated': 0, 'stored': 0, 'evicted': 0}
+
+    def get(self, url: str):
+        """Return the cached entry for a URL as a dict, or None if it is missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, body, stored_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            etag, last_modified, body, stored_at = row
+            if time.time() - stored_at > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._conn.commit()
+                self.stats['evicted'] += 1
+                return None
+
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'text': zlib.decompress(body).decode('utf-8'),
+        }
+
+    @staticmethod
+    def conditional_headers(entry: dict) -> dict:
+        """Build the headers for a conditional request that revalidates a cached entry."""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, response):
+        """Store a successful response. Responses without validators cannot be revalidated, so are skipped."""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        body = zlib.compress(response.text.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, body, size, stored_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, len(body), now, now)
+            )
+            self._conn.commit()
+            self.stats['stored'] += 1
+
+    def touch(self, url: str):
+        """Mark a cached entry as revalidated (the server replied 304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE responses SET stored_at = ?, last_used = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+            self.stats['revalidated'] += 1
+
+    def evict(self):
+        """Remove expired entries, then the least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE stored_at < ?", (time.time() - self.ttl,))
+            self.stats['evicted'] += cursor.rowcount
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                to_delete = []
+                for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY last_used"):
+                    if total <= self.max_bytes:
+                        break
+                    to_delete.append((url,))
+                    total -= size
+                self._conn.executemany("DELETE FROM responses WHERE url = ?", to_delete)
+                self.stats['evicted'] += len(to_delete)
+
+            self._conn.commit()
+
+    def close(self):
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
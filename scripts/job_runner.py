@@ -0,0 +1,141 @@
+"""
+In-process background job runner for server.py.
+
+Jobs are commands (e.g. the server_main.py pipeline) run in a subprocess by a background worker
+thread, so the Flask request that starts a job returns straight away. Each job gets an ID and its
+output is collected line by line while it runs, so progress can be polled or streamed. Submitting
+a job while the same job is already queued or running returns the existing job instead of
+starting a duplicate run.
+"""
+
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+class Job:
+    """A command run in the background, with its status and output."""
+
+    def __init__(self, name: str, command: list, cwd: str = None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.status = QUEUED
+        self.output = []
+        self.returncode = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def add_line(self, line: str):
+        with self.condition:
+            self.output.append(line)
+            self.condition.notify_all()
+
+    def finish(self, status: str, returncode: int = None, error: str = None):
+        with self.condition:
+            self.status = status
+            self.returncode = returncode
+            self.error = error
+            self.finished_at = time.time()
+            self.condition.notify_all()
+
+    def wait_for_output(self, since: int, timeout: float) -> list:
+        """Wait until there is output after line `since` or the job has finished, and return the new lines."""
+        with self.condition:
+            self.condition.wait_for(lambda: len(self.output) > since or self.finished, timeout=timeout)
+            return self.output[since:]
+
+    def to_dict(self, since: int = 0) -> dict:
+        """The job's status and its output from line `since` onwards."""
+        with self.condition:
+            return {
+                "job_id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "returncode": self.returncode,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "output": self.output[since:],
+                "next_line": len(self.output),
+            }
+
+class JobRunner:
+    """Runs jobs one at a time on a background worker thread."""
+
+    def __init__(self, max_history: int = 20):
+        self.max_history = max_history
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+
+    def submit(self, name: str, command: list, cwd: str = None) -> tuple:
+        """
+        Queue a job, unless a job with the same name is already queued or running.
+        Returns (job, created) where created is False if an existing job was returned.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.name == name and not job.finished:
+                    return job, False
+
+            job = Job(name, command, cwd)
+            self._jobs[job.id] = job
+            self._forget_old_jobs()
+        self._queue.put(job)
+        return job, True
+
+    def get(self, job_id: str):
+        """Return a job by ID, or None."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _forget_old_jobs(self):
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.created_at)
+        for job in finished[:max(0, len(self._jobs) - self.max_history)]:
+            del self._jobs[job.id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            self._run(job)
+
+    def _run(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        print(f"Job {job.id} ({job.name}) started")
+        try:
+            process = subprocess.Popen(
+                job.command, cwd=job.cwd, text=True, bufsize=1,
+                stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+            )
+            for line in process.stdout:
+                job.add_line(line.rstrip("\n"))
+            returncode = process.wait()
+        except Exception as e:
+            job.finish(FAILED, error=str(e))
+            print(f"Job {job.id} ({job.name}) could not run: {e}")
+            return
+
+        if returncode == 0:
+            job.finish(SUCCEEDED, returncode)
+        else:
+            job.finish(FAILED, returncode, f"Exited with code {returncode}")
+        print(f"Job {job.id} ({job.name}) {job.status}")
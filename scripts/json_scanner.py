@@ -0,0 +1,118 @@
+"""
+Find JSON objects and arrays in model output, including output that arrives in chunks.
+
+JsonValueScanner tracks the brackets and strings of the text it is fed, looking at each character
+once, so it finds where a JSON value ends without the backtracking of a regex and can say so as
+soon as the closing bracket arrives. Text around the values (e.g. "Here is the summary:") is skipped,
+as is bracketed text that turns out not to be JSON (e.g. "[Note]"), whose inside is scanned again.
+"""
+
+import json
+import re
+
+# Characters that can open or close a value, or change how the characters after them are read
+_SPECIAL = re.compile(r'[{}\[\]"\\]')
+_CLOSING = {'}': '{', ']': '['}
+
+class MalformedJsonError(ValueError):
+    """The text does not contain the JSON value expected, e.g. the response ended before it was complete."""
+
+class JsonValueScanner:
+    """Finds the complete, valid top-level JSON objects and arrays in text fed to it in chunks."""
+
+    def __init__(self, max_text_before: int = None):
+        """
+        max_text_before - the most characters of text allowed before the first value starts,
+        so a response that is not JSON at all fails early instead of when it ends.
+        """
+        self.max_text_before = max_text_before
+        self.values_found = 0
+        self._offset = 0 # Position of the current chunk in the whole text
+        self._skip_to = 0 # Position after an escaped character in a string
+        self._start = 0 # Position of the bracket that opened the current value
+        self._brackets = [] # Brackets opened and not yet closed in the current value
+        self._in_string = False
+        self._parts = [] # Text of the current value from earlier chunks
+
+    def feed(self, text: str) -> list:
+        """
+        Scan the next chunk of text. Returns the text of each value completed in it (valid JSON, not yet decoded).
+        Bracketed text that is not valid JSON (e.g. "[Note]") is skipped, and the text inside it scanned again.
+        """
+        completed = []
+        while text is not None:
+            text = self._scan(text, completed)
+        if (not self._brackets and self.max_text_before is not None and not self.values_found and not completed
+                and self._offset > self.max_text_before):
+            raise MalformedJsonError(f"No JSON value in the first {self.max_text_before} characters")
+        self.values_found += len(completed)
+        return completed
+
+    def finish(self) -> list:
+        """
+        Call once the text has ended. Scans the inside of a value left open (e.g. by a "[" in the text) again,
+        returning the values completed in it.
+        """
+        completed = []
+        while self._brackets:
+            text = self._restart("", 0)
+            while text is not None:
+                text = self._scan(text, completed)
+        self.values_found += len(completed)
+        return completed
+
+    def _scan(self, text: str, completed: list):
+        """Scan text, adding the values completed in it. Returns the text to scan again after a false start, or None."""
+        value_start = 0 if self._brackets else None
+        for match in _SPECIAL.finditer(text):
+            position = self._offset + match.start()
+            if position < self._skip_to:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == '\\':
+                    self._skip_to = position + 2
+                elif char == '"':
+                    self._in_string = False
+            elif not self._brackets:
+                # Outside a value only an opening bracket matters
+                if char in '{[':
+                    self._brackets.append(char)
+                    self._start = position
+                    value_start = match.start()
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._brackets.append(char)
+            elif char in _CLOSING:
+                if self._brackets.pop() != _CLOSING[char]:
+                    return self._restart(text, value_start)
+                if not self._brackets:
+                    value = "".join(self._parts) + text[value_start:match.end()]
+                    try:
+                        json.loads(value)
+                    except json.JSONDecodeError:
+                        return self._restart(text, value_start)
+                    completed.append(value)
+                    self._parts = []
+                    value_start = None
+
+        if self._brackets:
+            self._parts.append(text[value_start:])
+        self._offset += len(text)
+        return None
+
+    def _restart(self, text: str, value_start: int) -> str:
+        """Drop the current value, returning the text after its opening bracket to be scanned again."""
+        rest = "".join(self._parts) + text[value_start:]
+        self._offset = self._start + 1
+        self._skip_to = 0
+        self._brackets = []
+        self._in_string = False
+        self._parts = []
+        return rest[1:]
+
+def find_json_values(text: str) -> list:
+    """Decode every top-level JSON object and array in text. Values that are not valid JSON are left out."""
+    scanner = JsonValueScanner()
+    return [json.loads(value_text) for value_text in scanner.feed(text) + scanner.finish()]
@@ -0,0 +1,222 @@
+"""
+Counters and latency histograms for a pipeline run.
+
+WebScraper, AnalyseData and main.py record into one Metrics object: counters (HTTP fetches,
+bytes downloaded, Bedrock tokens, ...) and histograms of how long each stage took, labelled
+by stage and source. At the end of a run it is written as a JSON run report, which server.py
+serves in the Prometheus text format on /metrics.
+
+Usage:
+    python -m scripts.metrics <run_report.json>               # print a summary of a run
+    python -m scripts.metrics <run_report.json> --prometheus  # print it in the Prometheus format
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Upper bounds (seconds) of the histogram buckets, from a cached page to a slow Bedrock call
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PROMETHEUS_PREFIX = "news_pipeline_"
+
+class Histogram:
+    """Counts of observed values per bucket, with their sum, min and max."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # The last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket, like Prometheus' histogram_quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                lower, upper = max(lower, self.min), min(upper, self.max)
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+    def merge(self, other: "Histogram"):
+        """Add the observations of another histogram with the same buckets."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count, 'sum': self.sum,
+            'min': self.min if self.count else None, 'max': self.max if self.count else None,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.quantile(0.5), 'p95': self.quantile(0.95),
+            'buckets': [[bound, count] for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts)],
+        }
+
+class Metrics:
+    """Thread-safe counters and histograms, each identified by a name and a set of labels."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+    def count(self, name: str, amount: float = 1, **labels):
+        """Add amount to a counter."""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value (usually seconds) in a histogram."""
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Record how long the with block took in a histogram, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def counter_value(self, name: str, **labels) -> float:
+        """The total of the counters called name that have all of the given labels."""
+        wanted = set(self._key(name, labels)[1])
+        with self._lock:
+            return sum(value for (counter_name, counter_labels), value in self._counters.items()
+                       if counter_name == name and wanted <= set(counter_labels))
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        """The histograms called name that have all of the given labels, merged into one (e.g. across sources)."""
+        wanted = set(self._key(name, labels)[1])
+        merged = Histogram()
+        with self._lock:
+            for (histogram_name, histogram_labels), histogram in self._histograms.items():
+                if histogram_name == name and wanted <= set(histogram_labels):
+                    merged.merge(histogram)
+        return merged
+
+    def report(self) -> dict:
+        """The machine-readable run report: every counter and histogram with its labels."""
+        finished = time.time()
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                          for (name, labels), histogram in sorted(self._histograms.items())]
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'finished': datetime.fromtimestamp(finished).isoformat(timespec='seconds'),
+            'finished_timestamp': finished,
+            'duration_seconds': finished - self.started,
+            'counters': counters,
+            'histograms': histograms,
+        }
+
+    def write_report(self, path: str) -> dict:
+        """Write the run report to path (replacing it in one step, so readers never see half a file)."""
+        report = self.report()
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        os.replace(temp_path, path)
+        return report
+
+def _label_text(labels: dict, extra: dict = None) -> str:
+    labels = {**labels, **(extra or {})}
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+def prometheus_text(report: dict, prefix: str = PROMETHEUS_PREFIX) -> str:
+    """Render a run report in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+
+    def declare(name: str, kind: str):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    name = prefix + "last_run_finished_timestamp_seconds"
+    declare(name, "gauge")
+    lines.append(f"{name} {report['finished_timestamp']}")
+    name = prefix + "last_run_duration_seconds"
+    declare(name, "gauge")
+    lines.append(f"{name} {report['duration_seconds']}")
+
+    for counter in report['counters']:
+        name = prefix + counter['name'] + "_total"
+        declare(name, "counter")
+        lines.append(f"{name}{_label_text(counter['labels'])} {counter['value']}")
+
+    for histogram in report['histograms']:
+        name = prefix + histogram['name']
+        declare(name, "histogram")
+        cumulative = 0
+        for bound, count in histogram['buckets']:
+            cumulative += count
+            lines.append(f"{name}_bucket{_label_text(histogram['labels'], {'le': bound})} {cumulative}")
+        lines.append(f"{name}_sum{_label_text(histogram['labels'])} {histogram['sum']}")
+        lines.append(f"{name}_count{_label_text(histogram['labels'])} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+def print_summary(report: dict):
+    """Print the counters and the latency of each histogram in a report."""
+    print(f"Run {report['started']} -> {report['finished']} ({report['duration_seconds']:.1f} s)")
+    for counter in report['counters']:
+        labels = ", ".join(f"{key}={value}" for key, value in counter['labels'].items())
+        print(f"  {counter['name']:<32} {labels:<45} {counter['value']:>12g}")
+    for histogram in report['histograms']:
+        labels = ", ".join(f"{key}={value}" for key, value in histogram['labels'].items())
+        print(f"  {histogram['name']:<32} {labels:<45} n={histogram['count']:<6} "
+              f"mean={histogram['mean'] * 1000:9.1f} ms | p95={histogram['p95'] * 1000:9.1f} ms "
+              f"| total={histogram['sum']:8.2f} s")
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if "--prometheus" in sys.argv[2:]:
+        print(prometheus_text(report), end="")
+    else:
+        print_summary(report)
+
+if __name__ == "__main__":
+    main()
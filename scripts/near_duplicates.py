@@ -0,0 +1,113 @@
+"""
+Local near-duplicate detection for news articles using MinHash and locality-sensitive hashing (LSH).
+
+Each article (title + cleaned text) is turned into a set of word shingles and summarised by a
+MinHash signature. The signature uses one-permutation hashing (each shingle is hashed once and
+lands in one of the signature's bins), so it costs O(shingles) rather than O(shingles x permutations).
+Signatures are split into bands and articles that share a band are candidate
+duplicates, so only a small number of pairs are compared and the work grows roughly linearly
+with the number of articles. Candidates whose estimated Jaccard similarity reaches the threshold
+are grouped into clusters.
+"""
+
+import random
+import re
+import zlib
+
+SHINGLE_SIZE = 3 # Words per shingle
+NUM_PERMUTATIONS = 128
+NUM_BANDS = 32 # 4 rows per band
+DEFAULT_THRESHOLD = 0.5
+_PRIME = (1 << 61) - 1
+_MAX_HASH = -1 # Signature value of an empty text
+_WORD_PATTERN = re.compile(r"\w+")
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Return the set of hashed word shingles of a text."""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+class MinHasher:
+    """Computes one-permutation MinHash signatures with a random universal hash function."""
+
+    def __init__(self, num_permutations: int = NUM_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self.num_bins = num_permutations
+        self.a = rng.randrange(1, _PRIME)
+        self.b = rng.randrange(0, _PRIME)
+
+    def signature(self, shingle_set: set) -> tuple:
+        """Return the MinHash signature of a set of shingles."""
+        k = self.num_bins
+        bins = [None] * k
+        a, b = self.a, self.b
+        for shingle in shingle_set:
+            h = (a * shingle + b) % _PRIME
+            i, value = h % k, h // k
+            if bins[i] is None or value < bins[i]:
+                bins[i] = value
+
+        if all(value is None for value in bins):
+            return tuple([_MAX_HASH] * k)
+
+        # Fill empty bins from the next filled bin (wrapping round), offset by the distance so they stay distinct
+        signature = list(bins)
+        for i in range(k):
+            if signature[i] is None:
+                distance = 1
+                while bins[(i + distance) % k] is None:
+                    distance += 1
+                signature[i] = bins[(i + distance) % k] + distance * _PRIME
+        return tuple(signature)
+
+def estimated_similarity(signature_a: tuple, signature_b: tuple) -> float:
+    """Estimate the Jaccard similarity of two articles from their signatures."""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+def article_text(article: dict) -> str:
+    """The text of an article used for duplicate detection."""
+    return f"{article.get('title', '')} {article.get('cleaned_text', '')}"
+
+def find_duplicate_clusters(texts: list, threshold: float = DEFAULT_THRESHOLD,
+                            num_permutations: int = NUM_PERMUTATIONS, num_bands: int = NUM_BANDS) -> list:
+    """
+    Group near-duplicate texts together.
+    Returns a list of clusters, each a sorted list of the indexes of 2 or more similar texts.
+    """
+    hasher = MinHasher(num_permutations)
+    signatures = [hasher.signature(shingles(text)) for text in texts]
+    rows = num_permutations // num_bands
+
+    # Articles that share any band are candidate duplicates
+    candidates = set()
+    for band in range(num_bands):
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            buckets.setdefault(signature[band * rows:(band + 1) * rows], []).append(i)
+        for bucket in buckets.values():
+            for position, i in enumerate(bucket):
+                for j in bucket[position + 1:]:
+                    candidates.add((i, j))
+
+    # Join candidates that are similar enough with union-find
+    parent = list(range(len(texts)))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in candidates:
+        if estimated_similarity(signatures[i], signatures[j]) >= threshold:
+            parent[find(i)] = find(j)
+
+    clusters = {}
+    for i in range(len(texts)):
+        clusters.setdefault(find(i), []).append(i)
+    return [sorted(cluster) for cluster in clusters.values() if len(cluster) > 1]
+
+def most_detailed(articles: list, cluster: list) -> int:
+    """Return the index in the cluster of the most detailed article (the longest text, then the earliest)."""
+    return max(cluster, key=lambda i: (len(articles[i].get("cleaned_text") or ""), -i))
@@ -0,0 +1,66 @@
+"""
+Worker processes for a distributed scrape.
+
+With WORK_QUEUE_PATH set in main.py / server_main.py, a run puts the links of each news site, and
+then each article, on a work queue (scripts/work_queue.py) and collects the results into the usual
+output files. The run works on the queue itself; each worker started here takes tasks from it too,
+with its own --threads downloads and its own CPU for parsing. --per-host and the host health tracking
+apply to each process on its own, so a site receives up to --per-host requests at once from every
+process: lower it where a site's limit must be kept across all of them. Workers on other machines need
+the same collect config and the queue file on a shared drive (with --network-share).
+
+Usage:
+    python -m scripts.queue_worker --queue data/work_queue.sqlite --config examples/collect_example.ini --processes 4
+"""
+
+import argparse
+import multiprocessing
+
+try:
+    from scripts.collect_data import WebScraper
+    from scripts.work_queue import WorkQueue, DEFAULT_LEASE_SECONDS
+except ImportError: # Running from inside the scripts folder
+    from collect_data import WebScraper
+    from work_queue import WorkQueue, DEFAULT_LEASE_SECONDS
+
+def run_worker(args):
+    """Work on the queue in this process until it is stopped, or has been idle for args.idle_exit seconds."""
+    scraper = WebScraper(args.config, max_workers=args.threads, per_host_limit=args.per_host, cache_path=args.cache,
+                         seen_index_path=args.seen_index, parse_workers=args.parse_workers,
+                         extractor_stats_path=args.extractor_stats)
+    work_queue = WorkQueue(args.queue, lease_seconds=args.lease, wal=not args.network_share)
+    try:
+        done = scraper.work_on_queue(work_queue, idle_exit=args.idle_exit or None)
+    finally:
+        work_queue.close()
+    print(f"Worker finished after {done} tasks.")
+    scraper.print_stats()
+
+def main():
+    parser = argparse.ArgumentParser(description="Work on the tasks of a distributed scrape.")
+    parser.add_argument("--queue", required=True, help="Path of the work queue database")
+    parser.add_argument("--config", required=True, help="The collect config of the run")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to start")
+    parser.add_argument("--threads", type=int, default=8, help="Pages downloaded at once by each process")
+    parser.add_argument("--per-host", type=int, default=4, help="Requests sent to a single site at once by each process")
+    parser.add_argument("--cache", help="HTTP cache database of this machine")
+    parser.add_argument("--seen-index", help="Seen articles index of the run, so links collected before are skipped")
+    parser.add_argument("--parse-workers", type=int, default=0)
+    parser.add_argument("--extractor-stats", help="Extractor statistics database of this machine")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="Seconds before the task of a worker that stopped is given to another")
+    parser.add_argument("--idle-exit", type=float, default=0, help="Stop after this many seconds without a task (0 = never)")
+    parser.add_argument("--network-share", action="store_true", help="The queue is on a drive shared by several machines")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(args)
+        return
+    processes = [multiprocessing.Process(target=run_worker, args=(args,)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Token bucket rate limiting for calls to AWS Bedrock.
+
+Bedrock quotas are set as requests per minute and tokens per minute, so the
+RateLimiter holds one bucket for each and a call waits until both have capacity.
+"""
+
+import threading
+import time
+
+class TokenBucket:
+    """A thread-safe token bucket that refills continuously at a rate per minute."""
+
+    def __init__(self, rate_per_minute: float, capacity: float = None):
+        """A capacity of None allows a burst of one minute's worth of tokens."""
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, amount: float = 1) -> float:
+        """Block until amount tokens are available and take them. Returns the time spent waiting."""
+        # A request bigger than the bucket could never be served, so cap it at the capacity
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+class RateLimiter:
+    """Limits both the requests per minute and the tokens per minute sent to Bedrock."""
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: int) -> float:
+        """Block until one request using the given number of tokens is allowed. Returns the time spent waiting."""
+        return self.requests.acquire(1) + self.tokens.acquire(tokens)
@@ -0,0 +1,285 @@
+"""
+Inverted full-text index over the collected articles, ranked with BM25.
+
+Each article's title, cleaned_text and summary_data fields are split into lower-case words
+(stop words removed). Matches in the title count three times and matches in the summary_data
+fields twice, so the index ranks articles by a weighted form of BM25 (BM25F).
+
+The index is stored in a SQLite database. Each word has one postings list: the article IDs
+that contain it and how often, stored as variable-length integers with the IDs as gaps
+from the previous ID. Articles get increasing IDs, so new articles are added by appending
+to the end of the postings lists without rebuilding the index.
+
+Usage:
+    python -m scripts.search_index build <articles.json|articles.jsonl> [...] [--rebuild]
+    python -m scripts.search_index search "<query>" [--limit 10]
+    python -m scripts.search_index stats
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from array import array
+
+try:
+    from scripts.article_store import open_articles
+except ImportError: # Running from inside the scripts folder
+    from article_store import open_articles
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "search_index.sqlite")
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3
+SUMMARY_WEIGHT = 2
+TEXT_WEIGHT = 1
+SUMMARY_FIELDS = ("summary", "category", "product", "technology", "tags", "geography",
+                  "companies_mentioned", "parent_companies_mentioned")
+STOP_WORDS = frozenset("""
+    a about after all also an and any are as at be been but by can could did do does for from had has have
+    he her his how i if in into is it its may more most no not of on or our out over said she so some
+    than that the their them then there these they this those through to up us was we were what when which
+    who will with would you your
+""".split())
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:[-'&][a-z0-9]+)*")
+
+def tokenise(text) -> list:
+    """Split text into lower-case words, without stop words and single characters."""
+    return [word for word in _WORD_PATTERN.findall(str(text).lower()) if len(word) > 1 and word not in STOP_WORDS]
+
+def encode_postings(postings: list, previous_id: int = -1) -> bytes:
+    """Encode (article id, term frequency) pairs, in increasing id order, as variable-length integers."""
+    data = bytearray()
+    for doc_id, frequency in postings:
+        for value in (doc_id - previous_id, frequency):
+            while value >= 0x80:
+                data.append((value & 0x7F) | 0x80)
+                value >>= 7
+            data.append(value)
+        previous_id = doc_id
+    return bytes(data)
+
+def decode_postings(data: bytes):
+    """Yield the (article id, term frequency) pairs of an encoded postings list."""
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        values.append(value)
+        value = shift = 0
+    doc_id = -1
+    for i in range(0, len(values), 2):
+        doc_id += values[i]
+        yield doc_id, values[i + 1]
+
+def article_terms(article: dict) -> dict:
+    """Return the weighted frequency of each word in an article."""
+    frequencies = {}
+    def add(text, weight):
+        for word in tokenise(text):
+            frequencies[word] = frequencies.get(word, 0) + weight
+
+    add(article.get("title") or "", TITLE_WEIGHT)
+    add(article.get("cleaned_text") or "", TEXT_WEIGHT)
+    summary_data = article.get("summary_data")
+    if isinstance(summary_data, dict):
+        for field in SUMMARY_FIELDS:
+            add(summary_data.get(field) or "", SUMMARY_WEIGHT)
+    return frequencies
+
+def load_articles(path: str):
+    """Read the articles of a JSONL store or a JSON array file, one at a time."""
+    return open_articles(path)
+
+class SearchIndex:
+    """A BM25 full-text index of articles, stored in SQLite."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        """Open (or create) the index database at path."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT,
+                source TEXT,
+                date TEXT,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT PRIMARY KEY,
+                doc_count INTEGER NOT NULL,
+                last_id INTEGER NOT NULL,
+                data BLOB NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+        # Article lengths are kept in memory for scoring; other processes may add articles,
+        # so they are re-read from the database when the count changes
+        self._lengths = array('I')
+        self._total_length = 0
+        self._urls = set()
+        self._refresh()
+
+    def _refresh(self):
+        """Load the lengths of any articles added since the index was opened."""
+        rows = self._conn.execute(
+            "SELECT id, url, length FROM articles WHERE id >= ? ORDER BY id", (len(self._lengths),)
+        ).fetchall()
+        for doc_id, url, length in rows:
+            self._lengths.append(length)
+            self._total_length += length
+            self._urls.add(url)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add_articles(self, articles) -> int:
+        """Add articles to the index, skipping the URLs already indexed. Returns the number added."""
+        with self._lock:
+            self._refresh()
+            new_postings = {}
+            rows = []
+            for article in articles:
+                url = article.get("url")
+                if not url or url in self._urls:
+                    continue
+                doc_id = len(self._lengths)
+                frequencies = article_terms(article)
+                length = sum(frequencies.values())
+                rows.append((doc_id, url, article.get("title"), article.get("source"), article.get("date"), length))
+                for term, frequency in frequencies.items():
+                    new_postings.setdefault(term, []).append((doc_id, frequency))
+                self._lengths.append(length)
+                self._total_length += length
+                self._urls.add(url)
+
+            if not rows:
+                return 0
+
+            self._conn.executemany(
+                "INSERT INTO articles (id, url, title, source, date, length) VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            existing = {}
+            terms = list(new_postings)
+            for start in range(0, len(terms), 500): # Stay below SQLite's limit on query parameters
+                chunk = terms[start:start + 500]
+                query = f"SELECT term, last_id, data FROM postings WHERE term IN ({','.join('?' * len(chunk))})"
+                existing.update((term, (last_id, data)) for term, last_id, data in self._conn.execute(query, chunk))
+
+            updates = []
+            inserts = []
+            for term, postings in new_postings.items():
+                last_id = postings[-1][0]
+                if term in existing:
+                    # SQLite's || operator would turn the blob into text, so the new postings are joined here
+                    previous_id, data = existing[term]
+                    updates.append((len(postings), last_id, data + encode_postings(postings, previous_id), term))
+                else:
+                    inserts.append((term, len(postings), last_id, encode_postings(postings)))
+            self._conn.executemany(
+                "UPDATE postings SET doc_count = doc_count + ?, last_id = ?, data = ? WHERE term = ?", updates
+            )
+            self._conn.executemany("INSERT INTO postings (term, doc_count, last_id, data) VALUES (?, ?, ?, ?)", inserts)
+            self._conn.commit()
+            return len(rows)
+
+    def add_file(self, path: str) -> int:
+        """Add the articles of a JSONL store or JSON array file to the index."""
+        return self.add_articles(a for a in load_articles(path) if isinstance(a, dict))
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Return the best matching articles for a query, highest BM25 score first."""
+        terms = set(tokenise(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            self._refresh()
+            if not self._lengths:
+                return []
+            rows = self._conn.execute(
+                f"SELECT doc_count, data FROM postings WHERE term IN ({','.join('?' * len(terms))})", list(terms)
+            ).fetchall()
+
+            article_count = len(self._lengths)
+            average_length = self._total_length / article_count
+            scores = {}
+            for doc_count, data in rows:
+                idf = math.log(1 + (article_count - doc_count + 0.5) / (doc_count + 0.5))
+                for doc_id, frequency in decode_postings(data):
+                    norm = K1 * (1 - B + B * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (K1 + 1) / (frequency + norm)
+
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            results = []
+            for doc_id, score in best:
+                url, title, source, date = self._conn.execute(
+                    "SELECT url, title, source, date FROM articles WHERE id = ?", (doc_id,)
+                ).fetchone()
+                results.append({"score": round(score, 4), "url": url, "title": title, "source": source, "date": date})
+            return results
+
+    def stats(self) -> dict:
+        """Return the size of the index."""
+        with self._lock:
+            self._refresh()
+            terms, postings_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM postings").fetchone()
+        return {"articles": len(self._lengths), "terms": terms, "postings_bytes": postings_bytes}
+
+    def clear(self):
+        """Remove every article from the index."""
+        with self._lock:
+            self._conn.execute("DELETE FROM articles")
+            self._conn.execute("DELETE FROM postings")
+            self._conn.commit()
+            self._lengths = array('I')
+            self._total_length = 0
+            self._urls = set()
+
+    def close(self):
+        """Close the index database."""
+        with self._lock:
+            self._conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and search the article full-text index.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="Path of the index database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Add the articles of .json or .jsonl files to the index")
+    build.add_argument("paths", nargs="+")
+    build.add_argument("--rebuild", action="store_true", help="Empty the index first")
+    search = commands.add_parser("search", help="Search the index")
+    search.add_argument("query")
+    search.add_argument("--limit", type=int, default=10)
+    commands.add_parser("stats", help="Show the size of the index")
+    args = parser.parse_args()
+
+    index = SearchIndex(args.index)
+    try:
+        if args.command == "build":
+            if args.rebuild:
+                index.clear()
+            for path in args.paths:
+                print(f"Added {index.add_file(path)} articles from {path}")
+            print(f"{len(index)} articles in {args.index}")
+        elif args.command == "search":
+            for result in index.search(args.query, args.limit):
+                print(f"{result['score']:7.3f}  {result['date'] or '':<10}  {result['source'] or '':<20}  {result['title']}")
+                print(f"{'':9}{result['url']}")
+        else:
+            print(json.dumps(index.stats(), indent=4))
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Persistent index of the article URLs and contents that have already been collected.
+
+The index is stored in a SQLite database so it survives between runs. On start-up the
+URLs and content hashes are loaded into sets of 64-bit keys, so every lookup is O(1)
+and the in-memory index stays compact as the archive grows.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+def _key(value: str) -> int:
+    """Return a 64-bit key for a string."""
+    return int.from_bytes(hashlib.sha1(value.encode('utf-8')).digest()[:8], 'big')
+
+def content_hash(text: str) -> str:
+    """Hash the text of an article, ignoring differences in whitespace."""
+    return hashlib.sha1(' '.join(text.split()).encode('utf-8')).hexdigest()
+
+class SeenIndex:
+    """The URLs and content hashes of the articles already collected."""
+
+    def __init__(self, path: str):
+        """Open (or create) the index database at path and load it into memory."""
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS seen (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT,
+                first_seen REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        self._urls = set()
+        self._hashes = set()
+        for url, text_hash in self._conn.execute("SELECT url, content_hash FROM seen"):
+            self._urls.add(_key(url))
+            if text_hash:
+                self._hashes.add(_key(text_hash))
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def has_url(self, url: str) -> bool:
+        """Check if an article URL has already been collected."""
+        return _key(url) in self._urls
+
+    def has_content(self, text: str) -> bool:
+        """Check if an article with the same text has already been collected (e.g. under another URL)."""
+        return _key(content_hash(text)) in self._hashes
+
+    def add_articles(self, articles: list):
+        """Record a list of article dicts (with 'url' and 'cleaned_text') as collected."""
+        rows = []
+        now = time.time()
+        with self._lock:
+            for article in articles:
+                url = article.get('url')
+                if not url or self.has_url(url):
+                    continue
+                text_hash = content_hash(article['cleaned_text']) if article.get('cleaned_text') else None
+                rows.append((url, text_hash, now))
+                self._urls.add(_key(url))
+                if text_hash:
+                    self._hashes.add(_key(text_hash))
+
+            self._conn.executemany("INSERT OR IGNORE INTO seen (url, content_hash, first_seen) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+        return len(rows)
+
+    def seed_from_json(self, json_paths: list) -> int:
+        """Add the articles of existing JSON output files to the index. Missing files are skipped."""
+        added = 0
+        for json_path in json_paths:
+            try:
+                with open(json_path, "r", encoding="utf-8") as f:
+                    articles = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError) as e:
+                print(f"Could not seed seen index from {json_path}: {e}")
+                continue
+            if isinstance(articles, list):
+                added += self.add_articles([a for a in articles if isinstance(a, dict)])
+        return added
+
+    def close(self):
+        """Close the index database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,125 @@
+"""
+Summarise articles while they are still being scraped.
+
+scrape_and_analyse runs WebScraper.scrape_all_sites and AnalyseData.run at the same time, joined by
+an ArticleStream: a bounded queue the scraper puts each article into as soon as it is scraped, and
+the analyser's Bedrock workers take them from. Scraping and summarising are both mostly waiting on
+the network, so the run takes about as long as the slower of the two instead of both added up.
+
+The outputs are the same as running the two one after the other: the articles reach the analyser
+in the order of the scraped file, and the analysis is only saved once the scrape has finished. If
+either side fails, the other is stopped and nothing more is saved.
+"""
+
+import json
+import queue
+import threading
+
+try:
+    from scripts.collect_data import WebScraper
+    from scripts.add_summaries import AnalyseData
+except ImportError: # Running from inside the scripts folder
+    from collect_data import WebScraper
+    from add_summaries import AnalyseData
+
+DEFAULT_QUEUE_SIZE = 32 # Scraped articles waiting for the analyser before the scraper is held back
+POLL_SECONDS = 0.5 # How often a blocked put checks if the analyser has stopped
+
+class PipelineAborted(Exception):
+    """Raised on one side of an ArticleStream when the other side has failed."""
+
+class ArticleStream:
+    """
+    A bounded queue of articles from the scraper (producer) to the analyser (consumer).
+    put() blocks while the queue is full, so a slow analyser slows the scraper down instead of
+    scraped articles piling up in memory. Either side can abort the stream, which stops the other.
+    """
+
+    _DONE = object()
+
+    def __init__(self, max_size: int = DEFAULT_QUEUE_SIZE):
+        self._queue = queue.Queue(max(1, max_size))
+        self._aborted = threading.Event()
+        self.reason = None
+        self.count = 0
+
+    def _put(self, item):
+        while True:
+            if self._aborted.is_set():
+                raise PipelineAborted(self.reason)
+            try:
+                self._queue.put(item, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def put(self, article: dict):
+        """Add a scraped article, waiting while the queue is full. Raises PipelineAborted if the analyser stopped."""
+        # A copy, as the analyser would read back from the scraped file - the scraper still saves the original
+        self._put(json.loads(json.dumps(article)))
+        self.count += 1
+
+    def close(self):
+        """Called by the scraper once every article has been put."""
+        self._put(self._DONE)
+
+    def abort(self, reason: str):
+        """Stop the stream: the scraper's next put and the analyser's next read raise PipelineAborted."""
+        self.reason = reason
+        self._aborted.set()
+        try:
+            self._queue.put_nowait(self._DONE) # Wake the analyser if it is waiting for an article
+        except queue.Full:
+            pass # It is not waiting, and sees the abort on its next read
+
+    def __iter__(self):
+        while True:
+            item = self._queue.get()
+            if self._aborted.is_set():
+                raise PipelineAborted(self.reason)
+            if item is self._DONE:
+                return
+            yield item
+
+def scrape_and_analyse(scraper: WebScraper, analyser: AnalyseData, output_name: str,
+                       queue_size: int = DEFAULT_QUEUE_SIZE, **scrape_options) -> tuple:
+    """
+    Run scraper.scrape_all_sites(output_name, **scrape_options) while analyser.run summarises each article as it
+    is scraped. Returns (the scraped articles, the path of the analysed JSON), or (False, None) if the scrape
+    failed. An error on either side stops the other and is raised once both have stopped.
+    """
+    stream = ArticleStream(queue_size)
+    outcome = {}
+
+    def analyse():
+        try:
+            with analyser.metrics.timer("pipeline_stage_seconds", stage="analyse"):
+                outcome['analysed_json'] = analyser.run(articles=stream)
+        except BaseException as e: # Including the SystemExit of a failed Bedrock call
+            outcome['error'] = e
+            stream.abort(f"analysis failed: {e!r}")
+
+    analysis = threading.Thread(target=analyse, name="analyse", daemon=True)
+    analysis.start()
+    all_articles = False
+    try:
+        with scraper.metrics.timer("pipeline_stage_seconds", stage="collect"):
+            all_articles = scraper.scrape_all_sites(output_name, on_article=stream.put, **scrape_options)
+        if all_articles is False:
+            stream.abort("scraping failed")
+        else:
+            stream.close()
+    except PipelineAborted:
+        pass # The analysis failed, its error is raised below
+    except BaseException as e:
+        stream.abort(f"scraping failed: {e!r}")
+        analysis.join()
+        raise
+    analysis.join()
+
+    error = outcome.get('error')
+    if error is not None and not isinstance(error, PipelineAborted):
+        raise error
+    if all_articles is False:
+        return False, None
+    return all_articles, outcome['analysed_json']
@@ -0,0 +1,93 @@
+"""
+Persistent cache of article summaries, so unchanged articles are never sent to Bedrock twice.
+
+Summaries are keyed by a hash of the model ID and the rendered prompt (the prompt template
+with the article's title and cleaned text filled in), so changing the template, the article
+or the model all cause a fresh summary. Batched summaries are stored under their own batch
+prompt, apart from single-article ones. The cache is a SQLite database and the least recently
+used summaries are evicted once the stored summaries go over the size cap.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024 # 50 MB of summaries
+
+def cache_key(prompt: str, model_id: str) -> str:
+    """Return the cache key for a rendered prompt sent to a model."""
+    return hashlib.sha256(f"{model_id}\0{prompt}".encode("utf-8")).hexdigest()
+
+class SummaryCache:
+    """A persistent, size-capped cache of summary_data dicts keyed by prompt hash."""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Open (or create) the cache database at path."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    def get(self, key: str):
+        """Return the cached summary_data for a key, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, summary: dict):
+        """Store the summary_data for a key."""
+        encoded = json.dumps(summary, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, encoded, len(encoded), time.time())
+            )
+            self._conn.commit()
+            self.stats["stored"] += 1
+
+    def evict(self):
+        """Remove the least recently used summaries until the cache fits in max_bytes."""
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            to_delete = []
+            for key, size in self._conn.execute("SELECT key, size FROM summaries ORDER BY last_used"):
+                if total <= self.max_bytes:
+                    break
+                to_delete.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM summaries WHERE key = ?", to_delete)
+            self._conn.commit()
+            self.stats["evicted"] += len(to_delete)
+
+    def print_stats(self):
+        """Print the hit/miss statistics of this run."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / lookups * 100 if lookups else 0
+        print(f"Summary cache: {self.stats['hits']} hits, {self.stats['misses']} misses ({hit_rate:.0f}% hit rate), "
+              f"{self.stats['stored']} stored, {self.stats['evicted']} evicted")
+
+    def close(self):
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,253 @@
+"""
+Durable work queue shared by the processes of a distributed scrape.
+
+Tasks are stored in a SQLite database, so any number of worker processes (on one machine, or on
+machines sharing the file on a network drive that supports file locks) can take tasks from it.
+A worker claims a task with a lease: the task is its own until the lease expires, and the worker
+renews the leases of the tasks it is still working on. The task of a worker that crashed or hung is
+claimed again by another worker once its lease has expired, up to max_attempts times.
+
+Tasks belong to a run, and to a group (e.g. a news source) with a position in that group, so the
+results can be put back in order and the tasks left in a group can be cancelled.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+def worker_name() -> str:
+    """A name for this process that is unique across the machines sharing a queue."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class Task:
+    """A task claimed from the queue. The token identifies this claim, so a result sent after the lease was lost is ignored."""
+
+    def __init__(self, task_id: int, run_id: str, kind: str, group: str, position: int, payload: dict, token: str):
+        self.task_id = task_id
+        self.run_id = run_id
+        self.kind = kind
+        self.group = group
+        self.position = position
+        self.payload = payload
+        self.token = token
+
+class WorkQueue:
+    """The runs and tasks of a SQLite work queue."""
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS, wal: bool = True):
+        """
+        Open (or create) the queue database at path.
+        wal - use SQLite's write-ahead log, which lets workers read while another writes. Only works when every
+        process is on the same machine, so turn it off for a queue on a network drive.
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, int(max_attempts))
+        self._lock = threading.Lock()
+        # Transactions are started explicitly, so a claim is one atomic read and update across processes
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        if wal:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                options TEXT NOT NULL,
+                created REAL NOT NULL,
+                finished REAL
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                task_group TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_token TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                UNIQUE (run_id, kind, task_group, position)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, task_id)")
+
+    def _transaction(self, function, *args):
+        """Run function(*args) in a write transaction, so other processes wait for it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = function(*args)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _insert_tasks(self, run_id: str, tasks: list):
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO tasks (run_id, kind, task_group, position, payload, status) VALUES (?, ?, ?, ?, ?, ?)",
+            [(run_id, kind, group, position, json.dumps(payload), PENDING) for kind, group, position, payload in tasks]
+        )
+
+    def start_run(self, options: dict, tasks: list) -> str:
+        """
+        Start a run with its options (read by the workers) and first tasks. Returns the run ID.
+        tasks - a list of (kind, group, position, payload dict).
+        """
+        run_id = uuid.uuid4().hex
+
+        def start():
+            self._conn.execute("INSERT INTO runs (run_id, options, created) VALUES (?, ?, ?)",
+                               (run_id, json.dumps(options), time.time()))
+            self._insert_tasks(run_id, tasks)
+
+        self._transaction(start)
+        return run_id
+
+    def run_options(self, run_id: str) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT options FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def finish_run(self, run_id: str):
+        """Mark a run as finished, cancelling any of its tasks that are not done."""
+        def finish():
+            self._conn.execute("UPDATE tasks SET status = ? WHERE run_id = ? AND status IN (?, ?)",
+                               (CANCELLED, run_id, PENDING, LEASED))
+            self._conn.execute("UPDATE runs SET finished = ? WHERE run_id = ?", (time.time(), run_id))
+
+        self._transaction(finish)
+
+    def claim(self, owner: str) -> Task:
+        """
+        Claim the next task for owner, oldest run first, or return None if there is none to do.
+        A leased task whose lease has expired is claimed again, or failed once it has had max_attempts.
+        """
+        def claim():
+            now = time.time()
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, error = 'Lease expired' WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, self.max_attempts)
+            )
+            row = self._conn.execute("""
+                SELECT tasks.task_id, tasks.run_id, kind, task_group, position, payload
+                FROM tasks JOIN runs ON runs.run_id = tasks.run_id
+                WHERE runs.finished IS NULL AND (status = ? OR (status = ? AND lease_expires < ?))
+                ORDER BY runs.created, tasks.task_id LIMIT 1
+            """, (PENDING, LEASED, now)).fetchone()
+            if row is None:
+                return None
+            token = uuid.uuid4().hex
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_token = ?, lease_expires = ? "
+                "WHERE task_id = ?",
+                (LEASED, owner, token, now + self.lease_seconds, row[0])
+            )
+            task_id, run_id, kind, group, position, payload = row
+            return Task(task_id, run_id, kind, group, position, json.loads(payload), token)
+
+        return self._transaction(claim)
+
+    def renew(self, owner: str) -> int:
+        """Extend the leases of every task owner is working on. Returns the number renewed."""
+        def renew():
+            return self._conn.execute("UPDATE tasks SET lease_expires = ? WHERE status = ? AND lease_owner = ?",
+                                      (time.time() + self.lease_seconds, LEASED, owner)).rowcount
+
+        return self._transaction(renew)
+
+    def complete(self, task: Task, result, new_tasks: list = None) -> bool:
+        """
+        Save the result of a task (anything JSON can store), and add the tasks it led to in the same transaction.
+        Returns False if the task's lease had been lost to another worker, in which case nothing is saved.
+        """
+        def complete():
+            updated = self._conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, lease_expires = NULL WHERE task_id = ? AND status = ? AND lease_token = ?",
+                (DONE, json.dumps(result), task.task_id, LEASED, task.token)
+            ).rowcount
+            if updated and new_tasks:
+                self._insert_tasks(task.run_id, new_tasks)
+            return bool(updated)
+
+        return self._transaction(complete)
+
+    def fail(self, task: Task, error: str) -> bool:
+        """Give a task back after an error, to be tried again until it has had max_attempts. Returns True if it will be."""
+        def fail():
+            row = self._conn.execute("SELECT attempts FROM tasks WHERE task_id = ? AND status = ? AND lease_token = ?",
+                                     (task.task_id, LEASED, task.token)).fetchone()
+            if row is None:
+                return False
+            retry = row[0] < self.max_attempts
+            self._conn.execute("UPDATE tasks SET status = ?, error = ?, lease_expires = NULL WHERE task_id = ?",
+                               (PENDING if retry else FAILED, error, task.task_id))
+            return retry
+
+        return self._transaction(fail)
+
+    def cancel_group(self, run_id: str, kind: str, group: str, after_position: int = -1) -> int:
+        """Cancel the tasks of a group after a position that have not been claimed yet. Returns the number cancelled."""
+        def cancel():
+            return self._conn.execute(
+                "UPDATE tasks SET status = ? WHERE run_id = ? AND kind = ? AND task_group = ? AND position > ? AND status = ?",
+                (CANCELLED, run_id, kind, group, after_position, PENDING)
+            ).rowcount
+
+        return self._transaction(cancel)
+
+    def result(self, run_id: str, kind: str, group: str, position: int) -> tuple:
+        """Return (status, result) of a task, or (None, None) if it does not exist."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result FROM tasks WHERE run_id = ? AND kind = ? AND task_group = ? AND position = ?",
+                (run_id, kind, group, position)
+            ).fetchone()
+        if row is None:
+            return None, None
+        status, result = row
+        return status, json.loads(result) if result is not None else None
+
+    def run_finished(self, run_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT finished FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row is None or row[0] is not None
+
+    def stats(self, run_id: str) -> dict:
+        """The number of tasks of a run in each status, the retried tasks, and the tasks done by each worker."""
+        with self._lock:
+            statuses = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY status", (run_id,)
+            ).fetchall())
+            retried = self._conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE run_id = ? AND attempts > 1", (run_id,)
+            ).fetchone()[0]
+            workers = dict(self._conn.execute(
+                "SELECT lease_owner, COUNT(*) FROM tasks WHERE run_id = ? AND status = ? GROUP BY lease_owner",
+                (run_id, DONE)
+            ).fetchall())
+        return {"statuses": statuses, "retried": retried, "workers": workers}
+
+    def close(self):
+        """Close the queue database."""
+        with self._lock:
+            self._conn.close()
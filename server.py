@@ -1,26 +1,218 @@
-from flask import Flask, jsonify
-import subprocess
+from flask import Flask, Response, jsonify, request
+import gzip
+import hashlib
+import json
+import os
 import sys
+import threading
+from scripts.article_query import ArticleIndex, FACET_FIELDS, output_path
+from scripts.facet_analytics import FacetTable
+from scripts.job_runner import JobRunner
+from scripts.metrics import prometheus_text
+from scripts.search_index import SearchIndex
 print("Python executable:", sys.executable)
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RUN_MAIN_JOB = "run-main"
+ARTICLES_OUTPUT = os.path.join(BASE_DIR, "data", "all_articles_output")
+SEARCH_INDEX_PATH = os.path.join(BASE_DIR, "data", "search_index.sqlite")
+RUN_REPORT_PATH = os.path.join(BASE_DIR, "data", "run_report.json")
+GZIP_MIN_BYTES = 1024
+
 app = Flask(__name__)
+runner = JobRunner()
+
+# The article index and facet table are rebuilt when the output file changes, i.e. once per pipeline run
+_built = {}
+_index_lock = threading.Lock()
+_search_index = None
+
+def built_from_output(name, build):
+    """Return an object built from the analysed articles and its version, rebuilding it if the output has changed."""
+    path = output_path(ARTICLES_OUTPUT)
+    stat = os.stat(path)
+    key = f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+    with _index_lock:
+        if name not in _built or _built[name][0] != key:
+            print(f"Building {name} from {path}")
+            _built[name] = (key, build(path))
+        return _built[name][1], key
+
+def article_index():
+    return built_from_output("article index", ArticleIndex.from_path)
+
+def cached_json(data, version):
+    """
+    Return data as JSON with an ETag from the index version and the query, answering 304 if the
+    browser already has it, and gzipped if the browser accepts it.
+    """
+    query = json.dumps(sorted(request.args.items(multi=True)))
+    etag = hashlib.sha1(f"{version}|{request.path}|{query}".encode()).hexdigest()
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    body = json.dumps(data).encode("utf-8")
+    response = Response(body, mimetype='application/json')
+    if len(body) >= GZIP_MIN_BYTES and 'gzip' in request.accept_encodings:
+        response.set_data(gzip.compress(body))
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(etag)
+    return response
+
+@app.after_request
+def allow_website(response):
+    # The website is opened separately from this server, so allow it to read the responses
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
 
-@app.route('/run-main')
+@app.route('/run-main', methods=['GET', 'POST'])
 def run_main():
+    """Start the pipeline in the background, or return the run already in progress."""
     try:
-        # Run your main.py script and capture output
         print("Running script")
-        result = subprocess.run([sys.executable, 'server_main.py'], capture_output=True, text=True)
-        output = result.stdout
-        error = result.stderr
-
-        # Always log the output for debugging
-        print("STDOUT:\n", result.stdout)
-        print("STDERR:\n", result.stderr)
-        
-        return jsonify({'output': output, 'error': error})
+        job, created = runner.submit(
+            RUN_MAIN_JOB, [sys.executable, '-u', os.path.join(BASE_DIR, 'server_main.py')], cwd=BASE_DIR
+        )
+        status = job.to_dict()
+        status['duplicate'] = not created
+        return jsonify(status), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Poll a job's status. ?since=N only returns the output lines from line N."""
+    job = runner.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job.to_dict(since=request.args.get('since', 0, type=int)))
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Stream a job's output as Server-Sent Events, ending with a 'done' event."""
+    job = runner.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+
+    since = request.args.get('since', 0, type=int)
+
+    def stream():
+        sent = since
+        while True:
+            lines = job.wait_for_output(sent, timeout=15)
+            for line in lines:
+                yield f"data: {json.dumps({'line': line})}\n\n"
+            sent += len(lines)
+            if job.finished and sent >= len(job.output):
+                status = job.to_dict(since=sent)
+                yield f"event: done\ndata: {json.dumps(status)}\n\n"
+                return
+            if not lines:
+                yield ": keep-alive\n\n"
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/articles')
+def articles():
+    """
+    Return a page of the analysed articles.
+    Filters: q (title and summary), title, summary, source, date, date_from, date_to (dd-mm-yyyy),
+    category, product, technology, tags, geography, companies, parent_companies.
+    Paging and sorting: page, page_size, sort (date_desc, date_asc, title_asc, title_desc).
+    """
+    try:
+        index, version = article_index()
+    except FileNotFoundError:
+        return jsonify({'error': 'No analysed articles yet'}), 404
+
+    filters = {name: request.args.get(name) for name in ('q', 'title', 'summary', 'source', 'date', 'date_from', 'date_to', 'sort')}
+    facets = {name: request.args.get(name) for name in FACET_FIELDS}
+    try:
+        result = index.query(
+            page=request.args.get('page', 1, type=int),
+            page_size=request.args.get('page_size', 50, type=int),
+            **filters, **facets
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return cached_json(result, version)
+
+@app.route('/articles/sources')
+def article_sources():
+    """Return the distinct article sources, for the website's source buttons."""
+    try:
+        index, version = article_index()
+    except FileNotFoundError:
+        return jsonify({'error': 'No analysed articles yet'}), 404
+    return cached_json(index.sources(), version)
+
+@app.route('/search')
+def search():
+    """Full-text search of the indexed articles, best match first: ?q=<query>&limit=10"""
+    global _search_index
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'error': 'Missing search query q'}), 400
+    if not os.path.exists(SEARCH_INDEX_PATH):
+        return jsonify({'error': 'No search index yet - run the pipeline or scripts/search_index.py build'}), 404
+
+    with _index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(SEARCH_INDEX_PATH)
+    limit = min(max(1, request.args.get('limit', 10, type=int)), 100)
+    return jsonify({'query': query, 'results': _search_index.search(query, limit)})
+
+@app.route('/analytics/<kind>', defaults={'field': None})
+@app.route('/analytics/<kind>/<field>')
+def analytics(kind, field):
+    """
+    Aggregates over the summary_data fields. Every kind takes source, date_from and date_to filters.
+    - /analytics/counts/<field>?top=20
+    - /analytics/cooccurrence/<field>?other=<field>&top=10
+    - /analytics/timeseries/<field>?value=Openreach&bucket=week&by=source
+    - /analytics/export?top=20 (the top values of every field, overall and per source)
+    """
+    try:
+        table, version = built_from_output("facet table", FacetTable.from_path)
+    except FileNotFoundError:
+        return jsonify({'error': 'No analysed articles yet'}), 404
+
+    filters = {name: request.args.get(name) for name in ('source', 'date_from', 'date_to')}
+    top = request.args.get('top', type=int)
+    try:
+        if kind == 'export':
+            result = table.export(top=top or 20)
+        elif field is None:
+            return jsonify({'error': f'Missing field for /analytics/{kind}'}), 400
+        elif kind == 'counts':
+            result = [{'value': value, 'count': count} for value, count in table.counts(field, top=top or 20, **filters)]
+        elif kind == 'cooccurrence':
+            result = table.cooccurrence(field, request.args.get('other'), top=top or 10, **filters)
+        elif kind == 'timeseries':
+            result = table.time_series(field, request.args.get('value'), bucket=request.args.get('bucket', 'week'),
+                                       by=request.args.get('by'), **filters)
+        else:
+            return jsonify({'error': f'Unknown analytics {kind}'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return cached_json(result, version)
+
+@app.route('/metrics')
+def metrics():
+    """The timings and counters of the last pipeline run, in the Prometheus text format."""
+    try:
+        with open(RUN_REPORT_PATH, "r", encoding="utf-8") as f:
+            report = json.load(f)
+    except FileNotFoundError:
+        body = "# No pipeline run report yet\n"
+    except (OSError, ValueError) as e:
+        return Response(f"# Could not read {RUN_REPORT_PATH}: {e}\n", status=500, mimetype='text/plain')
+    else:
+        body = prometheus_text(report)
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True, threaded=True)
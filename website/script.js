@@ -1,54 +1,111 @@
-let media = [];
+const SERVER_URL = 'http://127.0.0.1:5000';
+const PAGE_SIZE = 50;
+const SEARCH_DELAY_MS = 250;
+
 let displayedMedia = [];
+let currentQuery = {};
+let currentSort = '';
+let currentPage = 1;
+let totalMatches = 0;
+let searchTimer = null;
+let latestRequest = 0; // Only the response to the latest request is shown
 
 document.addEventListener('DOMContentLoaded', () => {
-    fetch('../data/all_articles_output.json')
-        .then(res => res.json())
-        .then(data => {
-            media = data.filter(article => article.title && article.summary_data);
-            displayedMedia = [...media];
-            renderMedia(displayedMedia);
-            createSourceButtons(media); // Create dynamic source buttons
-
-            // Attach live filtering for input fields
-            document.querySelectorAll('[data-search]').forEach(input => {
-                input.addEventListener('input', filterMedia);
-            });
-        })
-        .catch(err => console.error('Error loading JSON:', err));
+    loadArticles();
+    createSourceButtons();
+
+    // Attach live filtering for input fields, waiting for the user to pause typing
+    document.querySelectorAll('[data-search]').forEach(input => {
+        input.addEventListener('input', () => {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(filterMedia, SEARCH_DELAY_MS);
+        });
+    });
+    document.getElementById('load-more').addEventListener('click', () => loadArticles(currentPage + 1));
 });
 
+async function loadArticles(page = 1) {
+    // Ask the server for one page of the articles matching the current filters and sorting
+    const params = new URLSearchParams({ ...currentQuery, page, page_size: PAGE_SIZE });
+    if (currentSort) params.set('sort', currentSort);
+    const request = ++latestRequest;
+    try {
+        const response = await fetch(`${SERVER_URL}/articles?${params}`);
+        const result = await response.json();
+        if (request !== latestRequest) return; // A newer search or page was asked for while this one loaded
+        if (result.error) {
+            console.error('Error loading articles:', result.error);
+            return;
+        }
+        displayedMedia = page === 1 ? result.articles : displayedMedia.concat(result.articles);
+        currentPage = result.page;
+        totalMatches = result.total;
+        renderMedia(displayedMedia);
+    } catch (err) {
+        console.error('Error loading articles:', err);
+    }
+}
+
 async function getTodayNews() {
   try {
-    alert("Running python script - may take a few mins to update");
-    const response = await fetch('http://127.0.0.1:5000/run-main');
-    const data = await response.json();
-    if (data.error) {
-      console.error('Python script error:', data.error);
+    // Starts the python script in the background (or joins the run already in progress)
+    const response = await fetch(`${SERVER_URL}/run-main`);
+    const job = await response.json();
+    if (job.error) {
+      console.error('Python script error:', job.error);
+      return;
+    }
+    if (job.duplicate) {
+      alert("Today's news is already being fetched - following the current run");
     } else {
-      console.log('Python script output:', data.output);
+      alert("Running python script - may take a few mins to update");
     }
+    followJob(job.job_id);
   } catch (err) {
     console.error('Request failed:', err);
   }
 }
 
-function createSourceButtons(data) {
-    const uniqueSources = [...new Set(data.map(article => article.source).filter(Boolean))];
-    const container = document.getElementById('source-button-container');
+function followJob(jobId) {
+  // Stream the python script's output as it runs
+  const events = new EventSource(`${SERVER_URL}/jobs/${jobId}/events`);
+  events.onmessage = event => {
+    console.log('Python script output:', JSON.parse(event.data).line);
+  };
+  events.addEventListener('done', event => {
+    events.close();
+    const job = JSON.parse(event.data);
+    if (job.status === 'succeeded') {
+      console.log('Python script finished - reloading news');
+      window.location.reload();
+    } else {
+      console.error('Python script error:', job.error);
+    }
+  });
+  events.onerror = err => {
+    events.close();
+    console.error('Lost connection to the python script:', err);
+  };
+}
 
-    uniqueSources.sort().forEach(source => {
-        const button = document.createElement('button');
-        button.className = 'filter';
-        button.textContent = source;
-        button.addEventListener('click', () => {
-            displayedMedia = media.filter(article =>
-                article.source.toLowerCase() === source.toLowerCase()
-            );
-            renderMedia(displayedMedia);
+async function createSourceButtons() {
+    const container = document.getElementById('source-button-container');
+    try {
+        const response = await fetch(`${SERVER_URL}/articles/sources`);
+        const sources = await response.json();
+        sources.forEach(source => {
+            const button = document.createElement('button');
+            button.className = 'filter';
+            button.textContent = source;
+            button.addEventListener('click', () => {
+                currentQuery = { source };
+                loadArticles();
+            });
+            container.appendChild(button);
         });
-        container.appendChild(button);
-    });
+    } catch (err) {
+        console.error('Error loading sources:', err);
+    }
 }
 
 function renderMedia(mediaArray) {
@@ -76,71 +133,49 @@ function renderMedia(mediaArray) {
         `;
         container.appendChild(mediaDiv);
     });
+
+    // Only offer more articles if the server has more matches than are shown
+    document.getElementById('load-more').hidden = mediaArray.length >= totalMatches;
 }
 
 function sortTitle(direction = 'asc') {
-    displayedMedia.sort((a, b) => {
-        const result = a.title.localeCompare(b.title);
-        return direction === 'asc' ? result : -result;
-    });
-    renderMedia(displayedMedia);
+    currentSort = `title_${direction}`;
+    loadArticles();
 }
 
 function sortDate(direction = 'desc') {
-    displayedMedia.sort((a, b) => {
-        const dateA = new Date(a.date);
-        const dateB = new Date(b.date);
-        return direction === 'asc' ? dateA - dateB : dateB - dateA;
-    });
-    renderMedia(displayedMedia);
+    currentSort = `date_${direction}`;
+    loadArticles();
 }
 
-
 function removeSorting() {
-    // Re-sort to original data order (filtered)
-    displayedMedia = [...media];
-
-    // Re-apply any active filters
-    filterMedia();
+    // Back to the original data order (filtered)
+    currentSort = '';
+    loadArticles();
 }
 
 function filterMedia() {
     const filters = {
-        title: document.getElementById('search-title-bar').value.toLowerCase(),
-        source: document.getElementById('search-source-bar').value.toLowerCase(),
-        date: document.getElementById('search-date-bar').value.toLowerCase(),
-        summary: document.getElementById('search-summary-bar').value.toLowerCase(),
-        category: document.getElementById('search-category-bar').value.toLowerCase(),
-        product: document.getElementById('search-product-bar').value.toLowerCase(),
-        technology: document.getElementById('search-tech-bar').value.toLowerCase(),
-        tags: document.getElementById('search-tags-bar').value.toLowerCase(),
-        companies: document.getElementById('search-company-bar').value.toLowerCase(),
-        parent_companies: document.getElementById('search-pcompany-bar').value.toLowerCase(),
-        countries: document.getElementById('search-countries-bar').value.toLowerCase(),
+        title: document.getElementById('search-title-bar').value,
+        source: document.getElementById('search-source-bar').value,
+        date: document.getElementById('search-date-bar').value,
+        summary: document.getElementById('search-summary-bar').value,
+        category: document.getElementById('search-category-bar').value,
+        product: document.getElementById('search-product-bar').value,
+        technology: document.getElementById('search-tech-bar').value,
+        tags: document.getElementById('search-tags-bar').value,
+        companies: document.getElementById('search-company-bar').value,
+        parent_companies: document.getElementById('search-pcompany-bar').value,
+        geography: document.getElementById('search-countries-bar').value,
     };
 
-    displayedMedia = media.filter(article => {
-        const sd = article.summary_data;
-        return (
-            article.title.toLowerCase().includes(filters.title) &&
-            article.source.toLowerCase().includes(filters.source) &&
-            (article.date || '').toLowerCase().includes(filters.date) &&
-            (sd.summary || '').toLowerCase().includes(filters.summary) &&
-            (sd.category || '').toLowerCase().includes(filters.category) &&
-            (sd.product || '').toLowerCase().includes(filters.product) &&
-            (sd.technology || '').toLowerCase().includes(filters.technology) &&
-            (sd.tags || '').toString().toLowerCase().includes(filters.tags) &&
-            (sd.companies_mentioned || '').toString().toLowerCase().includes(filters.companies) &&
-            (sd.parent_companies || '').toString().toLowerCase().includes(filters.parent_companies) &&
-            (sd.geography || '').toLowerCase().includes(filters.countries)
-        );
-    });
-
-    renderMedia(displayedMedia);
+    // Only send the filters in use - the server does the filtering
+    currentQuery = Object.fromEntries(Object.entries(filters).filter(([, value]) => value.trim()));
+    loadArticles();
 }
 
 function removeFilter() {
-    displayedMedia = [...media];
-    renderMedia(displayedMedia);
     document.querySelectorAll('[data-search]').forEach(input => input.value = '');
+    currentQuery = {};
+    loadArticles();
 }